@@ -0,0 +1,105 @@
+"""
+Micro-benchmark of the construction of ShortRepository objects, as built for every repository of an organisation
+listing (e.g. by the repository registry of GitHubConnector).
+
+Usage:
+    python benchmarks/bench_repository.py [--repos 3000] [--rounds 5]
+
+Three timings are reported per repository:
+    construct       building the object, the URI templates are left unparsed
+    construct+read  building it and reading every *_urlt attribute, which is what construction cost when the
+                    templates were parsed eagerly
+    eager parse     parsing every template with URITemplate directly, without the shared parse cache
+"""
+
+# Import modules
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from uritemplate import URITemplate
+from github3.repos.repo import ShortRepository
+from github3.session import GitHubSession
+from github3.utils import LazyURITemplate
+
+API = 'https://api.github.com'
+
+
+def user_json(login):
+    url = '%s/users/%s' % (API, login)
+    return {'login': login, 'id': 1, 'avatar_url': 'https://avatars.githubusercontent.com/u/1?v=4',
+            'gravatar_id': '', 'url': url, 'html_url': 'https://github.com/%s' % login,
+            'followers_url': url + '/followers', 'following_url': url + '/following{/other_user}',
+            'gists_url': url + '/gists{/gist_id}', 'starred_url': url + '/starred{/owner}{/repo}',
+            'subscriptions_url': url + '/subscriptions', 'organizations_url': url + '/orgs',
+            'repos_url': url + '/repos', 'events_url': url + '/events{/privacy}',
+            'received_events_url': url + '/received_events', 'type': 'Organization', 'site_admin': False}
+
+
+def repo_json(org, name, idx):
+    url = '%s/repos/%s/%s' % (API, org, name)
+    json = {'id': idx, 'name': name, 'full_name': '%s/%s' % (org, name), 'owner': user_json(org), 'private': True,
+            'html_url': 'https://github.com/%s/%s' % (org, name), 'description': None, 'fork': False, 'url': url}
+    for key in ('forks', 'hooks', 'teams', 'events', 'tags', 'languages', 'stargazers', 'contributors',
+                'subscribers', 'subscription', 'merges', 'downloads', 'deployments'):
+        json['%s_url' % key] = '%s/%s' % (url, key)
+    for key, template in (('keys', 'keys{/key_id}'), ('collaborators', 'collaborators{/collaborator}'),
+                          ('issue_events', 'issues/events{/number}'), ('assignees', 'assignees{/user}'),
+                          ('branches', 'branches{/branch}'), ('blobs', 'git/blobs{/sha}'),
+                          ('git_tags', 'git/tags{/sha}'), ('git_refs', 'git/refs{/sha}'),
+                          ('trees', 'git/trees{/sha}'), ('statuses', 'statuses/{sha}'),
+                          ('commits', 'commits{/sha}'), ('git_commits', 'git/commits{/sha}'),
+                          ('comments', 'comments{/number}'), ('issue_comment', 'issues/comments{/number}'),
+                          ('contents', 'contents/{+path}'), ('compare', 'compare/{base}...{head}'),
+                          ('archive', '{archive_format}{/ref}'), ('issues', 'issues{/number}'),
+                          ('pulls', 'pulls{/number}'), ('milestones', 'milestones{/number}'),
+                          ('notifications', 'notifications{?since,all,participating}'),
+                          ('labels', 'labels{/name}'), ('releases', 'releases{/id}')):
+        json['%s_url' % key] = '%s/%s' % (url, template)
+    return json
+
+
+def time_per_repo(func, list_json, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for json in list_json:
+            func(dict(json))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(list_json) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repos', type=int, default=3000, help='Repositories constructed per round.')
+    parser.add_argument('--rounds', type=int, default=5, help='Rounds, the fastest is reported.')
+    args = parser.parse_args()
+
+    session = GitHubSession()
+    list_json = [repo_json('Example-Org', 'TEST1000_A1_group%d' % i, i) for i in range(args.repos)]
+    list_templates = [name for name in dir(ShortRepository)
+                      if isinstance(getattr(ShortRepository, name), LazyURITemplate)]
+
+    def construct(json):
+        return ShortRepository(json, session)
+
+    def construct_read(json):
+        repo = ShortRepository(json, session)
+        for name in list_templates:
+            getattr(repo, name)
+        return repo
+
+    def eager_parse(json):
+        return [URITemplate(json[name[:-1]]) for name in list_templates]
+
+    print('%d repositories, best of %d rounds, microseconds per repository:' % (args.repos, args.rounds))
+    for label, func in (('construct', construct), ('construct+read', construct_read), ('eager parse', eager_parse)):
+        print('    %-16s %8.1f' % (label, time_per_repo(func, list_json, args.rounds)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+# Import modules
+from .common import *
+import abc
+import hashlib
+import os
+import tempfile
+import threading
+import zipfile
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+
+class ArtifactStore(abc.ABC):
+    """
+    A content-addressed store of submissions. Every file is stored once as an object keyed by its git blob SHA,
+    whichever group submitted it, and each submission is a small manifest of paths pointing at objects. Starter files
+    and datasets shared by every group are therefore stored and transferred once, and closing an assessment only
+    downloads the files the students changed. The SHA-256 of every object is kept in an index and checked on export.
+
+    The layout below the root of the store is:
+        index.json                          git blob SHA -> size and SHA-256 of the object
+        objects/<sha[:2]>/<sha[2:]>         the contents of each object
+        manifests/<assessment>/<group>.json the files of a submission
+
+    Subclasses implement where the files are kept, see LocalArtifactStore and RepoArtifactStore.
+    """
+
+    def __init__(self):
+
+        # Loaded on first use
+        self.dict_index = None
+        self.lock = threading.RLock()
+
+    ######################
+    # Storage, see below #
+    ######################
+
+    @abc.abstractmethod
+    def _read(self, path):
+        """
+        :param path: (string) Path of a file below the root of the store.
+        :return: (bytes) The contents of the file, or None if it does not exist.
+        """
+
+    @abc.abstractmethod
+    def _write(self, path, content_bytes, overwrite=True):
+        """
+        :param path: (string) Path of a file below the root of the store.
+        :param content_bytes: (bytes) The contents.
+        :param overwrite: (boolean) Replace the file if it exists.
+        """
+
+    def _read_object(self, file_sha):
+        return self._read(self.path_object(file_sha))
+
+    def link(self, path):
+        """
+        :param path: (string) Path of a file below the root of the store.
+        :return: (string) A link to the file relative to grading/<assessment>/README.md, or None if not browsable.
+        """
+
+        return None
+
+    ###########
+    # Objects #
+    ###########
+
+    def load_index(self):
+        """
+        Loads the index of the objects in the store.
+        :return: (dict) Mapping of git blob SHA to a dict with the size and sha256 of the object.
+        """
+
+        with self.lock:
+            if self.dict_index is None:
+                content = self._read('index.json')
+                self.dict_index = json.loads(content) if content else dict()
+            return self.dict_index
+
+    def save_index(self):
+        """
+        Writes the index, after objects have been added.
+        :return: None
+        """
+
+        with self.lock:
+            str_index = json.dumps(self.load_index(), indent=1, sort_keys=True)
+        self._write('index.json', str_index)
+
+    @staticmethod
+    def path_object(file_sha):
+        return 'objects/%s/%s' % (file_sha[:2], file_sha[2:])
+
+    def has(self, file_sha):
+        """
+        :param file_sha: (string) The git blob SHA.
+        :return: (boolean) If the store holds the object.
+        """
+
+        return file_sha in self.load_index()
+
+    def put(self, file_sha, content_bytes):
+        """
+        Adds an object to the store.
+        :param file_sha: (string) The git blob SHA of the contents.
+        :param content_bytes: (bytes) The contents.
+        :return: (dict) The entry of the object in the index.
+        """
+
+        if git_blob_sha(content_bytes) != file_sha:
+            raise ValueError('The contents do not match the git blob SHA %s.' % file_sha)
+
+        if not self.has(file_sha):
+            entry = {'size': len(content_bytes), 'sha256': hashlib.sha256(content_bytes).hexdigest()}
+            self._write(self.path_object(file_sha), content_bytes, overwrite=False)
+            with self.lock:
+                self.dict_index[file_sha] = entry
+        return self.dict_index[file_sha]
+
+    def get(self, file_sha):
+        """
+        Loads an object from the store, checking its SHA-256.
+        :param file_sha: (string) The git blob SHA.
+        :return: (bytes) The contents.
+        """
+
+        content_bytes = self._read_object(file_sha)
+        if content_bytes is None:
+            raise KeyError('The object %s is missing from the store.' % file_sha)
+        if hashlib.sha256(content_bytes).hexdigest() != self.load_index()[file_sha]['sha256']:
+            raise ValueError('The object %s failed its SHA-256 integrity check.' % file_sha)
+        return content_bytes
+
+    ###############
+    # Submissions #
+    ###############
+
+    @staticmethod
+    def path_manifest(name_assessment, g_name):
+        return 'manifests/%s/%s.json' % (name_assessment, g_name)
+
+    def store_submission(self, GH, name_repo, ref, name_assessment, g_name):
+        """
+        Stores a repository at a commit as the submission of a group. Only the files not already in the store are
+        downloaded, the listing of the commit gives the SHA of every file.
+        :param GH: The GitHubConnector.
+        :param name_repo: (string) The name of the repository.
+        :param ref: (string) The commit SHA.
+        :param name_assessment:
+        :param g_name: (string) The name of the group.
+        :return: (string) The path of the manifest below the root of the store.
+        """
+
+        dict_shas = GH.get_all_files_in_repo_at_path(name_repo, get_contents=False, relative_path=False, branch=ref)
+        set_missing = set(file_sha for file_sha in dict_shas.values() if not self.has(file_sha))
+        dict_contents = GH.get_blobs(GH.get_repo_obj(name_repo), set_missing) if set_missing else dict()
+
+        dict_files = dict()
+        for path_file, file_sha in sorted(dict_shas.items()):
+            entry = self.put(file_sha, dict_contents[file_sha]) if file_sha in dict_contents else \
+                self.load_index()[file_sha]
+            dict_files[path_file] = {'sha': file_sha, 'size': entry['size'], 'sha256': entry['sha256']}
+
+        manifest = {'assessment': name_assessment, 'group': g_name, 'repository': name_repo, 'commit': ref,
+                    'files': dict_files}
+        manifest['sha256'] = hashlib.sha256(json.dumps(dict_files, sort_keys=True).encode('UTF-8')).hexdigest()
+
+        path_manifest = self.path_manifest(name_assessment, g_name)
+        self._write(path_manifest, json.dumps(manifest, indent=4, sort_keys=True))
+
+        # Saved with each submission, so that one recorded as stored never refers to objects missing from the index
+        if dict_contents:
+            self.save_index()
+        print_status('OKAY', 'Stored %d file(s) of %s, %d new (%d bytes).'
+                     % (len(dict_files), name_repo, len(dict_contents),
+                        sum(len(content) for content in dict_contents.values())))
+        return path_manifest
+
+    def load_manifest(self, name_assessment, g_name):
+        """
+        :param name_assessment:
+        :param g_name: (string) The name of the group.
+        :return: (dict) The manifest of the submission or None.
+        """
+
+        content = self._read(self.path_manifest(name_assessment, g_name))
+        return json.loads(to_bytes(content).decode('UTF-8')) if content else None
+
+    def export_submission(self, name_assessment, g_name, path_out, as_zip=False):
+        """
+        Writes a submission out as a directory, or as a zip, from its manifest.
+        :param name_assessment:
+        :param g_name: (string) The name of the group.
+        :param path_out: (string) The directory to create, or the path of the zip.
+        :param as_zip: (boolean) Write a zip rather than a directory.
+        :return: (int) The number of files exported.
+        """
+
+        manifest = self.load_manifest(name_assessment, g_name)
+        if manifest is None:
+            print_status('FAIL', 'No submission of group %s is stored for %s.' % (g_name, name_assessment))
+            return 0
+
+        if as_zip:
+            with zipfile.ZipFile(path_out, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for path_file, entry in sorted(manifest['files'].items()):
+                    zf.writestr(zip_entry_info(path_file), self.get(entry['sha']))
+        else:
+            for path_file, entry in sorted(manifest['files'].items()):
+                path_target = os.path.join(path_out, *path_file.split('/'))
+                os.makedirs(os.path.dirname(path_target), exist_ok=True)
+                with open(path_target, 'wb') as f:
+                    f.write(self.get(entry['sha']))
+
+        print_status('OKAY', 'Exported %d file(s) of group %s to %s.' % (len(manifest['files']), g_name, path_out))
+        return len(manifest['files'])
+
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    An artifact store kept in a directory on the local machine.
+    """
+
+    def __init__(self, path_root):
+        """
+        :param path_root: (string) The directory of the store, created if it does not exist.
+        """
+
+        super(LocalArtifactStore, self).__init__()
+        self.path_root = path_root
+
+    def _read(self, path):
+        try:
+            with open(os.path.join(self.path_root, *path.split('/')), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path, content_bytes, overwrite=True):
+        path_target = os.path.join(self.path_root, *path.split('/'))
+        if not overwrite and os.path.exists(path_target):
+            return None
+        os.makedirs(os.path.dirname(path_target), exist_ok=True)
+
+        # Written to a temporary file first so an interrupted write never leaves a partial object. Each writer has
+        # its own, as groups closed in parallel may write the same shared object at the same time
+        fd, path_tmp = tempfile.mkstemp(dir=os.path.dirname(path_target), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(to_bytes(content_bytes))
+            os.replace(path_tmp, path_target)
+        except BaseException:
+            if os.path.exists(path_tmp):
+                os.remove(path_tmp)
+            raise
+
+
+class RepoArtifactStore(ArtifactStore):
+    """
+    An artifact store kept in a directory of a repository, typically the instructors repository. Objects are stored
+    as files named after their SHA, so each one is a single git blob shared by every manifest referring to it.
+    """
+
+    def __init__(self, GH, name_repo, path_root='artifacts', branch='master'):
+        """
+        :param GH: The GitHubConnector.
+        :param name_repo: (string) The name of the repository.
+        :param path_root: (string) The directory of the store within the repository.
+        :param branch: (string) The branch.
+        """
+
+        super(RepoArtifactStore, self).__init__()
+        self.GH = GH
+        self.name_repo = name_repo
+        self.path_root = path_root.strip('/')
+        self.branch = branch
+
+    def _read(self, path):
+        return self.GH.get_file_contents(self.name_repo, '%s/%s' % (self.path_root, path), ref=self.branch,
+                                         decode=False)
+
+    def _write(self, path, content_bytes, overwrite=True):
+        self.GH.create_file(name_repo=self.name_repo, path_file='%s/%s' % (self.path_root, path),
+                            file_content=content_bytes, overwrite=overwrite, branch=self.branch)
+
+    def _read_object(self, file_sha):
+        # Objects written in the current write transaction are not on GitHub yet
+        path_object = '%s/%s' % (self.path_root, self.path_object(file_sha))
+        content_bytes = self.GH.get_staged_file(self.name_repo, path_object, self.branch)
+        if content_bytes is not None:
+            return content_bytes
+
+        # The object is a blob with the same SHA, which also works for files too large for the contents API
+        repo = self.GH.get_repo_obj(self.name_repo)
+        if repo is None:
+            return None
+        try:
+            return self.GH.get_blobs(repo, [file_sha]).get(file_sha)
+        except KeyError:
+            return None
+
+    def link(self, path):
+        return '../../../../blob/%s/%s/%s' % (self.branch, self.path_root, path)
@@ -0,0 +1,203 @@
+# Import modules
+from .common import *
+from collections import namedtuple
+from github3.models import __timeformat__ as gh3_time_fmt
+import github3
+import csv
+import sqlite3
+import threading
+
+
+# A commit as held by the store, date is the committer date (UTC)
+StoredCommit = namedtuple('StoredCommit', ['sha', 'date', 'author', 'message'])
+
+# The fields of the listed commits which are stored, the commits are not built as RepoCommit objects
+COMMIT_FIELDS = ('sha', 'commit.committer.date', 'author.login', 'commit.author.name', 'commit.message', 'parents')
+
+
+def is_ancestor(sha_ancestor, sha_head, dict_parents):
+    """
+    :param sha_ancestor: (string) The SHA of a commit.
+    :param sha_head: (string) The SHA of the head of a branch.
+    :param dict_parents: (dict) The SHAs of the parents of the listed commits, keyed by commit SHA.
+    :return: (boolean) If sha_ancestor is sha_head or reachable from it through the listed commits.
+    """
+
+    list_stack = [sha_head]
+    set_seen = set()
+    while list_stack:
+        sha = list_stack.pop()
+        if sha == sha_ancestor:
+            return True
+        if sha not in set_seen:
+            set_seen.add(sha)
+            list_stack.extend(dict_parents.get(sha, ()))
+    return False
+
+
+class CommitStore(object):
+    """
+    A local SQLite copy of the commit graph of the branches of the student repositories. Each sync only downloads the
+    commits made since the last one, so questions such as the latest commit before a deadline are answered locally.
+
+    A branch is synced by comparing its head with the head seen last time; if it moved, the commits dated from the
+    previous head onwards are listed with since=. Should the previous head not be an ancestor of the new one (e.g.
+    after a force push) or any of them have a parent the store does not hold (e.g. a commit back-dated before the
+    previous head) the whole branch is listed again, replacing the commits recorded on it.
+    """
+
+    def __init__(self, GH, path_store=':memory:'):
+        """
+        Opens the store, creating the tables if needed.
+        :param GH: The GitHubConnector.
+        :param path_store: (string) The path of the SQLite database, by default it is only kept in memory.
+        """
+
+        # Load instantiated classes
+        self.GH = GH
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path_store, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS commits (repo TEXT, sha TEXT, date TEXT, author TEXT, '
+                        'message TEXT, parents TEXT, PRIMARY KEY (repo, sha))')
+        self.db.execute('CREATE TABLE IF NOT EXISTS branch_commits (repo TEXT, branch TEXT, sha TEXT, '
+                        'PRIMARY KEY (repo, branch, sha))')
+        self.db.execute('CREATE TABLE IF NOT EXISTS branches (repo TEXT, branch TEXT, head TEXT, synced TEXT, '
+                        'PRIMARY KEY (repo, branch))')
+        self.db.execute('CREATE INDEX IF NOT EXISTS commits_date ON commits (repo, date)')
+        self.db.commit()
+
+    def _insert(self, name_repo, branch, list_commits, replace=False):
+        list_rows = list()
+        for commit in list_commits:
+            list_rows.append((name_repo, commit.sha, commit.commit_committer_date,
+                              commit.author_login or commit.commit_author_name, commit.commit_message,
+                              ' '.join(parent['sha'] for parent in commit.parents)))
+        with self.lock:
+            if replace:
+                self.db.execute('DELETE FROM branch_commits WHERE repo = ? AND branch = ?', (name_repo, branch))
+            self.db.executemany('INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?)', list_rows)
+            self.db.executemany('INSERT OR IGNORE INTO branch_commits VALUES (?, ?, ?)',
+                                [(name_repo, branch, row[1]) for row in list_rows])
+            self.db.commit()
+
+    def sync(self, name_repo, branch='master', force=False):
+        """
+        Downloads the commits made to a branch since it was last synced.
+        :param name_repo: (string) The name of the repository.
+        :param branch: (string) The branch.
+        :param force: (boolean) List every commit of the branch again.
+        :return: (int) The number of commits listed.
+        """
+
+        repo = self.GH.get_repo_obj(name_repo)
+        if repo is None:
+            return 0
+
+        try:
+            ref = repo.ref('heads/%s' % branch)
+        except github3.exceptions.Conflict:
+            ref = None  # the repository is empty
+        head = ref.object.sha if ref else None
+
+        with self.lock:
+            row = self.db.execute('SELECT head FROM branches WHERE repo = ? AND branch = ?',
+                                  (name_repo, branch)).fetchone()
+            row_head = self.db.execute('SELECT date FROM commits WHERE repo = ? AND sha = ?',
+                                       (name_repo, row[0] if row else None)).fetchone()
+
+        num_listed = 0
+        if head is not None and (force or row is None or row[0] != head):
+            list_commits = None
+            if not force and row_head is not None:
+                list_commits = list(repo.commits(sha=branch, since=row_head[0], fields=COMMIT_FIELDS))
+                dict_parents = {commit.sha: [parent['sha'] for parent in commit.parents] for commit in list_commits}
+                set_parents = set(sha for list_parents in dict_parents.values() for sha in list_parents) - \
+                    set(dict_parents)
+                with self.lock:
+                    num_known = self.db.execute(
+                        'SELECT COUNT(*) FROM commits WHERE repo = ? AND sha IN (%s)' % ','.join('?' * len(set_parents)),
+                        [name_repo] + list(set_parents)).fetchone()[0] if set_parents else 0
+                # The commits of the previous head stay on the branch only if the new head descends from it
+                if num_known < len(set_parents) or head not in dict_parents or \
+                        not is_ancestor(row[0], head, dict_parents):
+                    list_commits = None
+                else:
+                    self._insert(name_repo, branch, list_commits)
+            if list_commits is None:
+                list_commits = list(repo.commits(sha=branch, fields=COMMIT_FIELDS))
+                self._insert(name_repo, branch, list_commits, replace=True)
+            num_listed = len(list_commits)
+
+        with self.lock:
+            if head is None:
+                # The branch was deleted or the repository emptied, none of its former commits are on it anymore
+                self.db.execute('DELETE FROM branch_commits WHERE repo = ? AND branch = ?', (name_repo, branch))
+            self.db.execute('INSERT OR REPLACE INTO branches VALUES (?, ?, ?, ?)',
+                            (name_repo, branch, head, datetime.utcnow().strftime(gh3_time_fmt)))
+            self.db.commit()
+        return num_listed
+
+    def sync_all(self, list_repos, branch='master', max_workers=1):
+        """
+        Syncs a branch of several repositories.
+        :param list_repos: (list) The names of the repositories.
+        :param branch: (string) The branch.
+        :param max_workers: (int) Repositories synced at the same time.
+        :return: (int) The number of commits listed.
+        """
+
+        list_listed = map_ordered(lambda name_repo: self.sync(name_repo, branch), list_repos, max_workers=max_workers)
+        print_status('OKAY', 'Synced %d repositories, %d new commit(s).' % (len(list_repos), sum(list_listed)))
+        return sum(list_listed)
+
+    def latest_before(self, name_repo, utc_datetime, branch='master'):
+        """
+        Finds the latest commit on a branch made before a time, from the commits already synced.
+        :param name_repo: (string) The name of the repository.
+        :param utc_datetime: (datetime) The time, in UTC.
+        :param branch: (string) The branch.
+        :return: (StoredCommit) or None if there is no such commit.
+        """
+
+        with self.lock:
+            row = self.db.execute(
+                'SELECT c.sha, c.date, c.author, c.message FROM commits c JOIN branch_commits b '
+                'ON b.repo = c.repo AND b.sha = c.sha WHERE b.repo = ? AND b.branch = ? AND c.date <= ? '
+                'ORDER BY c.date DESC LIMIT 1',
+                (name_repo, branch, datetime.strftime(utc_datetime, gh3_time_fmt))).fetchone()
+        if row is None:
+            return None
+        return StoredCommit(row[0], datetime.strptime(row[1], gh3_time_fmt), row[2], row[3])
+
+    def timeline(self, name_repo, branch='master'):
+        """
+        :param name_repo: (string) The name of the repository.
+        :param branch: (string) The branch.
+        :return: (list) The StoredCommits of the branch, oldest first.
+        """
+
+        with self.lock:
+            list_rows = self.db.execute(
+                'SELECT c.sha, c.date, c.author, c.message FROM commits c JOIN branch_commits b '
+                'ON b.repo = c.repo AND b.sha = c.sha WHERE b.repo = ? AND b.branch = ? ORDER BY c.date',
+                (name_repo, branch)).fetchall()
+        return [StoredCommit(row[0], datetime.strptime(row[1], gh3_time_fmt), row[2], row[3]) for row in list_rows]
+
+    def export_timeline(self, name_repo, path_csv, branch='master'):
+        """
+        Writes the commits of a branch to a CSV file for auditing, oldest first.
+        :param name_repo: (string) The name of the repository.
+        :param path_csv: (string) The path of the CSV file.
+        :param branch: (string) The branch.
+        :return: (int) The number of commits written.
+        """
+
+        list_commits = self.timeline(name_repo, branch)
+        with open(path_csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['sha', 'date', 'author', 'message'])
+            for commit in list_commits:
+                writer.writerow([commit.sha, datetime.strftime(commit.date, gh3_time_fmt), commit.author,
+                                 commit.message])
+        return len(list_commits)
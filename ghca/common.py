@@ -1,5 +1,20 @@
 # Import modules
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import csv
+import hashlib
+import io
+import shutil
+import threading
+import zipfile
+
+# Per-thread output buffer, set while a worker thread processes one item of map_ordered
+_output = threading.local()
+
+# Extensions of files which are already compressed, stored in zips as they are rather than deflated again
+ZIP_STORED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.zip', '.gz', '.bz2', '.xz', '.7z', '.parquet', '.npz',
+                         '.whl', '.jar', '.mp3', '.mp4'}
 
 def print_header(str_out):
     """
@@ -9,12 +24,26 @@ def print_header(str_out):
     """
 
     rule = '*' * 120
-    print('\n' + rule)
-    print('|| %s' % str_out)
-    print(rule)
+    print_out('\n' + rule)
+    print_out('|| %s' % str_out)
+    print_out(rule)
     return None
 
 
+def print_out(str_out=''):
+    """
+    Prints a line of output, or buffers it when called from a worker thread of map_ordered.
+    :param str str_out: (optional)
+    :return None
+    """
+
+    list_buffer = getattr(_output, 'buffer', None)
+    if list_buffer is None:
+        print(str_out)
+    else:
+        list_buffer.append(str_out)
+
+
 def print_status(str_status, str_out):
     """
     Prints an output message formatted specifically for status events.
@@ -23,9 +52,51 @@ def print_status(str_status, str_out):
     str_timestamp = datetime.now().strftime('%H:%M:%S')
 
     if str_status == 'WARN' or str_status == 'FAIL':
-        print('[%s]!(%s): %s' % (str_status, str_timestamp, str_out))
+        print_out('[%s]!(%s): %s' % (str_status, str_timestamp, str_out))
     else:
-        print('[%s] (%s): %s' % (str_status, str_timestamp, str_out))
+        print_out('[%s] (%s): %s' % (str_status, str_timestamp, str_out))
+
+
+def map_ordered(func, list_items, max_workers=1):
+    """
+    Calls func on each item using a pool of worker threads. The output printed by each call is buffered and replayed
+    in the order of list_items so that logs stay the same regardless of which call finishes first.
+    :param func: (required) Function taking a single item.
+    :param list_items: (required) The items to process.
+    :param int max_workers: (optional) Number of worker threads, 1 processes the items in the calling thread.
+    :return: (list) The return values of func in the order of list_items.
+    """
+
+    list_items = list(list_items)
+    if max_workers <= 1 or len(list_items) <= 1:
+        return [func(item) for item in list_items]
+
+    def run(item):
+        _output.buffer = list()
+        try:
+            return func(item), None, _output.buffer
+        except Exception as e:
+            return None, e, _output.buffer
+        finally:
+            _output.buffer = None
+
+    list_results = list()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list_futures = [executor.submit(run, item) for item in list_items]
+        for future in list_futures:
+            result, error, list_lines = future.result()
+
+            # Through print_out, so a map_ordered running in a worker of another one is buffered by that worker too
+            for line in list_lines:
+                print_out(line)
+            if error is not None:
+                # The items not started yet are dropped rather than run for output which is thrown away
+                for future_pending in list_futures:
+                    future_pending.cancel()
+                raise error
+            list_results.append(result)
+
+    return list_results
 
 
 def array_to_md_table(array):
@@ -53,30 +124,118 @@ def array_to_md_table(array):
 
     return str_out
 
-def validate_csv(input_str, delimiter=','):
+def iter_csv_rows(input_str, delimiter=','):
     """
-    Takes a string (CSV formatted) and validates it. Returns the CSV as a string.
+    Reads a CSV string in a single pass with the csv module, so quoted fields are handled, stripping the whitespace
+    around each cell and skipping blank lines. Every row must have as many columns as the header, which must have at
+    least two.
+    :param input_str: (required) The CSV as a string, header first.
+    :param delimiter: (optional) The delimiter of the cells.
+    :return: Generator of (line number, list of cells) tuples, the header excluded. Raises csv.Error if the CSV is
+             invalid.
     """
 
-    idx = 0
-    header_cols = 0
-    for row in input_str.splitlines():
-
-        # Get number of columns
-        cur_num_cols = len(row.split(delimiter))
+    reader = csv.reader(io.StringIO(input_str), delimiter=delimiter, skipinitialspace=True)
+    header_cols = None
+    for row in reader:
+        list_cells = [cell.strip() for cell in row]
+        if not any(list_cells):
+            continue
 
         # Load expected number of columns from header
-        if idx == 0:
-            header_cols = cur_num_cols
+        if header_cols is None:
+            header_cols = len(list_cells)
+            if header_cols < 2:
+                raise csv.Error('line %d: the header has %d column(s), expected at least 2.'
+                                % (reader.line_num, header_cols))
+        elif header_cols != len(list_cells):
+            raise csv.Error('line %d: number of columns (%d) does not match header (%d).'
+                            % (reader.line_num, len(list_cells), header_cols))
         else:
-            if header_cols != cur_num_cols:
-                print_status('FAIL', 'Number of columns (%d) does not match header (%d).' % (header_cols, cur_num_cols))
-                return False
+            yield reader.line_num, list_cells
+
+    if header_cols is None:
+        raise csv.Error('the CSV is empty, expected a header.')
+
+
+def parse_student_csv(input_str):
+    """
+    Parses the student mapping CSV (header, then one 'ID,username' row per student) in a single pass, checking the
+    columns of each row and that IDs and usernames are unique.
+    :param input_str: (required) The CSV as a string.
+    :return: (tuple) The username -> ID and ID -> username dicts, or None if the CSV is invalid.
+    """
+
+    dict_ids = dict()
+    dict_usernames = dict()
+    try:
+        for line_num, list_cells in iter_csv_rows(input_str):
+            if not list_cells[0] or not list_cells[1]:
+                print_status('FAIL', 'Line %d: expected a student ID and a username.' % line_num)
+                return None
+            student_id, username = list_cells[0], list_cells[1]
+            if username in dict_ids:
+                print_status('FAIL', 'Line %d: username %s is listed more than once.' % (line_num, username))
+                return None
+            if student_id in dict_usernames:
+                print_status('FAIL', 'Line %d: student ID %s is listed more than once.' % (line_num, student_id))
+                return None
+            dict_ids[username] = student_id
+            dict_usernames[student_id] = username
+    except csv.Error as e:
+        print_status('FAIL', 'CSV format is invalid: %s' % e)
+        return None
+
+    return dict_ids, dict_usernames
+
+
+def parse_groups_csv(input_str, max_group_size=None):
+    """
+    Parses an assessment groups CSV (header, then one 'group|member, member, ...' row per group) in a single pass,
+    checking the columns of each row, that group names are unique, that each user is in one group only and the size
+    of the groups.
+    :param input_str: (required) The CSV as a string.
+    :param max_group_size: (optional) The maximum number of members of a group.
+    :return: (OrderedDict) Mapping of group name to the list of its members, or None if the CSV is invalid.
+    """
+
+    dict_groups = OrderedDict()
+    set_all_members = set()
+    try:
+        for line_num, list_cells in iter_csv_rows(input_str, delimiter='|'):
+            if not list_cells[0]:
+                print_status('FAIL', 'Line %d: expected a group name and its members.' % line_num)
+                return None
+            group_name = list_cells[0]
+            list_cur_g_members = [x.strip() for x in list_cells[1].split(',') if x.strip()]
+            if not list_cur_g_members:
+                print_status('FAIL', 'Line %d: group has no members: %s' % (line_num, group_name))
+                return None
 
-        idx += 1
+            # Check to make sure group name is unique
+            if group_name in dict_groups:
+                print_status('FAIL', 'Line %d: group name is not unique: %s' % (line_num, group_name))
+                return None
 
-    # No errors
-    return True
+            # Maximum members in a group
+            if max_group_size is not None and len(list_cur_g_members) > max_group_size:
+                print_status('FAIL', 'Line %d: group exceeds maximum number of allowed members: %s'
+                             % (line_num, group_name))
+                return None
+
+            # User is only in one group, GitHub usernames are case-insensitive
+            for cur_username in list_cur_g_members:
+                if cur_username.lower() in set_all_members:
+                    print_status('FAIL', 'Line %d: user is in more than one group: %s' % (line_num, cur_username))
+                    return None
+                set_all_members.add(cur_username.lower())
+
+            dict_groups[group_name] = list_cur_g_members
+    except csv.Error as e:
+        print_status('FAIL', 'CSV format is invalid: %s' % e)
+        return None
+
+    return dict_groups
 
 
 def str_datetime_to_utc_offset(str_datetime, int_utc_offset):
@@ -91,3 +250,87 @@ def str_datetime_to_utc_offset(str_datetime, int_utc_offset):
     dt_utc = dt_due_date - timedelta(hours=int_utc_offset)
 
     return dt_utc
+
+
+def git_blob_sha(file_content):
+    """
+    Computes the SHA git assigns to a blob with the given contents, without contacting GitHub.
+    :param bytes file_content: (required) The raw contents of the file.
+    :return: (string) The hex SHA-1 of the blob.
+    """
+
+    obj_sha = hashlib.sha1()
+    obj_sha.update(('blob %d\0' % len(file_content)).encode('UTF-8'))
+    obj_sha.update(file_content)
+    return obj_sha.hexdigest()
+
+
+def to_bytes(file_content):
+    """
+    Converts file contents to UTF-8 encoded bytes, leaving bytes untouched.
+    :param file_content: (required) The contents as a string or bytes.
+    :return: (bytes)
+    """
+
+    if isinstance(file_content, bytes):
+        return file_content
+    return file_content.encode('UTF-8')
+
+
+def strip_zip_root(file_in, file_out):
+    """
+    Copies a zip archive, removing the single top level folder every entry is stored under (as added by GitHub to
+    archives of a repository). Entries are streamed one at a time and are not recompressed in memory as a whole.
+    :param file_in: (required) File-like object holding the source archive.
+    :param file_out: (required) File-like object the new archive is written to.
+    :return: (int) Number of files copied.
+    """
+
+    num_files = 0
+    with zipfile.ZipFile(file_in, 'r') as zf_in, zipfile.ZipFile(file_out, 'w', zipfile.ZIP_DEFLATED) as zf_out:
+        for info_in in zf_in.infolist():
+
+            # Drop the top level folder, and the entry for the folder itself
+            filename = info_in.filename.split('/', 1)[1] if '/' in info_in.filename else ''
+            if not filename or filename.endswith('/'):
+                continue
+
+            # The size is not known up front, write Zip64 headers in case the entry exceeds 2 GiB
+            info_out = zip_entry_info(filename, info_in.date_time)
+            with zf_in.open(info_in) as f_src, zf_out.open(info_out, 'w', force_zip64=True) as f_dst:
+                shutil.copyfileobj(f_src, f_dst)
+            num_files += 1
+
+    return num_files
+
+
+def zip_entry_info(filename, date_time=(1980, 1, 1, 0, 0, 0)):
+    """
+    Builds the metadata of a zip entry. Files are marked as having been created on Windows so that Unix permissions
+    are not inferred as 0000, and files which are already compressed are stored rather than deflated.
+    :param filename: (required) Path of the file in the archive.
+    :param date_time: (optional) Modification time of the file.
+    :return: (ZipInfo)
+    """
+
+    info = zipfile.ZipInfo(filename, date_time=date_time)
+    extension = filename[filename.rfind('.'):].lower() if '.' in filename.rsplit('/', 1)[-1] else ''
+    info.compress_type = zipfile.ZIP_STORED if extension in ZIP_STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+    info.create_system = 0
+    return info
+
+
+def write_zip_stream(iter_files, file_out):
+    """
+    Writes files to a zip archive as they arrive, so only one of them is held in memory at a time.
+    :param iter_files: (required) Iterable of (path, contents) tuples, e.g. a generator downloading the files.
+    :param file_out: (required) File-like object the archive is written to, e.g. a SpooledTemporaryFile.
+    :return: (int) Number of files written.
+    """
+
+    num_files = 0
+    with zipfile.ZipFile(file_out, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for filename, file_content in iter_files:
+            zf.writestr(zip_entry_info(filename), to_bytes(file_content))
+            num_files += 1
+    return num_files
@@ -1,5 +1,6 @@
 # Import modules
 from .common import *
+import os
 try:
     import simplejson as json
 except ImportError:
@@ -56,3 +57,38 @@ class CourseConfig(object):
         self.path_assessment_status = self.config['repo_instructors_path_config'] + '/assessment_status.json'
         self.path_assessment_config = self.config['repo_instructors_path_config'] + '/assessment_config.json'
         self.path_student_mapping = self.config['repo_instructors_path_config'] + '/student_mapping.csv'
+
+        # Number of concurrent requests used when downloading files
+        self.num_fetch_workers = self.config.get('fetch_workers', 8)
+
+        # Number of pages of a listing fetched ahead in parallel, 0 fetches them one after another
+        self.num_prefetch_pages = self.config.get('prefetch_pages', 0)
+
+        # Opt in: drop the JSON of listed objects once copied into their attributes, which saves memory on large
+        # listings but leaves out of as_dict() and as_json() the fields held by attributes
+        self.slim_models = self.config.get('slim_models', False)
+
+        # Number of groups processed at the same time and the limits on requests made to GitHub
+        self.max_workers = self.config.get('max_workers', 1)
+        self.max_concurrent_requests = self.config.get('max_concurrent_requests', 8)
+        self.max_writes_per_minute = self.config.get('max_writes_per_minute', 80)
+
+        # Raise an error instead of waiting for the reset when the hourly API budget runs out
+        self.rate_limit_fail_fast = self.config.get('rate_limit_fail_fast', False)
+
+        # HTTP response cache, kept in memory and optionally in a SQLite file between sessions
+        self.http_cache_size = self.config.get('http_cache_size_mb', 64) * 1024 * 1024
+        self.http_cache_path = self.config.get('http_cache_path', None)
+
+        # Journal of the finished steps of long operations, by default next to the config file
+        self.path_journal = self.config.get('journal_path', None) or os.path.splitext(path_config)[0] + '.journal.jsonl'
+
+        # Where close_assessment stores submissions: 'zip' for a zip per group, or a content-addressed store kept in
+        # the instructors repository ('repo') or in a local directory ('local', by default next to the config file)
+        self.artifact_store = self.config.get('artifact_store', 'zip')
+        self.artifact_store_path = self.config.get('artifact_store_path', None) or \
+            (os.path.splitext(path_config)[0] + '_artifacts' if self.artifact_store == 'local' else 'artifacts')
+
+        # Local SQLite copy of the commits of the student repositories, by default next to the config file
+        self.commit_store_path = self.config.get('commit_store_path', None) or \
+            os.path.splitext(path_config)[0] + '.commits.sqlite'
@@ -1,5 +1,8 @@
 # Import modules
 from .common import *
+from .membership import MembershipIndex
+from .registry import LazyRegistry, team_slug
+from .commit_store import CommitStore
 import github3
 import base64
 try:
@@ -8,9 +11,20 @@ except ImportError:
     import json
 import os
 from datetime import datetime
-from github3.models import __timeformat__ as gh3_time_fmt
-from io import BytesIO
-import zipfile
+from github3.cache import ResponseCache
+from github3.session import RateLimiter
+from tempfile import SpooledTemporaryFile
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Archives larger than this (bytes) are spooled to disk rather than held in memory
+SPOOL_MAX_SIZE = 32 * 1024 * 1024
+
+# Files staged in a write transaction larger than this (bytes) are uploaded as blobs straight away, not held in memory
+STAGE_MAX_SIZE = 1024 * 1024
 
 
 class GitHubConnector(object):
@@ -31,11 +45,142 @@ class GitHubConnector(object):
             print(e)
             raise
 
+        # Every request goes through one limiter, shared by all worker threads
+        self.GH.session.rate_limiter = RateLimiter(max_concurrent=self.CC.max_concurrent_requests,
+                                                   max_writes_per_minute=self.CC.max_writes_per_minute,
+                                                   fail_fast=self.CC.rate_limit_fail_fast)
+
+        # Listings fetch their pages ahead of the loops consuming them
+        self.GH.session.prefetch_pages = self.CC.num_prefetch_pages
+
+        # Nested objects and timestamps are built when first read, slim models also drop the JSON they hold
+        self.GH.session.slim_models = self.CC.slim_models
+
+        # Unchanged GET responses are revalidated with ETags and served from the cache, 304s are free
+        self.GH.session.cache = ResponseCache(max_size=self.CC.http_cache_size, path=self.CC.http_cache_path)
+
+        # Guards the shared caches below when groups are processed in parallel
+        self.lock = threading.RLock()
+
         # Extract organisation objects
         self.org = self.GH.organization(self.CC.name_organisation)
-        self.teams = {team.name: team for team in self.org.teams()}
-        self.repos = {repo.name: repo for repo in self.org.repositories()}
+
+        # Teams and repositories are looked up by name when first needed, the organisation is only listed on iteration
+        self.teams = LazyRegistry(self.resolve_team, lambda: ((team.name, team) for team in self.org.teams()))
+        self.repos = LazyRegistry(self.resolve_repo, lambda: ((repo.name, repo) for repo in self.org.repositories()))
+
+        # Members of the organisation and teams, loaded on first use
+        self.membership = MembershipIndex(self)
+
+        # Cached blob SHAs of the files on each branch written to in a write transaction, keyed by (repository, branch)
+        self.dict_tree_shas = dict()
+        self.dict_branch_locks = dict()
+
+        # Open write transactions, keyed by (repository, branch)
+        self.dict_transactions = dict()
+
+        # Number of files each thread has staged in write transactions, see staged_count
+        self.local = threading.local()
+
+        # Local copy of the commits of the student repositories, synced incrementally
+        self.commits = CommitStore(self, self.CC.commit_store_path)
         print_status('OKAY', 'GitHubConnector successfully authenticated.')
+        self.print_rate_limit()
+
+    def print_rate_limit(self):
+        """
+        Prints the API budget reported by the most recent response, no request is made.
+        :return: (dict) The budget with limit, remaining and reset or None.
+        """
+
+        budget = self.GH.session.rate_limiter.budget('core')
+        if budget:
+            str_reset = datetime.fromtimestamp(budget['reset']).strftime('%H:%M:%S')
+            print_status('NOTE', 'API requests remaining: %d of %d, resets at %s.' % (budget['remaining'],
+                                                                                      budget['limit'], str_reset))
+        return budget
+
+    def get_core_budget(self):
+        """
+        Loads the budget of core API requests, from the most recent response or otherwise from /rate_limit (which
+        does not count against it).
+        :return: (dict) The budget with limit, remaining and reset (epoch seconds).
+        """
+
+        budget = self.GH.session.rate_limiter.budget('core')
+        if budget is None or budget['reset'] <= time.time():
+            budget = dict(self.GH.rate_limit()['resources']['core'])
+        return budget
+
+    def map_in_waves(self, func, list_items, list_costs, reserve=0, max_workers=1):
+        """
+        Calls map_ordered(func) on waves of items which fit in the remaining budget of core API requests, waiting for
+        the reset of the budget between waves, so an operation never runs out of requests part way through an item.
+        :param func: (required) Function taking one item.
+        :param list_items: (list) The items.
+        :param list_costs: (list) The estimated number of requests of each item.
+        :param reserve: (int) Requests to keep for after the items.
+        :param max_workers: (int) Items processed at the same time.
+        :return: (list) The return values of func in the order of the items.
+        """
+
+        list_results = list()
+        idx_start = 0
+        has_waited = False
+        while idx_start < len(list_items):
+            budget = self.get_core_budget()
+            available = budget['remaining'] - reserve
+            idx_end, requests = idx_start, 0
+            while idx_end < len(list_items) and requests + list_costs[idx_end] <= available:
+                requests += list_costs[idx_end]
+                idx_end += 1
+
+            if idx_end == idx_start:
+                if has_waited:
+                    # Even a full budget is estimated to be too small, make the best of it
+                    requests += list_costs[idx_end]
+                    idx_end += 1
+                else:
+                    str_reset = datetime.fromtimestamp(budget['reset']).strftime('%H:%M:%S')
+                    print_status('NOTE', 'Waiting for the API budget to reset at %s, %d item(s) remaining.'
+                                 % (str_reset, len(list_items) - idx_start))
+                    time.sleep(max(0, budget['reset'] - time.time()) + 1)
+                    has_waited = True
+                    continue
+
+            if idx_start > 0 or idx_end < len(list_items):
+                print_status('NOTE', 'Processing items %d to %d of %d, about %d requests.'
+                             % (idx_start + 1, idx_end, len(list_items), requests))
+            list_results += map_ordered(func, list_items[idx_start:idx_end], max_workers=max_workers)
+            idx_start = idx_end
+            has_waited = False
+        return list_results
+
+    def resolve_team(self, name_team):
+        """
+        Looks up a team of the organisation by name, using the slug derived from the name.
+        :param name_team: (string) The name of the team.
+        :return: (Team) object or None.
+        """
+
+        team = self.org.team_by_slug(team_slug(name_team))
+        if team is None or team.name == name_team:
+            # No team has the slug (404), so none has the name either
+            return team
+
+        # Another team holds the slug and GitHub gave this one a different slug, list the teams once instead
+        if not self.teams.is_cached(name_team):
+            self.teams.refresh()
+        return self.teams.get_cached(name_team)
+
+    def resolve_repo(self, name_repo):
+        """
+        Looks up a repository of the organisation by name.
+        :param name_repo: (string) The name of the repository.
+        :return: (Repository) object or None.
+        """
+
+        return self.GH.repository(self.org.login, name_repo)
 
     def create_team(self, name_team, privacy='secret', permission='pull'):
         """
@@ -66,9 +211,10 @@ class GitHubConnector(object):
         :return: (Repo) object or None.
 
         """
-        if name_repo in self.repos:
+        repo = self.repos.get(name_repo)
+        if repo is not None:
             print_status('SKIP', 'Repository already exists: %s.' % name_repo)
-            return self.repos[name_repo]
+            return repo
         else:
             repo = self.org.create_repository(name_repo, private=is_private)
             if repo:
@@ -92,34 +238,72 @@ class GitHubConnector(object):
 
         repo = self.get_repo_obj(name_repo)
 
-        if path in ["/", "."]:  # assume the caller means the root directory if these are used for path
-            path = ""
-        if path and path[0] != "/":  # if path non-empty, make sure it ends with "/"
-            path += "/"
-        data = dict()
         try:
-            tree = repo.tree("%s?recursive=1" % branch)
+            tree = repo.compact_tree(branch)
         #except github3.exceptions.ClientError as e:
         except Exception as e:
             return dict()  # return empty dict because repository is empty
-        tree = tree.as_dict()
-        if tree['truncated']:
-            print("Warning: there were too many files and not all were received through the GitHub API!")
-        for elem in tree['tree']:
-            if elem['path'].startswith(path):
-                if elem['type'] == 'blob':
-                    # get the actual contents
-                    contents = base64.b64decode(repo.file_contents(elem['path']).content) if get_contents else elem[
-                        'sha']
-                    if relative_path:
-                        data[elem['path'][len(path):]] = contents
-                    else:
-                        data[elem['path']] = contents
-        return data
+        if tree is None:
+            return dict()  # the branch does not exist
+        dict_shas = tree.blob_shas(path, relative=relative_path)
+
+        # Get the actual contents, each distinct blob is fetched once
+        if get_contents:
+            dict_blob_contents = self.get_blobs(repo, set(dict_shas.values()))
+            return {path_file: dict_blob_contents[file_sha] for path_file, file_sha in dict_shas.items()}
+        return dict_shas
+
+    def iter_files_in_repo_at_path(self, name_repo, path="", branch="master"):
+        """
+        Generates the files below a path of a repository with their contents, downloading them in batches of
+        fetch_workers files so only one batch is held in memory.
+        :param name_repo: (string) The name of the repository.
+        :param path: (string) The directory, the root directory by default.
+        :param branch: (string) The branch, tag or commit SHA.
+        :return: Generator of (path relative to the directory, contents as bytes) tuples.
+        """
+
+        repo = self.get_repo_obj(name_repo)
+        list_files = sorted(self.get_all_files_in_repo_at_path(name_repo, path=path, get_contents=False,
+                                                               branch=branch).items())
+        size_batch = self.CC.num_fetch_workers
+        for i in range(0, len(list_files), size_batch):
+            list_batch = list_files[i:i + size_batch]
+            dict_contents = self.get_blobs(repo, set(file_sha for _, file_sha in list_batch))
+            for path_file, file_sha in list_batch:
+                yield path_file, dict_contents[file_sha]
+
+    def get_blobs(self, repo, list_sha):
+        """
+        Fetches the contents of several blobs concurrently by their SHA, bounded by the fetch_workers setting of the
+        course configuration.
+        :param repo: (Repo) The repository object the blobs are stored in.
+        :param list_sha: (iterable) The blob SHAs to fetch.
+        :return: (dict) Mapping of blob SHA to the decoded contents (bytes). Raises KeyError if a blob could not be
+                 fetched, after reporting every one which failed.
+        """
+
+        list_sha = list(list_sha)
+        if not list_sha:
+            return dict()
+
+        with ThreadPoolExecutor(max_workers=min(len(list_sha), self.CC.num_fetch_workers)) as executor:
+            list_blobs = list(executor.map(repo.blob, list_sha))
+
+        list_failed = [sha for sha, blob in zip(list_sha, list_blobs) if blob is None]
+        for sha in list_failed:
+            print_status('FAIL', 'Unable to fetch the blob %s from %s.' % (sha, repo.name))
+        if list_failed:
+            raise KeyError('%d blob(s) could not be fetched from %s, e.g. %s.'
+                           % (len(list_failed), repo.name, list_failed[0]))
+
+        return {sha: blob.decoded for sha, blob in zip(list_sha, list_blobs)}
 
     def create_file(self, name_repo, path_file, file_content, overwrite=False, branch='master'):
         """
-        ??
+        Creates or updates a single file using one request to the contents API. The SHA of the existing file is taken
+        from a cached listing of the branch and compared with the git blob SHA of the new contents, so unchanged files
+        are skipped without being downloaded.
         :param name_repo:
         :param name_file:
         :param file_content:
@@ -128,73 +312,439 @@ class GitHubConnector(object):
         :return: (string) Contents of the file after modification.
         """
 
-        # Parse path information
+        # Convert to UTF-8 encoding, the SHA git will give the new contents is computed from the bytes
+        file_content_bytes = to_bytes(file_content)
+
+        repo_obj = self.get_repo_obj(name_repo)
+        if repo_obj is None:
+            return None
+
+        # Within a write transaction the file is committed together with the others when it ends
+        with self.lock:
+            transaction = self.dict_transactions.get((name_repo, branch))
+        if transaction is not None:
+            return self._stage_file(repo_obj, name_repo, transaction, path_file, file_content_bytes, overwrite, branch)
+
+        # Writes to the same branch are made one at a time, concurrent commits to a branch conflict
+        with self.get_branch_lock(name_repo, branch):
+            return self._create_file(repo_obj, name_repo, path_file, file_content_bytes, overwrite, branch)
+
+    def _create_file(self, repo_obj, name_repo, path_file, file_content_bytes, overwrite, branch):
+        """
+        Implements create_file while holding the lock of the branch.
+        """
+
         name_base = os.path.basename(path_file)
-        name_dir = os.path.dirname(path_file)
+        file_sha_new = git_blob_sha(file_content_bytes)
 
-        # Load the file if it exists prior to any changes
-        file_before = self.get_file_contents(name_repo, path_file, ref=branch)
+        # Two attempts, the second one after refreshing a stale listing of the branch
+        for refresh in (False, True):
 
-        # Load all contents in the directory
-        repo_contents_info = self.get_all_files_in_repo_at_path(name_repo, name_dir, False, branch=branch)
+            # SHA of the file prior to any changes
+            file_sha = self.get_tree_shas(name_repo, branch, refresh=refresh).get(path_file)
 
-        #################
-        # Sanity checks #
-        #################
+            #################
+            # Sanity checks #
+            #################
 
-        if file_before:
+            if file_sha:
 
-            if not overwrite:
-                print_status('SKIP', 'The file %s already exists and overwrite is set to False.' % path_file)
-                return None
+                if not overwrite:
+                    print_status('SKIP', 'The file %s already exists and overwrite is set to False.' % path_file)
+                    return None
 
-            elif overwrite:
-                try:
-                    file_content_decoded = file_content.decode('UTF-8')
-                except AttributeError:
-                    file_content_decoded = file_content
-                except UnicodeDecodeError:
-                    file_content_decoded = file_content
-                if file_before == file_content_decoded:
+                elif file_sha == file_sha_new:
                     print_status('SKIP', 'No new changes for the file %s.' % path_file)
                     return None
 
-        ###################
-        # Create the file #
-        ###################
-
-        # Convert to UTF-8 encoding
-        if not isinstance(file_content, bytes):
-            #file_content_bytes = bytes(file_content, 'UTF-8') # Not python 2.7 compatible.
-            file_content_bytes = file_content.encode('UTF-8')
-        else:
-            file_content_bytes = file_content
+            ###################
+            # Create the file #
+            ###################
 
-        # Create the file in the repository object
-        if name_base in repo_contents_info:
-            file_sha = repo_contents_info[name_base]
-        else:
-            file_sha = None
-        repo_obj = self.get_repo_obj(name_repo)
-        repo_obj.create_file(path=path_file,
-                             message='Update %s.' % name_base,
-                             content=file_content_bytes,
-                             sha=file_sha,
-                             branch=branch)
+            try:
+                json_put = repo_obj.create_file(path=path_file,
+                                                message='Update %s.' % name_base,
+                                                content=file_content_bytes,
+                                                sha=file_sha,
+                                                branch=branch)
+                break
+            except (github3.exceptions.Conflict, github3.exceptions.UnprocessableEntity):
+                if refresh:
+                    raise
 
         #################################
         # Validate the file was changed #
         #################################
 
-        file_after = self.get_file_contents(name_repo, path_file, ref=branch)
-
-        if file_after != file_before:
+        if json_put and json_put['content'].sha == file_sha_new:
+            with self.lock:
+                dict_shas = self.dict_tree_shas.get((name_repo, branch))
+                if dict_shas is not None:
+                    dict_shas[path_file] = file_sha_new
             print_status('OKAY', 'File %s was successfully changed.' % path_file)
-            return file_after
+            try:
+                return file_content_bytes.decode('UTF-8')
+            except UnicodeDecodeError:
+                return file_content_bytes
         else:
+            self.clear_tree_shas(name_repo, branch)
             print_status('FAIL', 'An issue was encountered when updating the contents of the file %s.' % path_file)
             return None
 
+    @contextmanager
+    def write_transaction(self, name_repo, branch='master'):
+        """
+        Collects every create_file to a branch made inside the block, from any thread, and commits them together as
+        one tree and one commit when the block ends. Transactions may be nested, the outermost one commits. Reads
+        through get_file_contents see the staged files.
+        :param name_repo: (string) The name of the repository.
+        :param branch: (string) The branch to commit to.
+        :return: (dict) The transaction, with the staged 'files' (path -> bytes) and 'blobs' (path -> SHA), and the
+                 functions to call once they are committed ('on_commit').
+        """
+
+        key = (name_repo, branch)
+        with self.lock:
+            transaction = self.dict_transactions.setdefault(key, {'depth': 0, 'files': dict(), 'blobs': dict(),
+                                                                  'on_commit': list()})
+            if transaction['depth'] == 0:
+                # The branch may have been pushed to since an earlier transaction listed it
+                self.dict_tree_shas.pop(key, None)
+            transaction['depth'] += 1
+        try:
+            yield transaction
+        except BaseException:
+            # Files staged before an error were written successfully as far as the caller knows, commit them anyway,
+            # but the error of the block is the one raised
+            if self._end_transaction(key, transaction):
+                try:
+                    self._commit_transaction(name_repo, branch, transaction)
+                except Exception as e:
+                    print_status('FAIL', 'The staged files were not committed to %s (%s): %s' % (name_repo, branch, e))
+            raise
+        if self._end_transaction(key, transaction):
+            self._commit_transaction(name_repo, branch, transaction)
+
+    def _end_transaction(self, key, transaction):
+        """
+        Leaves a level of a write transaction.
+        :return: (boolean) If it was the outermost one, which commits.
+        """
+
+        with self.lock:
+            transaction['depth'] -= 1
+            if transaction['depth'] > 0:
+                return False
+            del self.dict_transactions[key]
+            return True
+
+    def _commit_transaction(self, name_repo, branch, transaction):
+        """
+        Commits the files staged in a write transaction, then calls its on_commit functions.
+        """
+
+        if transaction['files'] or transaction['blobs']:
+            list_paths = sorted(set(transaction['files']) | set(transaction['blobs']))
+            message = 'Update %s.' % ', '.join(os.path.basename(path_file) for path_file in list_paths)
+            commit = self.create_files_single_commit(name_repo, transaction['files'], message, overwrite=True,
+                                                     branch=branch, dict_blob_shas=transaction['blobs'])
+
+            # No commit is also made when the files were already up to date, check the branch holds them
+            if commit is None:
+                dict_staged = dict(transaction['blobs'])
+                dict_staged.update((path_file, git_blob_sha(file_content_bytes))
+                                   for path_file, file_content_bytes in transaction['files'].items())
+                dict_shas = self.get_tree_shas(name_repo, branch, refresh=True)
+                if any(dict_shas.get(path_file) != file_sha for path_file, file_sha in dict_staged.items()):
+                    print_status('FAIL', 'The staged files were not committed to %s (%s).' % (name_repo, branch))
+                    return None
+
+        for func in transaction['on_commit']:
+            func()
+
+    def after_commit(self, name_repo, func, branch='master'):
+        """
+        Calls func once the files written so far to a branch are committed: at the end of the open write transaction
+        on the branch, or straight away if there is none.
+        :param name_repo: (string) The name of the repository.
+        :param func: Function taking no arguments.
+        :param branch: (string) The branch.
+        :return: None
+        """
+
+        with self.lock:
+            transaction = self.dict_transactions.get((name_repo, branch))
+            if transaction is not None:
+                transaction['on_commit'].append(func)
+                return None
+        func()
+
+    def staged_count(self):
+        """
+        :return: (int) The number of files the calling thread has staged in write transactions so far, comparing it
+                 before and after a call tells if the call staged any.
+        """
+
+        return getattr(self.local, 'num_staged', 0)
+
+    def _stage_file(self, repo_obj, name_repo, transaction, path_file, file_content_bytes, overwrite, branch):
+        """
+        Implements create_file within a write transaction.
+        """
+
+        with self.lock:
+            is_staged = path_file in transaction['files'] or path_file in transaction['blobs']
+        if not overwrite and (is_staged or path_file in self.get_tree_shas(name_repo, branch)):
+            print_status('SKIP', 'The file %s already exists and overwrite is set to False.' % path_file)
+            return None
+
+        # Upload large files now rather than keeping them in memory until the commit
+        file_sha = None
+        if len(file_content_bytes) > STAGE_MAX_SIZE:
+            file_sha = git_blob_sha(file_content_bytes)
+            if file_sha not in self.get_tree_shas(name_repo, branch).values():
+                try:
+                    file_sha = repo_obj.create_blob(base64.b64encode(file_content_bytes).decode('UTF-8'), 'base64')
+                except github3.exceptions.Conflict:
+                    # An empty repository takes no blobs, the file is kept to initialise it
+                    file_sha = None
+
+        self.local.num_staged = self.staged_count() + 1
+        with self.lock:
+            if file_sha:
+                transaction['blobs'][path_file] = file_sha
+                transaction['files'].pop(path_file, None)
+            else:
+                transaction['files'][path_file] = file_content_bytes
+                transaction['blobs'].pop(path_file, None)
+        print_status('OKAY', 'File %s staged for commit.' % path_file)
+        try:
+            return file_content_bytes.decode('UTF-8')
+        except UnicodeDecodeError:
+            return file_content_bytes
+
+    def get_branch_lock(self, name_repo, branch='master'):
+        """
+        Returns the lock held while writing to a branch.
+        :param name_repo: (string) The name of the repository.
+        :param branch: (string) The branch.
+        :return: (Lock)
+        """
+
+        with self.lock:
+            return self.dict_branch_locks.setdefault((name_repo, branch), threading.Lock())
+
+    def get_tree_shas(self, name_repo, branch='master', refresh=False):
+        """
+        Loads the blob SHA of every file on a branch. Within a write transaction on the branch the listing is cached,
+        so that repeated writes do not download the tree again, and kept up to date by the write methods of this
+        class. Outside of one the branch is listed every time, as others may push to it in between.
+        :param name_repo: (string) The name of the repository.
+        :param branch: (string) The branch to list.
+        :param refresh: (boolean) Ignore any cached listing.
+        :return: (dict) Mapping of file path to blob SHA.
+        """
+
+        key = (name_repo, branch)
+        with self.lock:
+            is_cached = key in self.dict_transactions
+            dict_shas = self.dict_tree_shas.get(key) if is_cached and not refresh else None
+        if dict_shas is None:
+            dict_shas = self.get_all_files_in_repo_at_path(name_repo, get_contents=False, relative_path=False,
+                                                           branch=branch)
+            if is_cached:
+                with self.lock:
+                    self.dict_tree_shas[key] = dict_shas
+        return dict_shas
+
+    def clear_tree_shas(self, name_repo, branch='master'):
+        """
+        Discards the cached listing of a branch, e.g. after it was changed without going through create_file.
+        :param name_repo: (string) The name of the repository.
+        :param branch: (string) The branch.
+        """
+
+        with self.lock:
+            self.dict_tree_shas.pop((name_repo, branch), None)
+
+    def create_files_single_commit(self, name_repo, dict_files, message, overwrite=False, branch='master',
+                                   dict_blob_shas=None):
+        """
+        Writes a set of files to a repository as a single commit using the Git Data API. One blob is uploaded
+        per distinct file contents not already present in the repository, followed by one tree and one commit.
+        :param name_repo: (string) The name of the repository.
+        :param dict_files: (dict) Mapping of file path to the contents of the file (string or bytes).
+        :param message: (string) The commit message.
+        :param overwrite: (boolean) If files which already exist with different contents should be replaced.
+        :param branch: (string) The branch to commit to, created from master if it does not exist.
+        :param dict_blob_shas: (dict) Mapping of file path to the SHA of a blob already uploaded to the repository.
+        :return: (Commit) object or None if nothing was committed.
+        """
+
+        dict_blob_shas = dict_blob_shas or dict()
+        repo = self.get_repo_obj(name_repo)
+        if repo is None or not (dict_files or dict_blob_shas):
+            return None
+
+        # Encode everything once, the blob SHA is computed from the bytes
+        dict_bytes = {path_file: to_bytes(file_content) for path_file, file_content in dict_files.items()}
+
+        with self.get_branch_lock(name_repo, branch):
+            return self._create_files_single_commit(repo, name_repo, dict_bytes, message, overwrite, branch,
+                                                    dict_blob_shas)
+
+    def sync_files(self, name_repo, dict_shas, func_contents, message, branch='master'):
+        """
+        Makes the files on a branch match a listing of blob SHAs, as one commit of the files which differ. Contents
+        are only requested for the blobs the repository does not already hold, so a branch which is up to date costs
+        the single request listing it.
+        :param name_repo: (string) The name of the repository.
+        :param dict_shas: (dict) Mapping of file path to the blob SHA the file should have.
+        :param func_contents: Function taking a set of blob SHAs and returning a dict of their contents (bytes).
+        :param message: (string) The commit message.
+        :param branch: (string) The branch to commit to, created from master if it does not exist.
+        :return: (Commit) object or None if nothing was committed.
+        """
+
+        repo = self.get_repo_obj(name_repo)
+        if repo is None:
+            print_status('FAIL', 'The files were not synced to %s (%s).' % (name_repo, branch))
+            return None
+
+        with self.get_branch_lock(name_repo, branch):
+
+            # Blob SHAs of the files currently on the branch (path -> SHA)
+            files_before = self.get_tree_shas(name_repo, branch, refresh=True)
+            dict_changed = {path_file: file_sha for path_file, file_sha in dict_shas.items()
+                            if files_before.get(path_file) != file_sha}
+            if not dict_changed:
+                print_status('SKIP', 'No new changes for the repository %s (%s).' % (name_repo, branch))
+                return None
+
+            # Blobs the repository already holds are referenced by SHA, only the others are downloaded
+            set_sha_before = set(files_before.values())
+            dict_blob_shas = {path_file: file_sha for path_file, file_sha in dict_changed.items()
+                              if file_sha in set_sha_before}
+            dict_contents = func_contents(set(dict_changed.values()) - set_sha_before)
+            dict_bytes = {path_file: dict_contents[file_sha] for path_file, file_sha in dict_changed.items()
+                          if file_sha not in set_sha_before}
+
+            return self._create_files_single_commit(repo, name_repo, dict_bytes, message, True, branch,
+                                                    dict_blob_shas, files_before)
+
+    def _create_files_single_commit(self, repo, name_repo, dict_bytes, message, overwrite, branch, dict_blob_shas,
+                                    files_before=None):
+        """
+        Implements create_files_single_commit while holding the lock of the branch.
+        """
+
+        # Blob SHAs of the files currently on the branch (path -> SHA)
+        if files_before is None:
+            files_before = self.get_tree_shas(name_repo, branch, refresh=True)
+
+        # Find the commit the new commit is built on
+        is_root = False
+        try:
+            ref = repo.ref('heads/%s' % branch)
+        except github3.exceptions.Conflict:
+            ref = None
+            is_root = True
+
+        # A missing branch is started from master, the files which are the same as on master are left out
+        ref_parent = ref
+        is_new_branch = not ref and not is_root and branch != 'master'
+        if is_new_branch:
+            ref_parent = repo.ref('heads/master')
+            files_before = self.get_tree_shas(name_repo, 'master') if ref_parent else dict()
+
+        ###############################
+        # Find the files which change #
+        ###############################
+
+        dict_new_shas = OrderedDict()
+        for path_file in sorted(set(dict_bytes) | set(dict_blob_shas)):
+            file_sha = dict_blob_shas.get(path_file) or git_blob_sha(dict_bytes[path_file])
+            if path_file in files_before:
+                if not overwrite and not is_new_branch:
+                    print_status('SKIP', 'The file %s already exists and overwrite is set to False.' % path_file)
+                    continue
+                elif files_before[path_file] == file_sha:
+                    print_status('SKIP', 'No new changes for the file %s.' % path_file)
+                    continue
+            dict_new_shas[path_file] = file_sha
+
+        # Nothing is uploaded or committed, a missing branch is only pointed at master
+        if not dict_new_shas:
+            if ref_parent and not ref:
+                repo.create_ref(ref='refs/heads/%s' % branch, sha=ref_parent.object.sha)
+                self.clear_tree_shas(name_repo, branch)
+            print_status('SKIP', 'No new changes for the repository %s (%s).' % (name_repo, branch))
+            return None
+
+        if is_root:
+            # The Git Data API rejects empty repositories, create the first file through the contents API so that
+            # the repository has a root commit. It is replaced below by a root commit holding every file.
+            path_first = next(iter(dict_new_shas))
+            json_first = repo.create_file(path=path_first, message=message, content=dict_bytes[path_first],
+                                          branch=branch)
+            if not json_first:
+                print_status('FAIL', 'Unable to initialise the empty repository %s.' % name_repo)
+                return None
+            files_before = {path_first: json_first['content'].sha}
+            ref = repo.ref('heads/%s' % branch)
+
+        ##########################
+        # Build the tree entries #
+        ##########################
+
+        set_sha_before = set(files_before.values())
+        dict_blobs = dict()
+        list_tree = list()
+        for path_file, file_sha in dict_new_shas.items():
+
+            # Only upload contents the repository does not already hold
+            file_content_bytes = dict_bytes.get(path_file)
+            if file_content_bytes is not None and file_sha not in set_sha_before and file_sha not in dict_blobs:
+                dict_blobs[file_sha] = repo.create_blob(base64.b64encode(file_content_bytes).decode('UTF-8'),
+                                                        'base64')
+                if dict_blobs[file_sha] != file_sha:
+                    print_status('FAIL', 'Blob for the file %s failed to upload.' % path_file)
+                    return None
+
+            list_tree.append({'path': path_file, 'mode': '100644', 'type': 'blob', 'sha': file_sha})
+
+        #################################
+        # Create the tree and commit it #
+        #################################
+
+        if is_root:
+            parents, base_tree = [], None
+        elif ref_parent:
+            parents = [ref_parent.object.sha]
+            base_tree = repo.git_commit(ref_parent.object.sha).tree.sha
+        else:
+            parents, base_tree = [], None
+
+        tree = repo.create_tree(list_tree, base_tree=base_tree)
+        commit = repo.create_commit(message=message, tree=tree.sha, parents=parents) if tree else None
+        if not commit:
+            print_status('FAIL', 'Unable to create the commit in repo: %s' % name_repo)
+            return None
+
+        if ref:
+            success = ref.update(commit.sha, force=is_root)
+        else:
+            success = repo.create_ref(ref='refs/heads/%s' % branch, sha=commit.sha)
+
+        self.clear_tree_shas(name_repo, branch)
+        if success:
+            print_status('OKAY', '%d file(s) committed to %s (%s) in a single commit.' % (len(list_tree), name_repo,
+                                                                                          branch))
+            return commit
+        else:
+            print_status('FAIL', 'Unable to move branch %s to the new commit in repo: %s' % (branch, name_repo))
+            return None
+
     def add_collaborator_team_to_repo(self, name_team, name_repo, permission):
         """
         Adds a team as a collaborator to a repository.
@@ -226,7 +776,7 @@ class GitHubConnector(object):
             print_status('FAIL', 'Collaborator (%s) could not be added to repo (%s) as it is none.' % (name_user, name_repo))
             return False
 
-        if not self.org.is_member(name_user):
+        if not self.membership.is_org_member(name_user):
             print_status('WARN', '%s is not a member of the %s organisation. Proceeding anyway.' % (name_user, self.org.name))
 
         if repo.name not in self.repos:
@@ -247,10 +797,11 @@ class GitHubConnector(object):
         :return:
         """
 
-        if name_team not in self.teams:
+        team = self.teams.get(name_team)
+        if team is None:
             print_status('FAIL', 'The team %s does not exist within the organisation.' % name_team)
         else:
-            return self.teams[name_team]
+            return team
 
     def get_repo_obj(self, name_repo):
         """
@@ -259,10 +810,11 @@ class GitHubConnector(object):
         :return: repository object or None
         """
 
-        if name_repo not in self.repos:
+        repo = self.repos.get(name_repo)
+        if repo is None:
             print_status('FAIL', 'The repository %s does not exist within the organisation.' % name_repo)
         else:
-            return self.repos[name_repo]
+            return repo
 
     def get_file_contents(self, name_repo, path_file, ref=None, decode=True):
         """
@@ -277,10 +829,14 @@ class GitHubConnector(object):
         obj_repo = self.get_repo_obj(name_repo)
         if not obj_repo:
             return None
-        c1 = obj_repo.file_contents(path_file, ref=ref)
-        if not c1:
-            return None
-        c2 = base64.b64decode(c1.content)
+
+        # Files staged in a write transaction on the branch have not been committed yet
+        c2 = self.get_staged_file(name_repo, path_file, ref or 'master')
+        if c2 is None:
+            c1 = obj_repo.file_contents(path_file, ref=ref)
+            if not c1:
+                return None
+            c2 = base64.b64decode(c1.content)
         if not decode:
             return c2
         else:
@@ -290,29 +846,92 @@ class GitHubConnector(object):
             except UnicodeDecodeError:  # this error got thrown for an image, for example.
                 return c2
 
+    def get_staged_file(self, name_repo, path_file, branch='master'):
+        """
+        Loads the contents of a file staged in the open write transaction on a branch, which is not committed yet.
+        :param name_repo: (string) The name of the repository.
+        :param path_file: (string) The path of the file.
+        :param branch: (string) The branch.
+        :return: (bytes) The contents of the file, or None if it is not staged.
+        """
+
+        with self.lock:
+            transaction = self.dict_transactions.get((name_repo, branch))
+            content_bytes = transaction['files'].get(path_file) if transaction else None
+            sha_staged = transaction['blobs'].get(path_file) if transaction else None
+        if content_bytes is None and sha_staged:
+            content_bytes = self.get_blobs(self.get_repo_obj(name_repo), [sha_staged]).get(sha_staged)
+        return content_bytes
+
+    def invite_usernames_to_team(self, list_users, name_team):
+        """
+        Invites several users to a team. The list is compared with the members and pending invitations of the team and
+        only the missing invitations are sent, in parallel within the rate limits.
+        :param list_users: (list) The GitHub usernames.
+        :param name_team: (string) The name of the team.
+        :return: (dict) Lists of the usernames 'invited', 'skipped' and 'failed'.
+        """
+
+        # Reload the team, students may have accepted or declined since the last import
+        self.membership.refresh(name_team)
+        set_current = self.membership.members(name_team) | self.membership.invited(name_team)
+
+        dict_summary = {'invited': [], 'skipped': [], 'failed': []}
+        list_missing = list()
+        set_seen = set()
+        for name_user in list_users:
+            if name_user.lower() in set_current or name_user.lower() in set_seen:
+                dict_summary['skipped'].append(name_user)
+            else:
+                list_missing.append(name_user)
+            set_seen.add(name_user.lower())
+
+        list_status = map_ordered(lambda name_user: self.invite_username_to_team(name_user, name_team),
+                                  list_missing, max_workers=self.CC.max_workers)
+        for name_user, status in zip(list_missing, list_status):
+            dict_summary[status].append(name_user)
+
+        print_status('OKAY' if not dict_summary['failed'] else 'WARN',
+                     'Team %s: %d invited, %d already members or invited, %d failed.'
+                     % (name_team, len(dict_summary['invited']), len(dict_summary['skipped']),
+                        len(dict_summary['failed'])))
+        if dict_summary['failed']:
+            print_status('FAIL', 'Users failed to be added to team %s: %s' % (name_team,
+                                                                            ', '.join(dict_summary['failed'])))
+        return dict_summary
+
     def invite_username_to_team(self, name_user, name_team):
         """
 
         :param name_user:
         :param name_team:
-        :return:
+        :return: (string) 'invited', 'skipped' or 'failed'.
         """
 
         # Extract the team object
         obj_team = self.get_team_obj(name_team)
 
         # Check if the user is already a member of the team
-        if obj_team.is_member(name_user):
+        if self.membership.is_team_member(name_team, name_user):
             print_status('SKIP', 'User is already a member of the team %s: %s' % (name_team, name_user))
+            return 'skipped'
         else:
-            is_org_member = self.org.is_member(name_user)
-            success = obj_team.invite(name_user)
+            is_org_member = self.membership.is_org_member(name_user)
+            try:
+                success = obj_team.invite(name_user)
+            except github3.exceptions.ResponseError as e:
+                print_status('FAIL', 'User failed to be added to team %s: %s (%s)' % (name_team, name_user, e))
+                return 'failed'
+            if success:
+                self.membership.record_team_invite(name_team, name_user, success.get('state'))
             if success and is_org_member:
                 print_status('OKAY', 'User invited to team %s: %s' % (name_team, name_user))
             elif success and not is_org_member:
                 print_status('OKAY', 'User invited to organisation %s and team %s: %s' % (self.org.login, name_team, name_user))
             else:
                 print_status('FAIL', 'User failed to be added to team %s: %s' % (name_team, name_user))
+                return 'failed'
+            return 'invited'
 
     def create_branch(self, name_repo, name_new_branch, name_source_branch="master"):
         """
@@ -368,62 +987,66 @@ class GitHubConnector(object):
 
     def create_pull_request(self, name_repo, title, body, branch):
         """
-
+        Creates a pull request from a branch to master, or updates the open one, in at most three requests whatever
+        the length of the history: one comparison of the branches, one filtered listing of the open pull requests from
+        the branch and one to create or update it.
         :param name_repo:
         :param title:
         :param body:
         :param branch:
-        :return:
+        :return: (PullRequest) object or None.
         """
 
         repo = self.get_repo_obj(name_repo)
 
-        if not repo.branch(branch):
+        # Compare the branches, a missing branch cannot be compared
+        try:
+            comparison = repo.compare_commits('master', branch)
+        except github3.exceptions.NotFoundError:
+            comparison = None
+        if comparison is None:
             print_status('FAIL', 'Branch %s does not exist, therefore a PR cannot be created. Aborting.' % branch)
+            return None
 
-        # if the pull request already exists, update it
-        for existing_PR in repo.pull_requests(state="open"):
-            if existing_PR.as_dict()["title"] == title:
-                print_status('WARN', 'An open pull request with title "%s" in repo %s already exists.' % (title, name_repo))
-
-                if existing_PR.as_dict()["head"]["sha"] == repo.branch(branch).latest_sha().decode("UTF-8"):
-                    print_status('SKIP', 'The latest sha of this PR matches the latest sha of the branch %s, so this PR is vacuous (I think). Skipping.' % branch)
-                    return
-
-                PR = existing_PR.update(title=title, body=body)
-                if PR:
-                    print_status('OKAY', 'Successfully updated Pull Request in %s from branch %s to master.' % (name_repo, branch))
-                else:
-                    print_status('FAIL', 'Failed to update Pull Request in %s from branch %s to master.' % (name_repo, branch))
-                return
-
+        if not comparison.ahead_by:
+            print_status('SKIP', 'The %s branch has no commits which are not in master.' % branch)
+            return None
 
-        if next(repo.commits(sha=branch, number=1)) in repo.commits(sha="master"):
-            print_status('SKIP', 'The latest commit in the %s branch is equal to that of master.' % branch)
-            return
+        # If the pull request already exists, update it
+        existing_PR = next(repo.pull_requests(state='open', head='%s:%s' % (self.org.login, branch), base='master',
+                                              number=1), None)
+        if existing_PR is not None:
+            if existing_PR.title == title and existing_PR.body == body:
+                print_status('SKIP', 'The open pull request in %s from branch %s already includes the update.'
+                             % (name_repo, branch))
+                return existing_PR
+
+            if existing_PR.update(title=title, body=body):
+                print_status('OKAY', 'Successfully updated Pull Request in %s from branch %s to master.' % (name_repo, branch))
+                return existing_PR
+            else:
+                print_status('FAIL', 'Failed to update Pull Request in %s from branch %s to master.' % (name_repo, branch))
+                return None
 
         PR = repo.create_pull(title=title, base="master", head=branch, body=body)
         if PR:
-            print_status('OKAY', 'Successfully created Pull Request in %s from branch %s to master.' % (repo.name, branch))
+            print_status('OKAY', 'Successfully created Pull Request in %s from branch %s to master (%d commits ahead, '
+                                 '%d behind).' % (repo.name, branch, comparison.ahead_by, comparison.behind_by))
         else:
             print_status('FAIL', 'Failed to create Pull Request in %s from branch %s to master.' % (repo.name, branch))
+        return PR
 
     def get_commit_before_datetime(self, name_repo, utc_datetime, name_branch='master'):
         """
-
+        Finds the latest commit before a time, after syncing the new commits of the branch to the commit store.
         :param name_repo:
-        :param str_datetime:
-        :return:
+        :param utc_datetime: (datetime) The time, in UTC.
+        :param name_branch:
+        :return: (StoredCommit) or None.
         """
 
-        repo = self.get_repo_obj(name_repo)
-
-        get_time_f = lambda commit: datetime.strptime(commit.commit.committer["date"], gh3_time_fmt)
-        commits = list(repo.commits(sha=name_branch, until=datetime.strftime(utc_datetime, gh3_time_fmt)))
-        if len(commits) > 0:
-            return max(commits, key=get_time_f)
-        else:
-            return None
+        self.commits.sync(name_repo, name_branch)
+        return self.commits.latest_before(name_repo, utc_datetime, name_branch)
 
     def create_unique_issue(self, name_repo, title, labels, body, list_assignees):
         """
@@ -450,7 +1073,9 @@ class GitHubConnector(object):
 
     def copy_directory(self, dir_source, name_repo_source, dir_target, ref, overwrite, name_target_branch, compress=False):
         """
-        Copies the contnts from one directory to another.
+        Copies the contnts from one directory to another. The zip is built as the files are downloaded, in a
+        temporary file which spills to disk for large submissions, so only a batch of files is held in memory while it
+        is built. It is read back whole to be uploaded, see copy_archive.
         :param dir_source:
         :param dir_target:
         :param ref:
@@ -458,35 +1083,52 @@ class GitHubConnector(object):
         :return:
         """
 
-        # Load all assessment files
-        file_contents_source = self.get_all_files_in_repo_at_path(name_repo=name_repo_source,
-                                                                  path=dir_source,
-                                                                  branch=ref)
+        # Only the zip is stored, nothing is downloaded without it
+        if not compress:
+            return None
 
-        # Create an in memory zip file
-        if compress:
-            in_memory_zip = BytesIO()
-            zf = zipfile.ZipFile(in_memory_zip, "w", zipfile.ZIP_DEFLATED, False)
-        else:
-            in_memory_zip = None
-            zf = None
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as file_zip:
+            write_zip_stream(self.iter_files_in_repo_at_path(name_repo=name_repo_source, path=dir_source, branch=ref),
+                             file_zip)
+            file_zip.seek(0)
+            return self.create_file(name_repo=self.CC.name_repo_instructors, path_file='%s.zip' % dir_target,
+                                    file_content=file_zip.read(), branch=name_target_branch, overwrite=overwrite)
 
-        # Iterate over each file to be copied
-        for filename, file_contents_object in file_contents_source.items():
+    def copy_archive(self, name_repo_source, dir_target, ref, overwrite, name_target_branch, repack=True):
+        """
+        Stores a zip of a repository at the given ref in the instructors repository. The zip is downloaded with one
+        request to the archive endpoint and streamed to a temporary file, spilling to disk for large submissions, and
+        repacked file by file. It is then read back whole to be uploaded, as the contents and blob APIs take the
+        base64 of the file in a single JSON body: memory is not bounded by SPOOL_MAX_SIZE during the upload, which
+        holds the zip and its base64 (about 2.3 times its size).
+        :param name_repo_source: (string) The name of the repository to archive.
+        :param dir_target: (string) Path of the zip in the instructors repository, without the extension.
+        :param ref: (string) The commit SHA, branch or tag to archive.
+        :param overwrite: (boolean) If an existing zip should be replaced.
+        :param name_target_branch: (string) The branch of the instructors repository to write to.
+        :param repack: (boolean) Remove the top level folder GitHub adds to the archive (<owner>-<repo>-<sha>/).
+        :return: (string) Contents of the zip after modification or None.
+        """
+
+        repo = self.get_repo_obj(name_repo_source)
+        if repo is None:
+            return None
 
-            # Add to archive (if compression)
-            if in_memory_zip:
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as file_archive:
 
-                # Write the file to the in-memory zip
-                zf.writestr(filename, file_contents_object)
+            # Download the archive
+            if not repo.archive('zipball', path=file_archive, ref=ref):
+                print_status('FAIL', 'Unable to download the archive of %s at %s.' % (name_repo_source, ref))
+                return None
+            file_archive.seek(0)
 
-                # Mark the files as having been created on Windows so that
-                # Unix permissions are not inferred as 0000
-                for zfile in zf.filelist:
-                    zfile.create_system = 0
+            if repack:
+                with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as file_repacked:
+                    strip_zip_root(file_archive, file_repacked)
+                    file_repacked.seek(0)
+                    archive_bytes = file_repacked.read()
+            else:
+                archive_bytes = file_archive.read()
 
-        if in_memory_zip:
-            zf.close()
-            self.create_file(name_repo=self.CC.name_repo_instructors, path_file='%s.zip' % dir_target,
-                             file_content=in_memory_zip.getvalue(), branch=name_target_branch,
-                             overwrite=overwrite)
+        return self.create_file(name_repo=self.CC.name_repo_instructors, path_file='%s.zip' % dir_target,
+                                file_content=archive_bytes, branch=name_target_branch, overwrite=overwrite)
@@ -4,8 +4,31 @@ from .assessment_config import *
 from .course_config import *
 from .github_connector import *
 from .student_objects import *
+from .journal import *
+from .planner import *
+from .artifact_store import *
 import base64
+from collections import OrderedDict
+import functools
+import os
 import requests
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+
+def instructors_transaction(func):
+    """
+    Wraps a GitHubLink operation in a write transaction on the instructors repository, so that every file the
+    operation writes there is committed together as one commit when it finishes.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.GH.write_transaction(self.CC.name_repo_instructors):
+            return func(self, *args, **kwargs)
+    return wrapper
 
 
 class GitHubLink(object):
@@ -27,9 +50,58 @@ class GitHubLink(object):
         self.CC = CourseConfig(config_file)
         self.GH = GitHubConnector(self.CC)
         self.AC = AssessmentConfig(self.GH, self.CC)
-        self.SO = StudentObjects(self.GH, self.CC, self.AC)
+        self.journal = OperationJournal(self.CC.path_journal,
+                                        defer=lambda func: self.GH.after_commit(self.CC.name_repo_instructors, func),
+                                        staged=self.GH.staged_count)
+        self.SO = StudentObjects(self.GH, self.CC, self.AC, self.journal)
+        self.planner = OperationPlanner(self.GH, self.CC, self.AC, self.SO)
+        if self.CC.artifact_store == 'repo':
+            self.store = RepoArtifactStore(self.GH, self.CC.name_repo_instructors, self.CC.artifact_store_path)
+        elif self.CC.artifact_store == 'local':
+            self.store = LocalArtifactStore(self.CC.artifact_store_path)
+        else:
+            self.store = None
         print_status('OKAY', 'Done.')
 
+    def for_each_group(self, name_assessment, func, run=None, phase='group', estimate=None):
+        """
+        Calls func(g_name, list_mem) for every group of an assessment, processing up to max_workers groups (from the
+        course configuration) at the same time. Output is printed in the order of the groups.
+        :param name_assessment:
+        :param func: (required) Function taking the group name and the list of members.
+        :param run: (string) The run of the operation journal to record each group in, groups it lists as finished
+                    are skipped and their recorded return value is used.
+        :param phase: (string) Prefix of the journal step of each group, e.g. 'close' for 'close/<group>'.
+        :param estimate: (dict) The requests estimated by OperationPlanner.estimate, groups are processed in waves
+                         which fit in the API budget.
+        :return: (list) The return values of func in the order of the groups.
+        """
+
+        list_items = list(self.SO.dict_groups[name_assessment].items())
+        func_journal = lambda item: self.journal.call(run, '%s/%s' % (phase, item[0]), func, *item)
+        if estimate is None:
+            return map_ordered(func_journal, list_items, max_workers=self.CC.max_workers)
+
+        # Groups the journal lists as finished make no requests
+        list_costs = [0 if self.journal.is_done(run, '%s/%s' % (phase, g_name)) else estimate['groups'][g_name]
+                      for g_name, _ in list_items]
+        return self.GH.map_in_waves(func_journal, list_items, list_costs, reserve=estimate['fixed'],
+                                    max_workers=self.CC.max_workers)
+
+    def plan_assessment(self, name_operation, name_assessment, single_commit=True, compress=True):
+        """
+        Estimates the API requests an operation will make, without making any changes, and shows how its groups would
+        be split into waves which fit in the hourly budget.
+        :param name_operation: (string) One of 'prepare', 'release', 'update', 'close' or 'forfeit'.
+        :param name_assessment:
+        :param single_commit: (boolean) As given to prepare_assessment.
+        :param compress: (boolean) As given to close_assessment.
+        :return: (list) The waves, see OperationPlanner.plan.
+        """
+
+        print_header('Planning %s of assessment: %s' % (name_operation, name_assessment))
+        return self.planner.plan(name_operation, name_assessment, single_commit=single_commit, compress=compress)
+
     def init_course(self):
         """
         Initialises GitHub student and instructor teams; and the instructor repository using information
@@ -46,6 +118,7 @@ class GitHubLink(object):
         self.GH.add_collaborator_team_to_repo(self.CC.name_team_instructors, self.CC.name_repo_instructors, 'pull')
         print_status('OKAY', 'Done.')
 
+    @instructors_transaction
     def configure_assessment(self, obj_json):
         """ Imports a dictionary (json) object and stores it in the instructors repository. """
 
@@ -53,6 +126,7 @@ class GitHubLink(object):
         self.AC.update_config(obj_json)
         print_status('OKAY', 'Done.')
 
+    @instructors_transaction
     def import_students_csv(self, csv_input):
         """
 
@@ -64,6 +138,7 @@ class GitHubLink(object):
         self.SO.import_students_csv(csv_input)
         print_status('OKAY', 'Done.')
 
+    @instructors_transaction
     def import_assessment_groups_csv(self, name_assessment, csv_input):
         """
 
@@ -76,33 +151,42 @@ class GitHubLink(object):
         self.SO.import_assessment_groups_csv(name_assessment, csv_input)
         print_status('OKAY', 'Done.')
 
-    def prepare_assessment(self, name_assessment, name_target_branch, overwrite):
+    @instructors_transaction
+    def prepare_assessment(self, name_assessment, name_target_branch, overwrite, single_commit=True, force=False):
         """
 
         :param name_assessment:
         :param name_target_branch:
         :param overwrite:
+        :param single_commit: (boolean) Seed each repository with a single commit using the Git Data API.
+        :param force: (boolean) Prepare every group again, even those finished by an interrupted earlier attempt.
         :return:
         """
 
         print_header('Preparing assessment: %s' % name_assessment)
+        run = self.journal.begin('prepare/%s/%s' % (name_assessment, name_target_branch), force)
 
         # Assign any students not yet allocated in groups.json to individual work
         self.SO.allocate_remaining_students(name_assessment)
 
         # Iterate over each group and create a repository for the assessment
-        self.SO.prepare_repo(name_assessment, name_target_branch, overwrite)
+        estimate = self.planner.estimate('prepare', name_assessment, single_commit=single_commit)
+        self.SO.prepare_repo(name_assessment, name_target_branch, overwrite, single_commit, run=run,
+                             estimate=estimate)
 
         # Update the assessment status
         if name_target_branch != self.CC.name_repo_updates:
             self.AC.update_status(a_name=name_assessment, a_status='Prepared')
             print_status('OKAY', 'Done.')
+        self.journal.complete(run)
 
-    def release_assessment(self, name_assessment, permission):
+    @instructors_transaction
+    def release_assessment(self, name_assessment, permission, force=False):
         """
 
         :param name_assessment:
         :param permission:
+        :param force: (boolean) Release every group again, even those finished by an interrupted earlier attempt.
         :return:
         """
 
@@ -113,29 +197,38 @@ class GitHubLink(object):
             print_status('FAIL', 'The assessment has not yet been prepared, execute prepare_assessment first.')
         else:
             # Iterate over each group and invite the student(s) as a collaborator
-            for g_name, list_mem in self.SO.dict_groups[name_assessment].items():
+            def release_group(g_name, list_mem):
                 name_repo = self.CC.name_prefix + '_' + name_assessment + '_' + g_name
                 for g_mem in list_mem:
                     self.GH.add_collaborator_to_repo(name_repo=name_repo, name_user=g_mem, permission=permission)
 
+            run = self.journal.begin('release/%s/%s' % (name_assessment, permission), force)
+            estimate = self.planner.estimate('release', name_assessment)
+            self.for_each_group(name_assessment, release_group, run, 'release', estimate)
+
             # Update the assessment status
             self.AC.update_status(name_assessment, 'Released')
+            self.journal.complete(run)
 
         print_status('OKAY', 'Done.')
 
-    def update_assessment_pr(self, name_assessment):
+    @instructors_transaction
+    def update_assessment_pr(self, name_assessment, force=False):
         """
 
         :param name_assessment:
+        :param force: (boolean) Update every group again, even those finished by an interrupted earlier attempt.
         :return:
         """
         print_header('Updating assessment: %s' % name_assessment)
+        run = self.journal.begin('update/%s' % name_assessment, force)
 
         # Iterate over each group and move modified files to the update branch
-        self.SO.prepare_repo(name_assessment, self.CC.name_repo_updates, overwrite=True)
+        estimate = self.planner.estimate('update', name_assessment)
+        self.SO.sync_updates_branch(name_assessment, run=run, estimate=estimate)
 
         # Create a pull request for each student
-        for g_name, list_mem in self.SO.dict_groups[name_assessment].items():
+        def update_group_pr(g_name, list_mem):
 
             # Load info
             name_repo = self.CC.name_prefix + '_' + name_assessment + '_' + g_name
@@ -146,57 +239,90 @@ class GitHubLink(object):
 
             # Create PR
             self.GH.create_pull_request(name_repo=name_repo, title=title, body=body, branch=self.CC.name_repo_updates)
+
+        estimate['groups'] = {g_name: COST_PULL_REQUEST for g_name in estimate['groups']}
+        self.for_each_group(name_assessment, update_group_pr, run, 'pr', estimate)
+        self.journal.complete(run)
         print_status('OKAY', 'Done.')
 
-    def close_assessment(self, name_assessment, compress):
+    @instructors_transaction
+    def close_assessment(self, name_assessment, compress, repack=True, force=False):
         """
         Closes assessment and also generates the HTMl markdown table for display in the instructors repository.
+        Groups whose deadline (see deadline-extensions in the assessment config), deadline commit and members are
+        unchanged since the last close, according to grading/<assessment>/manifest.json, are not archived again;
+        write access is revoked from every group regardless.
         :param name_assessment:
+        :param compress: (boolean) Store a zip of each submission, taken from GitHub's archive of the deadline commit.
+        :param repack: (boolean) Remove the top level folder GitHub adds to the zip.
+        :param force: (boolean) Close every group again, even those finished by an interrupted earlier attempt.
         :return:
         """
 
         print_header('Closing assessment %s' % name_assessment)
+        run = self.journal.begin('close/%s' % name_assessment, force)
 
         # Create an array for the markdown table
         html_table = '<table><tr><th>Group Name</th><th>Students</th><th>View Submission</th><th>Download Submission</th></tr>'
 
-        for g_name, list_mem in self.SO.dict_groups[name_assessment].items():
+        # Groups archived by an earlier close, they are only archived again if their deadline or commit changed
+        path_manifest = 'grading/%s/manifest.json' % name_assessment
+        str_manifest = self.GH.get_file_contents(self.CC.name_repo_instructors, path_manifest)
+        dict_manifest = json.loads(str_manifest) if str_manifest else dict()
+        json_a_config = self.AC.json_config[name_assessment]
 
-            print('\nProcessing group: %s' % g_name)
+        def close_group(g_name, list_mem):
+
+            print_out('\nProcessing group: %s' % g_name)
 
             # Build the group repository name from the group_name
             name_repo = self.CC.name_prefix + '_' + name_assessment + '_' + g_name
 
-            # Revoke permission for each student
+            # The deadline of the group, which may have been given an extension
+            str_deadline = json_a_config.get('deadline-extensions', dict()).get(g_name, json_a_config['deadline'])
+            due_date_utc = str_datetime_to_utc_offset(str_deadline, json_a_config['deadline-utc-offset'])
+            str_due_date_utc = datetime.strftime(due_date_utc, '%Y-%m-%d %H:%M:%S')
+            latest_commit = self.GH.get_commit_before_datetime(name_repo, due_date_utc, name_branch='master')
+            commit_sha_full = latest_commit.sha if latest_commit else None
+
+            # Revoke permission for each student, even if the submission is unchanged as access may have been granted
+            # again since the last close
             for g_mem in list_mem:
                 self.GH.add_collaborator_to_repo(name_repo=name_repo, name_user=g_mem, permission='pull')
 
+            # Reuse the row of a group whose submission and members have not changed since the last close
+            entry = dict_manifest.get(g_name)
+            if entry and entry['sha'] == commit_sha_full and entry['deadline'] == str_due_date_utc and \
+                    entry['compress'] == compress and entry.get('store') == self.CC.artifact_store and \
+                    entry.get('members') == sorted(list_mem):
+                print_status('SKIP', 'The submission has not changed since the assessment was last closed.')
+                return entry
+
             # Get student username to ID mapping
             list_parse_mem = ['%s (%s)' % (mem, self.SO.dict_mapping[mem]) for mem in list_mem]
             str_members = '<br />\n'.join(list_parse_mem)
 
-            # Get submission link
-            name_repo = self.CC.name_prefix + '_' + name_assessment + '_' + g_name
-
-            due_date_utc = str_datetime_to_utc_offset(self.AC.json_config[name_assessment]['deadline'],
-                                                      self.AC.json_config[name_assessment]['deadline-utc-offset'])
-            latest_commit = self.GH.get_commit_before_datetime(name_repo, due_date_utc, name_branch='master')
-
             # If commits were made before the deadline
+            path_artifact = None
             if latest_commit:
 
-                commit_sha_full = latest_commit.sha
                 commit_sha_small = latest_commit.sha[0:7]
 
                 # Get the time of commit
-                latest_commit_dt = datetime.strptime(latest_commit.commit.committer['date'], gh3_time_fmt)
+                latest_commit_dt = latest_commit.date
                 latest_commit_dt_local = str_datetime_to_utc_offset(datetime.strftime(latest_commit_dt, '%Y-%m-%d %H:%M:%S'),
-                                           -self.AC.json_config[name_assessment]['deadline-utc-offset'])
+                                           -json_a_config['deadline-utc-offset'])
                 latest_commit_str_local = datetime.strftime(latest_commit_dt_local, '%Y%m%d_%H%M%S')
 
-                self.GH.copy_directory(dir_source='/', name_repo_source=name_repo,
-                                       dir_target='grading/%s/%s_%s_%s' % (name_assessment, g_name, latest_commit_str_local, commit_sha_small),
-                                       ref=latest_commit.sha, overwrite=True, name_target_branch='master', compress=compress)
+                dir_target = 'grading/%s/%s_%s_%s' % (name_assessment, g_name, latest_commit_str_local, commit_sha_small)
+                if self.store is not None:
+                    path_artifact = self.store.store_submission(self.GH, name_repo, latest_commit.sha,
+                                                                name_assessment, g_name)
+                elif compress:
+                    self.GH.copy_archive(name_repo_source=name_repo, dir_target=dir_target, ref=latest_commit.sha,
+                                         overwrite=True, name_target_branch='master', repack=repack)
+                    path_artifact = '%s.zip' % dir_target
+                # Without compress nothing is archived, only the commit is recorded
 
 
                 # The link to the latest submission
@@ -204,18 +330,39 @@ class GitHubLink(object):
 
                 # Get the URL to the zip file just updated
                 url_zip = '<a href="../../../../raw/master/grading/%s/%s_%s_%s.zip">Download</a>' % (name_assessment, g_name, latest_commit_str_local, commit_sha_small)
+                if path_artifact is None:
+                    url_zip = 'Not archived.'
+                elif self.store is not None:
+                    url_store = self.store.link(path_artifact)
+                    url_zip = '<a href="%s">Manifest</a>' % url_store if url_store else 'Stored locally.'
 
             else:
                 submit_str = 'No commits before deadline.'
                 url_zip = 'No commits before deadline.'
 
 
-            # Save row
-            html_table += '\n<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>' % (g_name, str_members, submit_str, url_zip)
+            # Save row, with what it was built from for the manifest
+            row = '\n<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>' % (g_name, str_members, submit_str, url_zip)
+            return {'sha': commit_sha_full, 'deadline': str_due_date_utc, 'compress': compress,
+                    'store': self.CC.artifact_store, 'members': sorted(list_mem), 'artifact': path_artifact,
+                    'row': row}
 
+        # Rows of groups closed by an interrupted earlier attempt are taken from the journal
+        estimate = self.planner.estimate('close', name_assessment, compress=compress)
+        list_entries = self.for_each_group(name_assessment, close_group, run, 'close', estimate)
+        html_table += ''.join(entry['row'] for entry in list_entries)
+
+        # Objects added to the artifact store are listed in its index
+        if self.store is not None:
+            self.store.save_index()
+
+        # Save the manifest for the next close
+        dict_manifest = OrderedDict(zip(self.SO.dict_groups[name_assessment], list_entries))
+        self.GH.create_file(name_repo=self.CC.name_repo_instructors, path_file=path_manifest,
+                            file_content=json.dumps(dict_manifest, indent=4), overwrite=True)
 
         # Update assessment status
-        print()
+        print_out()
         self.AC.update_status(name_assessment, 'Closed')
 
         # Generate markdown from the array
@@ -231,16 +378,58 @@ class GitHubLink(object):
                             path_file='grading/%s/README.md' % name_assessment,
                             file_content=str_md,
                             overwrite=True)
+        self.journal.complete(run)
         print_status('OKAY', 'Done.')
 
-    def forfeit_assessment(self, name_assessment):
+    def export_submissions(self, name_assessment, dir_out, as_zip=False):
+        """
+        Writes the submissions held in the artifact store out of it, a directory (or zip) per group.
+        :param name_assessment:
+        :param dir_out: (string) The directory to write the submissions to.
+        :param as_zip: (boolean) Write a zip per group rather than a directory.
+        :return:
+        """
+
+        print_header('Exporting submissions: %s' % name_assessment)
+        if self.store is None:
+            print_status('FAIL', 'No artifact store is configured, set artifact_store in the course config.')
+            return
+
+        os.makedirs(dir_out, exist_ok=True)
+        for g_name in self.SO.dict_groups[name_assessment]:
+            path_out = os.path.join(dir_out, g_name + ('.zip' if as_zip else ''))
+            self.store.export_submission(name_assessment, g_name, path_out, as_zip=as_zip)
+        print_status('OKAY', 'Done.')
+
+    def export_commit_timelines(self, name_assessment, dir_out, branch='master'):
+        """
+        Syncs the commits of every group repository and writes the timeline of each one to a CSV file for auditing.
+        :param name_assessment:
+        :param dir_out: (string) The directory to write <group>.csv to.
+        :param branch: (string) The branch.
+        :return:
+        """
+
+        print_header('Exporting commit timelines: %s' % name_assessment)
+        os.makedirs(dir_out, exist_ok=True)
+        list_groups = list(self.SO.dict_groups[name_assessment])
+        list_repos = [self.CC.name_prefix + '_' + name_assessment + '_' + g_name for g_name in list_groups]
+        self.GH.commits.sync_all(list_repos, branch, max_workers=self.CC.max_workers)
+        for g_name, name_repo in zip(list_groups, list_repos):
+            self.GH.commits.export_timeline(name_repo, os.path.join(dir_out, g_name + '.csv'), branch)
+        print_status('OKAY', 'Done.')
+
+    @instructors_transaction
+    def forfeit_assessment(self, name_assessment, force=False):
         """
 
         :param name_assessment:
+        :param force: (boolean) Forfeit every group again, even those finished by an interrupted earlier attempt.
         :return:
         """
 
         print_header('Forfeiting assessment: %s' % name_assessment)
+        run = self.journal.begin('forfeit/%s' % name_assessment, force)
 
         # Create the issue
         i_title = 'Assessment forfeit'
@@ -253,7 +442,7 @@ class GitHubLink(object):
         i_body += '2. In the Danger Zone, select Transfer ownership and follow the remaining steps. '
 
         # Process each group
-        for g_name, list_mem in self.SO.dict_groups[name_assessment].items():
+        def forfeit_group(g_name, list_mem):
             name_repo = self.CC.name_prefix + '_' + name_assessment + '_' + g_name
 
             # Set to admin rights
@@ -261,6 +450,10 @@ class GitHubLink(object):
                 self.GH.add_collaborator_to_repo(name_repo=name_repo, name_user=g_mem, permission='admin')
             self.GH.create_unique_issue(name_repo, i_title, i_labels, i_body, list_mem)
 
+        estimate = self.planner.estimate('forfeit', name_assessment)
+        self.for_each_group(name_assessment, forfeit_group, run, 'forfeit', estimate)
+
         # Update status
         self.AC.update_status(name_assessment, 'Forfeit')
+        self.journal.complete(run)
         print_status('OKAY', 'Done.')
@@ -0,0 +1,144 @@
+# Import modules
+from .common import *
+import os
+import threading
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+
+class OperationJournal(object):
+    """
+    An append-only journal of the steps of long operations (e.g. preparing or closing an assessment for every group),
+    kept in a JSON lines file on the local machine. A step recorded as finished is skipped when an interrupted
+    operation is run again, so the run resumes from the first step which did not finish.
+    """
+
+    def __init__(self, path_journal, defer=None, staged=None):
+        """
+        Instantiates the journal and replays the file, if it exists.
+        :param path_journal: (string) The path to the journal file.
+        :param defer: Function taking a function to call once the files a step wrote are committed, e.g.
+                      GitHubConnector.after_commit. Steps are recorded straight away if None.
+        :param staged: Function returning the number of files the calling thread has staged for a later commit, e.g.
+                       GitHubConnector.staged_count. Steps which staged none, e.g. those which only changed student
+                       repositories, are recorded straight away rather than deferred.
+        """
+
+        self.path_journal = path_journal
+        self.defer = defer
+        self.staged = staged
+        self.lock = threading.Lock()
+
+        # Results of the finished steps keyed by run, and the runs which finished completely
+        self.dict_steps = dict()
+        self.set_complete = set()
+
+        if os.path.exists(path_journal):
+            with open(path_journal, 'r') as f:
+                for line in f:
+                    try:
+                        self._replay(json.loads(line))
+                    except ValueError:
+                        # A line cut short when the process was killed mid-write
+                        continue
+
+    def _replay(self, entry):
+        run = entry['run']
+        if entry['event'] == 'begin':
+            self.dict_steps[run] = dict()
+            self.set_complete.discard(run)
+        elif entry['event'] == 'step':
+            self.dict_steps.setdefault(run, dict())[entry['step']] = entry.get('result')
+        elif entry['event'] == 'complete':
+            self.set_complete.add(run)
+
+    def _append(self, entry):
+        entry['time'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        with self.lock:
+            self._replay(entry)
+            with open(self.path_journal, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def begin(self, run, force=False):
+        """
+        Starts a run. A run which finished, or any run if forced, starts again from its first step; otherwise the
+        steps recorded by an earlier attempt are kept and will be skipped.
+        :param run: (string) The name of the run, e.g. 'close/A1'.
+        :param force: (boolean) Redo every step, even if it finished before.
+        :return: (string) The name of the run.
+        """
+
+        with self.lock:
+            is_fresh = force or run in self.set_complete or run not in self.dict_steps
+        if is_fresh:
+            self._append({'event': 'begin', 'run': run})
+        else:
+            print_status('NOTE', 'Resuming %s, %d step(s) already finished will be skipped.'
+                         % (run, len(self.dict_steps[run])))
+        return run
+
+    def complete(self, run):
+        """
+        Marks a run as finished, running it again starts from scratch. A run which is not marked as finished, e.g.
+        because the operation raised an error, is resumed by the next begin.
+        :param run: (string) The name of the run.
+        :return: None
+        """
+
+        if self.defer is None:
+            self._append({'event': 'complete', 'run': run})
+        else:
+            self.defer(lambda: self._append({'event': 'complete', 'run': run}))
+
+    def is_done(self, run, step):
+        """
+        :param run: (string) The name of the run.
+        :param step: (string) The name of the step.
+        :return: (boolean) If the step finished in the current attempt of the run or an interrupted one before it.
+        """
+
+        with self.lock:
+            return run not in self.set_complete and step in self.dict_steps.get(run, dict())
+
+    def record(self, run, step, result=None):
+        """
+        Records a finished step.
+        :param run: (string) The name of the run.
+        :param step: (string) The name of the step.
+        :param result: The result of the step, it must be serialisable to JSON.
+        :return: None
+        """
+
+        self._append({'event': 'step', 'run': run, 'step': step, 'result': result})
+
+    def call(self, run, step, func, *args):
+        """
+        Calls func(*args) as a step of a run, unless the step already finished in which case its recorded result is
+        returned instead.
+        :param run: (string) The name of the run, or None to call func without journaling.
+        :param step: (string) The name of the step.
+        :param func: The function to call.
+        :return: The result of func.
+        """
+
+        if run is None:
+            return func(*args)
+
+        if self.is_done(run, step):
+            print_out('\nSkipping %s, finished in an earlier attempt.' % step)
+            with self.lock:
+                return self.dict_steps[run][step]
+
+        num_staged = self.staged() if self.staged else None
+        result = func(*args)
+        if self.defer is None or (self.staged and self.staged() == num_staged):
+            # Nothing is waiting to be committed, a kill from now on must not redo the step
+            self.record(run, step, result)
+        else:
+            # A step is only finished once the files it staged in a write transaction are committed
+            self.defer(lambda: self.record(run, step, result))
+        return result
@@ -0,0 +1,121 @@
+# Import modules
+from .common import *
+import threading
+
+
+class MembershipIndex(object):
+    """
+    An index of the members and pending invitations of the organisation and its teams, built from the paginated
+    member listings so that membership checks do not cost a request each.
+    """
+
+    def __init__(self, GH):
+        """
+        Instantiates the index, listings are loaded the first time they are needed.
+        :param GH: The GitHubConnector the organisation and teams are taken from.
+        """
+
+        # Load instantiated classes
+        self.GH = GH
+
+        # Logins (lower case) keyed by the name of the listing, None for the organisation
+        self.dict_members = dict()
+        self.dict_invited = dict()
+        self.lock = threading.Lock()
+
+    def refresh(self, name_team=None):
+        """
+        Reloads the members and pending invitations of a team, or of the organisation if no team is given. Pages which
+        have not changed are revalidated with their ETag by the HTTP cache and do not count against the rate limit.
+        :param name_team: (string) The name of the team or None for the organisation.
+        :return: None
+        """
+
+        if name_team is None:
+            obj_owner = self.GH.org
+        else:
+            obj_owner = self.GH.get_team_obj(name_team)
+            if obj_owner is None:
+                return None
+
+        # Only the logins are read, so the users are not built as objects
+        set_members = set(user.login.lower() for user in obj_owner.members(fields=('login',)))
+        set_invited = set(inv.login.lower() for inv in obj_owner.invitations(fields=('login',)) if inv.login)
+
+        with self.lock:
+            self.dict_members[name_team] = set_members
+            self.dict_invited[name_team] = set_invited
+
+        print_status('OKAY', 'Loaded %d members and %d pending invitations of %s.'
+                     % (len(set_members), len(set_invited), name_team or 'the organisation'))
+
+    def _load(self, name_team):
+        with self.lock:
+            is_loaded = name_team in self.dict_members
+        if not is_loaded:
+            self.refresh(name_team)
+
+    def members(self, name_team=None):
+        """
+        :param name_team: (string) The name of the team or None for the organisation.
+        :return: (set) Lower case logins of the members.
+        """
+
+        self._load(name_team)
+        return self.dict_members.get(name_team, set())
+
+    def invited(self, name_team=None):
+        """
+        :param name_team: (string) The name of the team or None for the organisation.
+        :return: (set) Lower case logins with a pending invitation.
+        """
+
+        self._load(name_team)
+        return self.dict_invited.get(name_team, set())
+
+    def is_org_member(self, name_user):
+        """
+        Checks if the user is a member of the organisation.
+        :param name_user: (string) The GitHub username.
+        :return: (boolean)
+        """
+
+        return name_user.lower() in self.members()
+
+    def is_team_member(self, name_team, name_user):
+        """
+        Checks if the user is a member of the team.
+        :param name_team: (string) The name of the team.
+        :param name_user: (string) The GitHub username.
+        :return: (boolean)
+        """
+
+        return name_user.lower() in self.members(name_team)
+
+    def is_team_invited(self, name_team, name_user):
+        """
+        Checks if the user has a pending invitation to the team.
+        :param name_team: (string) The name of the team.
+        :param name_user: (string) The GitHub username.
+        :return: (boolean)
+        """
+
+        return name_user.lower() in self.invited(name_team)
+
+    def record_team_invite(self, name_team, name_user, state):
+        """
+        Records the result of inviting a user to a team, so the index stays current without being reloaded.
+        :param name_team: (string) The name of the team.
+        :param name_user: (string) The GitHub username.
+        :param state: (string) The state of the membership returned by GitHub, 'active' or 'pending'.
+        :return: None
+        """
+
+        self._load(name_team)
+        with self.lock:
+            if state == 'active':
+                self.dict_members[name_team].add(name_user.lower())
+            else:
+                self.dict_invited[name_team].add(name_user.lower())
+                if None in self.dict_invited and name_user.lower() not in self.dict_members.get(None, set()):
+                    self.dict_invited[None].add(name_user.lower())
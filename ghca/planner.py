@@ -0,0 +1,148 @@
+# Import modules
+from .common import *
+from collections import OrderedDict
+import time
+
+
+# Core API requests made by the steps of an operation, see the methods of GitHubConnector
+COST_RESOLVE_REPO = 1           # GET /repos/{org}/{name}, unless already looked up
+COST_CREATE_REPO = 1            # POST /orgs/{org}/repos
+COST_SINGLE_COMMIT = 7          # tree, ref, commit, tree, commit, ref (plus one blob per new file contents)
+COST_CREATE_BRANCH = 5          # branch, branch, latest SHA, ref, branch
+COST_PROTECT_BRANCH = 2         # branch, protection
+COST_PULL_REQUEST = 3           # comparison, open pull request, pull request
+COST_COMMITS_PAGE = 2           # ref, commits since the last sync
+COST_ISSUE = 2                  # issues, issue
+COST_INSTRUCTORS_COMMIT = 8     # the write transaction on the instructors repository
+
+
+class OperationPlanner(object):
+    """
+    Estimates the number of core API requests made by the operations of GitHubLink from the number of groups and
+    members, the number of starter files and what is already known about the organisation, and plans them against
+    the remaining hourly budget.
+    """
+
+    def __init__(self, GH, CC, AC, SO):
+        """
+        Instantiates the planner.
+        """
+
+        # Load instantiated classes
+        self.GH = GH
+        self.CC = CC
+        self.AC = AC
+        self.SO = SO
+
+    def cost_resolve_repo(self, name_repo, is_created=False):
+        """
+        :param name_repo: (string) The name of the repository.
+        :param is_created: (boolean) If the operation creates the repository when it does not exist.
+        :return: (int) The requests needed to look up (and create) the repository.
+        """
+
+        is_known = self.GH.repos.is_cached(name_repo)
+        repo = self.GH.repos.get_cached(name_repo)
+        cost = 0 if is_known else COST_RESOLVE_REPO
+        if is_created and repo is None:
+            cost += COST_CREATE_REPO
+        return cost
+
+    def count_starter_files(self, name_assessment):
+        """
+        :param name_assessment:
+        :return: (tuple) The number of starter files of the assessment and of distinct contents among them.
+        """
+
+        source_a_dir = self.AC.json_config[name_assessment]['main-dir'].strip('/') + '/'
+        dict_shas = {path_file: file_sha for path_file, file_sha
+                     in self.GH.get_tree_shas(self.CC.name_repo_instructors).items()
+                     if path_file.startswith(source_a_dir) and path_file != source_a_dir + 'groups.json'}
+        return len(dict_shas), len(set(dict_shas.values()))
+
+    def estimate(self, name_operation, name_assessment, single_commit=True, compress=True):
+        """
+        Estimates the requests an operation makes.
+        :param name_operation: (string) One of 'prepare', 'release', 'update', 'close' or 'forfeit'.
+        :param name_assessment:
+        :param single_commit: (boolean) As given to prepare_assessment.
+        :param compress: (boolean) As given to close_assessment.
+        :return: (dict) The requests made once ('fixed') and for each group ('groups', group name -> requests), and
+                 their 'total'.
+        """
+
+        num_files, num_blobs = (0, 0)
+        if name_operation in ('prepare', 'update', 'close'):
+            num_files, num_blobs = self.count_starter_files(name_assessment)
+
+        fixed = COST_INSTRUCTORS_COMMIT
+        if name_operation in ('prepare', 'update'):
+            # Team members (prepare only), the listing of the starter files and their contents (at most, an update
+            # only downloads those which changed)
+            fixed += (1 if name_operation == 'prepare' else 0) + 1 + num_blobs
+
+        dict_groups = OrderedDict()
+        for g_name, list_mem in self.SO.dict_groups[name_assessment].items():
+            name_repo = self.CC.name_prefix + '_' + name_assessment + '_' + g_name
+            if name_operation == 'prepare':
+                cost = self.cost_resolve_repo(name_repo, is_created=True) + 1
+                cost += COST_SINGLE_COMMIT + num_blobs if single_commit else 1 + num_files
+                cost += COST_CREATE_BRANCH + COST_PROTECT_BRANCH
+            elif name_operation == 'update':
+                # The listing of the updates branch, then a commit of the changed files if any
+                cost = self.cost_resolve_repo(name_repo) + COST_SINGLE_COMMIT + num_blobs + COST_PULL_REQUEST
+            elif name_operation == 'release':
+                cost = self.cost_resolve_repo(name_repo) + len(list_mem)
+            elif name_operation == 'close':
+                cost = self.cost_resolve_repo(name_repo) + len(list_mem) + COST_COMMITS_PAGE
+                # The archive and its blob, or the listing and every file of the submission
+                cost += 2 if compress else 1 + num_files + 1
+            elif name_operation == 'forfeit':
+                cost = self.cost_resolve_repo(name_repo) + len(list_mem) + COST_ISSUE
+            else:
+                raise ValueError('Unknown operation: %s' % name_operation)
+            dict_groups[g_name] = cost
+
+        return {'fixed': fixed, 'groups': dict_groups, 'total': fixed + sum(dict_groups.values())}
+
+    def plan(self, name_operation, name_assessment, single_commit=True, compress=True):
+        """
+        Estimates an operation and splits its groups into waves which fit in the hourly budget, the first wave using
+        what remains of the current budget and each following one a full budget after the next reset.
+        :param name_operation: (string) One of 'prepare', 'release', 'update', 'close' or 'forfeit'.
+        :param name_assessment:
+        :param single_commit: (boolean) As given to prepare_assessment.
+        :param compress: (boolean) As given to close_assessment.
+        :return: (list) The waves, each a dict of its 'start' time (epoch seconds), 'groups' and 'requests'.
+        """
+
+        dict_estimate = self.estimate(name_operation, name_assessment, single_commit, compress)
+        budget = self.GH.get_core_budget()
+
+        list_waves = list()
+        available = budget['remaining'] - dict_estimate['fixed']
+        start = time.time()
+        wave = {'start': start, 'groups': list(), 'requests': 0}
+        for g_name, cost in dict_estimate['groups'].items():
+            if wave['groups'] and wave['requests'] + cost > available:
+                list_waves.append(wave)
+                start = budget['reset'] if len(list_waves) == 1 else start + 3600
+                available = budget['limit'] - dict_estimate['fixed']
+                wave = {'start': start, 'groups': list(), 'requests': 0}
+            wave['groups'].append(g_name)
+            wave['requests'] += cost
+        list_waves.append(wave)
+
+        print_status('NOTE', 'Estimated %d requests to %s %s: %d for %d groups and %d for the instructors repository.'
+                     % (dict_estimate['total'], name_operation, name_assessment,
+                        dict_estimate['total'] - dict_estimate['fixed'], len(dict_estimate['groups']),
+                        dict_estimate['fixed']))
+        print_status('NOTE', 'API requests remaining: %d of %d, resets at %s.'
+                     % (budget['remaining'], budget['limit'],
+                        datetime.fromtimestamp(budget['reset']).strftime('%H:%M:%S')))
+        list_rows = [['Wave', 'Starts', 'Groups', 'Requests']]
+        for i, wave in enumerate(list_waves):
+            str_start = 'now' if i == 0 else datetime.fromtimestamp(wave['start']).strftime('%H:%M:%S')
+            list_rows.append([str(i + 1), str_start, str(len(wave['groups'])), str(wave['requests'])])
+        print_out(array_to_md_table(list_rows))
+        return list_waves
@@ -0,0 +1,161 @@
+# Import modules
+import re
+import threading
+import time
+
+
+def team_slug(name_team):
+    """
+    Derives the slug GitHub gives a team from its name, e.g. 'Group A (2018)' becomes 'group-a-2018'.
+    :param name_team: (string) The name of the team.
+    :return: (string) The slug.
+    """
+
+    return re.sub(r'[^a-z0-9_]+', '-', name_team.lower()).strip('-')
+
+
+class LazyRegistry(object):
+    """
+    A dictionary of organisation objects (repositories or teams) keyed by name, which resolves each name with a single
+    request the first time it is looked up rather than listing the whole organisation up front. Names which do not
+    exist are remembered too, for ttl_missing seconds since they may be created elsewhere meanwhile. The organisation
+    is only listed when the registry is iterated or counted.
+    """
+
+    def __init__(self, resolve, enumerate_all, ttl_missing=300):
+        """
+        Instantiates the registry, nothing is requested until a name is looked up.
+        :param resolve: Function taking a name and returning the object or None if it does not exist.
+        :param enumerate_all: Function returning an iterable of (name, object) for the whole organisation.
+        :param ttl_missing: (int) Seconds for which a name found not to exist is not looked up again.
+        """
+
+        self.resolve = resolve
+        self.enumerate_all = enumerate_all
+        self.ttl_missing = ttl_missing
+
+        # Objects keyed by name, None for the names known not to exist
+        self.dict_objects = dict()
+        # Times the names known not to exist were looked up
+        self.dict_time_missing = dict()
+        self.is_complete = False
+        self.time_complete = None
+        self.lock = threading.RLock()
+
+    def _is_known(self, name):
+        # Called with the lock held
+        if self.dict_objects.get(name) is not None:
+            return True
+        time_missing = max(self.dict_time_missing.get(name, 0), self.time_complete or 0)
+        return time.time() - time_missing < self.ttl_missing
+
+    def get(self, name, default=None):
+        """
+        :param name: (string) The name of the repository or team.
+        :param default: Returned if the name does not exist.
+        :return: The object or default.
+        """
+
+        with self.lock:
+            if self._is_known(name):
+                obj = self.dict_objects.get(name)
+                return default if obj is None else obj
+
+        # Resolve outside the lock so lookups of different names run in parallel
+        obj = self.resolve(name)
+        with self.lock:
+            # An object stored meanwhile (e.g. just created) takes precedence over the lookup
+            if self.dict_objects.get(name) is None:
+                self.dict_objects[name] = obj
+                if obj is None:
+                    self.dict_time_missing[name] = time.time()
+            obj = self.dict_objects[name]
+        return default if obj is None else obj
+
+    def is_cached(self, name):
+        """
+        :param name: (string) The name of the repository or team.
+        :return: (boolean) If the name is known without a request, having been looked up or the organisation listed.
+        """
+
+        with self.lock:
+            return self._is_known(name)
+
+    def get_cached(self, name, default=None):
+        """
+        Looks up a name without making a request.
+        :param name: (string) The name of the repository or team.
+        :param default: Returned if the name does not exist or is not cached.
+        :return: The object or default.
+        """
+
+        with self.lock:
+            obj = self.dict_objects.get(name)
+        return default if obj is None else obj
+
+    def refresh(self):
+        """
+        Lists the whole organisation, replacing every cached lookup.
+        :return: None
+        """
+
+        dict_objects = dict(self.enumerate_all())
+        with self.lock:
+            # Keep objects found or created meanwhile, the listing may lag behind a new repository
+            for name, obj in self.dict_objects.items():
+                if obj is not None:
+                    dict_objects.setdefault(name, obj)
+            self.dict_objects = dict_objects
+            self.dict_time_missing = dict()
+            self.is_complete = True
+            self.time_complete = time.time()
+
+    def forget(self, name):
+        """
+        Drops a cached lookup, so the name is resolved again next time.
+        :param name: (string) The name of the repository or team.
+        :return: None
+        """
+
+        with self.lock:
+            self.dict_objects.pop(name, None)
+            self.dict_time_missing.pop(name, None)
+            self.is_complete = False
+            self.time_complete = None
+
+    def _load_all(self):
+        with self.lock:
+            is_complete = self.is_complete
+        if not is_complete:
+            self.refresh()
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __getitem__(self, name):
+        obj = self.get(name)
+        if obj is None:
+            raise KeyError(name)
+        return obj
+
+    def __setitem__(self, name, obj):
+        with self.lock:
+            self.dict_objects[name] = obj
+            self.dict_time_missing.pop(name, None)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        return [name for name, _ in self.items()]
+
+    def values(self):
+        return [obj for _, obj in self.items()]
+
+    def items(self):
+        self._load_all()
+        with self.lock:
+            return [(name, obj) for name, obj in self.dict_objects.items() if obj is not None]
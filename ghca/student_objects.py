@@ -1,5 +1,6 @@
 # Import modules
 from .common import *
+import threading
 try:
     import simplejson as json
 except ImportError:
@@ -8,40 +9,44 @@ except ImportError:
 
 class StudentObjects(object):
 
-    def __init__(self, GitHubConnector, CourseConfig, AssessmentConfig):
+    def __init__(self, GitHubConnector, CourseConfig, AssessmentConfig, OperationJournal=None):
 
         # Load instantiated classes
         self.GH = GitHubConnector
         self.CC = CourseConfig
         self.AC = AssessmentConfig
+        self.journal = OperationJournal
 
         # Attempt to load the CSV mapping if it exists
         # Load the mapping only if the instructors repository has been initialised
+        # dict_mapping is username -> student ID and dict_usernames student ID -> username
         if self.CC.name_repo_instructors in self.GH.repos:
-            self.dict_mapping = self.load_student_mapping()
+            self.dict_mapping, self.dict_usernames = self.load_student_mapping()
             self.dict_groups = self.load_assessment_groups()
         else:
             self.dict_mapping = None
+            self.dict_usernames = None
             self.dict_groups = None
             print_status('NOTE', 'StudentObjects has nothing to load, instructors repo has not yet been created.')
 
     def load_student_mapping(self):
         """
-        Loads the student mapping CSV from the instructors repository and saves it as a dictionary.
+        Loads the student mapping CSV from the instructors repository.
+        :return: (tuple) The username -> student ID and student ID -> username dictionaries, or (None, None).
         """
 
         file_contents = self.GH.get_file_contents(self.CC.name_repo_instructors, self.CC.path_student_mapping)
 
         if file_contents:
-            dict_out = dict()
-            for row in file_contents.splitlines()[1:]:
-                cell = row.split(',')
-                dict_out[cell[1]] = cell[0]
+            tuple_mapping = parse_student_csv(file_contents)
+            if tuple_mapping is None:
+                print_status('WARN', 'StudentObjects found an invalid student CSV mapping in the instructors repo.')
+                return None, None
             print_status('OKAY', 'StudentObjects found student CSV mapping in the instructors repo.')
-            return dict_out
+            return tuple_mapping
         else:
             print_status('WARN', 'StudentObjects did not find student CSV mapping in the instructors repo.')
-            return None
+            return None, None
 
     def load_assessment_groups(self):
         """
@@ -75,7 +80,7 @@ class StudentObjects(object):
         """
 
         # Load all students in the course
-        set_all_students = set([x.login for x in self.GH.teams[self.CC.name_team_students].members()])
+        set_all_students = set([x.login for x in self.GH.teams[self.CC.name_team_students].members(fields=('login',))])
 
         # Load all students in the groups.json file
         set_group_students = set()
@@ -113,23 +118,18 @@ class StudentObjects(object):
         """
 
         # Store in the instructors repository if valid
-        if validate_csv(csv_input):
+        tuple_mapping = parse_student_csv(csv_input)
+        if tuple_mapping is not None:
 
             # Save to instructors repository
             self.GH.create_file(name_repo=self.CC.name_repo_instructors, path_file=self.CC.path_student_mapping,
                                 file_content=csv_input, overwrite=True)
 
-            # Read contents of CSV file, skip first row (header)
-            list_lines = csv_input.splitlines()
-            list_cells = [row.split(',') for row in list_lines]
-            list_username = [cell[1] for cell in list_cells[1:]]
+            # Invite to the students team (specified in the course config file), skipping existing members
+            self.GH.invite_usernames_to_team(list_users=list(tuple_mapping[0]), name_team=self.CC.name_team_students)
 
-            for username in list_username:
-                # Invite to the students team (specified in the course config file)
-                self.GH.invite_username_to_team(name_user=username, name_team=self.CC.name_team_students)
-
-            # Reload the student mapping
-            self.dict_mapping = self.load_student_mapping()
+            # The mapping is the one just parsed, it does not need to be read back
+            self.dict_mapping, self.dict_usernames = tuple_mapping
 
     def import_assessment_groups_csv(self, name_assessment, csv_input):
         """
@@ -150,48 +150,19 @@ class StudentObjects(object):
             print_status('SKIP', 'Assessment not configured for group work, see [max-group-size] setting.')
             return False
 
-        # Validate the CSV
-        if not validate_csv(csv_input, delimiter='|'):
-            print_status('FAIL', 'CSV format is invalid.')
-
-        # Convert the CSV into a dictionary of lists
-        dict_groups = dict()
-        list_all_members = list()
-        for idx, row in enumerate(csv_input.splitlines()):
-            if idx > 0:
-                group_name = row.split('|')[0]
-
-                # Extract the members
-                list_cur_g_members = [x.strip() for x in row.split('|')[1].split(',')]
+        # Validate the CSV and convert it into a dictionary of lists, checking group names are unique, users are in
+        # one group only and group sizes
+        dict_groups = parse_groups_csv(csv_input, max_group_size)
+        if dict_groups is None:
+            return False
 
-                # Check to make sure group name is unique
-                if group_name in dict_groups:
-                    print_status('FAIL', 'Group name is not unique: %s' % group_name)
+        # User is a part of the org
+        for list_cur_g_members in dict_groups.values():
+            for cur_username in list_cur_g_members:
+                if not self.GH.membership.is_team_member(self.CC.name_team_students, cur_username):
+                    print_status('FAIL', 'User not part of the student team, no changes have been made: %s' % cur_username)
                     return False
 
-                # Perform individual level checks
-                for cur_username in list_cur_g_members:
-
-                    # User is only in one group
-                    if cur_username in list_all_members:
-                        print_status('FAIL', 'User is in more than one group: %s' % cur_username)
-                        return False
-
-                    # User is a part of the org
-                    elif not self.GH.teams[self.CC.name_team_students].is_member(cur_username):
-                        print_status('FAIL', 'User not part of the student team, no changes have been made: %s' % cur_username)
-                        return False
-
-                    # Maximum members in a group
-                    elif len(list_cur_g_members) > max_group_size:
-                        print_status('FAIL', 'Group exceeds maximum number of allowed members: %s' % group_name)
-
-                # Save - for group uniqueness checks
-                list_all_members = list_all_members + list_cur_g_members
-
-                # Finally, save the members to the group
-                dict_groups[group_name] = list_cur_g_members
-
         # Save the JSON
         json_out = json.dumps(dict_groups, indent=4)
 
@@ -209,12 +180,19 @@ class StudentObjects(object):
 
         self.dict_groups = self.load_assessment_groups()
 
-    def prepare_repo(self, name_assessment, name_target_branch, overwrite):
+    def prepare_repo(self, name_assessment, name_target_branch, overwrite, single_commit=True, run=None,
+                     estimate=None):
         """
 
         :param name_assessment:
         :param name_target_branch:
         :param overwrite:
+        :param single_commit: (boolean) Seed each repository with one commit holding every file rather than one
+                              commit per file.
+        :param run: (string) The run of the operation journal to record each group in, groups it lists as finished
+                    are skipped.
+        :param estimate: (dict) The requests estimated by OperationPlanner.estimate, groups are processed in waves
+                         which fit in the API budget.
         :return:
         """
 
@@ -223,36 +201,134 @@ class StudentObjects(object):
         source_a_contents = self.GH.get_all_files_in_repo_at_path(name_repo=self.CC.name_repo_instructors,
                                                                   path=source_a_dir)
 
+        # Don't copy the groups.json file across
+        dict_files = {filename: file_contents_object for filename, file_contents_object
+                      in source_a_contents.items() if filename != 'groups.json'}
+
         # Process each group
-        for group_name in self.dict_groups[name_assessment]:
+        def prepare_group(group_name):
+            args = (name_assessment, group_name, dict_files, name_target_branch, overwrite, single_commit)
+            if self.journal is None or run is None:
+                return self.prepare_group_repo(*args)
+            return self.journal.call(run, 'prepare/%s' % group_name, self.prepare_group_repo, *args)
+
+        list_groups = list(self.dict_groups[name_assessment])
+        if estimate is None:
+            map_ordered(prepare_group, list_groups, max_workers=self.CC.max_workers)
+        else:
+            # Groups the journal lists as finished make no requests
+            list_costs = [0 if self.journal and run and self.journal.is_done(run, 'prepare/%s' % group_name)
+                          else estimate['groups'][group_name] for group_name in list_groups]
+            self.GH.map_in_waves(prepare_group, list_groups, list_costs, reserve=estimate['fixed'],
+                                 max_workers=self.CC.max_workers)
+
+    def sync_updates_branch(self, name_assessment, run=None, estimate=None):
+        """
+        Brings the updates branch of every group repository in line with the assessment files of the instructors
+        repository. Only the blob SHAs of the assessment files are listed up front, each group's branch is diffed
+        against them and the contents of a changed file are only downloaded, once, when a group needs them.
+        :param name_assessment:
+        :param run: (string) The run of the operation journal to record each group in, groups it lists as finished
+                    are skipped.
+        :param estimate: (dict) The requests estimated by OperationPlanner.estimate, groups are processed in waves
+                         which fit in the API budget.
+        :return:
+        """
+
+        # Blob SHAs of the assessment files, without their contents
+        source_a_dir = self.AC.json_config[name_assessment]['main-dir']
+        dict_shas = self.GH.get_all_files_in_repo_at_path(name_repo=self.CC.name_repo_instructors,
+                                                          path=source_a_dir, get_contents=False)
+        dict_shas.pop('groups.json', None)
+
+        # Contents downloaded so far, shared by the groups (blob SHA -> bytes)
+        dict_contents = dict()
+        lock = threading.Lock()
+
+        def get_contents(set_sha):
+            with lock:
+                set_missing = set_sha - set(dict_contents)
+            if set_missing:
+                dict_fetched = self.GH.get_blobs(self.GH.get_repo_obj(self.CC.name_repo_instructors), set_missing)
+                with lock:
+                    dict_contents.update(dict_fetched)
+            with lock:
+                return {file_sha: dict_contents[file_sha] for file_sha in set_sha}
+
+        def sync_group(group_name):
+            print_out('Processing group: %s' % group_name)
+            name_repo = self.CC.name_prefix + '_' + name_assessment + '_' + group_name
+
+            # A group added since the assessment was prepared has no repository yet, prepare it from the files
+            if name_repo not in self.GH.repos:
+                print_status('NOTE', 'The repository %s does not exist yet, preparing it.' % name_repo)
+                dict_files_sha = get_contents(set(dict_shas.values()))
+                dict_files = {path_file: dict_files_sha[file_sha] for path_file, file_sha in dict_shas.items()}
+                self.prepare_group_repo(name_assessment, group_name, dict_files, self.CC.name_repo_updates,
+                                        overwrite=True)
+                return None
+
+            commit = self.GH.sync_files(name_repo=name_repo, dict_shas=dict_shas, func_contents=get_contents,
+                                        message='Update %s.' % name_assessment, branch=self.CC.name_repo_updates)
+            return commit.sha if commit else None
+
+        def sync_step(group_name):
+            if self.journal is None or run is None:
+                return sync_group(group_name)
+            return self.journal.call(run, 'sync/%s' % group_name, sync_group, group_name)
+
+        list_groups = list(self.dict_groups[name_assessment])
+        if estimate is None:
+            map_ordered(sync_step, list_groups, max_workers=self.CC.max_workers)
+        else:
+            # Groups the journal lists as finished make no requests
+            list_costs = [0 if self.journal and run and self.journal.is_done(run, 'sync/%s' % group_name)
+                          else estimate['groups'][group_name] for group_name in list_groups]
+            self.GH.map_in_waves(sync_step, list_groups, list_costs, reserve=estimate['fixed'],
+                                 max_workers=self.CC.max_workers)
+
+    def prepare_group_repo(self, name_assessment, group_name, dict_files, name_target_branch, overwrite,
+                           single_commit=True):
+        """
+        Creates and seeds the assessment repository of a single group.
+        :param name_assessment:
+        :param group_name:
+        :param dict_files: (dict) Mapping of file path to the contents of the file to copy.
+        :param name_target_branch:
+        :param overwrite:
+        :param single_commit:
+        :return:
+        """
 
-            print('Processing group: %s' % group_name)
+        print_out('Processing group: %s' % group_name)
 
-            # Build the group repository name from the group_name
-            group_a_repo_name = self.CC.name_prefix + '_' + name_assessment + '_' + group_name
+        # Build the group repository name from the group_name
+        group_a_repo_name = self.CC.name_prefix + '_' + name_assessment + '_' + group_name
 
-            # Create the assessment repository
-            self.GH.create_repository(group_a_repo_name, is_private=True)
+        # Create the assessment repository
+        self.GH.create_repository(group_a_repo_name, is_private=True)
 
-            # Add the teaching team as a collaborator with read access
-            self.GH.add_collaborator_team_to_repo(name_team=self.CC.name_team_instructors,
-                                                  name_repo=group_a_repo_name,
-                                                  permission='pull')
+        # Add the teaching team as a collaborator with read access
+        self.GH.add_collaborator_team_to_repo(name_team=self.CC.name_team_instructors,
+                                              name_repo=group_a_repo_name,
+                                              permission='pull')
 
+        if single_commit:
+            self.GH.create_files_single_commit(name_repo=group_a_repo_name, dict_files=dict_files,
+                                               message='Update %s.' % name_assessment,
+                                               overwrite=overwrite, branch=name_target_branch)
+        else:
             # Iterate over each file to be copied
-            for filename, file_contents_object in source_a_contents.items():
-
-                # Don't copy the groups.json file across
-                if filename != 'groups.json':
-                    self.GH.create_file(name_repo=group_a_repo_name, path_file=filename,
-                                        file_content=file_contents_object, branch=name_target_branch,
-                                        overwrite=overwrite)
+            for filename, file_contents_object in dict_files.items():
+                self.GH.create_file(name_repo=group_a_repo_name, path_file=filename,
+                                    file_content=file_contents_object, branch=name_target_branch,
+                                    overwrite=overwrite)
 
-            # Create the updates branch if it does not already exist
-            self.GH.create_branch(name_repo=group_a_repo_name, name_new_branch=self.CC.name_repo_updates)
+        # Create the updates branch if it does not already exist
+        self.GH.create_branch(name_repo=group_a_repo_name, name_new_branch=self.CC.name_repo_updates)
 
-            # Enable branch protection
-            restrictions = {'users': [self.CC.repo_org_username], 'teams': [self.CC.name_team_instructors]}
-            self.GH.protect_branch(name_repo=group_a_repo_name, name_branch=self.CC.name_repo_updates, restrictions=restrictions)
+        # Enable branch protection
+        restrictions = {'users': [self.CC.repo_org_username], 'teams': [self.CC.name_team_instructors]}
+        self.GH.protect_branch(name_repo=group_a_repo_name, name_branch=self.CC.name_repo_updates, restrictions=restrictions)
 
-            print('\n')
+        print_out('\n')
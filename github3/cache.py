@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+github3.cache
+=============
+
+This module provides the HTTP response cache used by
+:class:`GitHubSession <github3.session.GitHubSession>` to replay GET requests
+conditionally. GitHub does not count ``304 Not Modified`` responses against
+the rate limit, so a response revalidated with ``If-None-Match`` or
+``If-Modified-Since`` is served from the cache at no cost.
+
+"""
+import collections
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+#: Reads of the disk cache whose access times are committed together
+TOUCH_BATCH = 64
+
+
+def cache_key(request):
+    """Return the key a prepared GET request is cached under.
+
+    The credentials are part of the key, hashed, since different users may
+    see different content at the same URL.
+
+    :param request: the request about to be sent
+    :type request: requests.PreparedRequest
+    :returns: str
+    """
+    key = hashlib.sha1()
+    for value in (request.url, request.headers.get('Accept', ''),
+                  request.headers.get('Authorization', '')):
+        key.update(value.encode('utf-8'))
+        key.update(b'\0')
+    return key.hexdigest()
+
+
+class CachedResponse(object):
+    """The parts of a response needed to replay it."""
+
+    __slots__ = ('url', 'headers', 'content', 'encoding')
+
+    def __init__(self, url, headers, content, encoding):
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(response.url, dict(response.headers), response.content,
+                   response.encoding)
+
+    @property
+    def etag(self):
+        return CaseInsensitiveDict(self.headers).get('ETag')
+
+    @property
+    def last_modified(self):
+        return CaseInsensitiveDict(self.headers).get('Last-Modified')
+
+    @property
+    def size(self):
+        return len(self.content)
+
+    def to_response(self, request):
+        """Build a ``200 OK`` response for ``request`` from this entry."""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response._content = self.content
+        response.request = request
+        response.from_cache = True
+        return response
+
+
+class ResponseCache(object):
+    """A size-bounded LRU cache of responses, optionally persisted to disk.
+
+    Entries are held in memory and evicted least recently used first once
+    their total size exceeds ``max_size``. When ``path`` is given, entries are
+    also written to a SQLite database so they survive between sessions (e.g.
+    notebook restarts); the database is bounded by ``max_size`` in the same
+    way. Cached bodies include private data, so the database should be kept
+    with the same care as the API token.
+
+    :param int max_size: (optional), maximum size in bytes of the cached
+        bodies, in memory and on disk
+    :param str path: (optional), path of the SQLite database
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024, path=None):
+        self.max_size = max_size
+        self.path = path
+        #: Number of requests answered from the cache after a 304
+        self.hits = 0
+        #: Number of cacheable requests which had to be downloaded
+        self.misses = 0
+        #: Number of entries evicted to stay within ``max_size``
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db = None
+        # Total size of the bodies on disk, and the reads whose access time
+        # is not committed yet
+        self._disk_size = 0
+        self._touched = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, '
+                'url TEXT, headers TEXT, content BLOB, encoding TEXT, '
+                'size INTEGER, accessed REAL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed '
+                             'ON responses (accessed)')
+            self._db.commit()
+            self._disk_size = self._db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the entry stored under ``key`` or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                'SELECT url, headers, content, encoding FROM responses '
+                'WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?',
+                             (time.time(), key))
+            # Access times only order evictions, losing the last few is
+            # harmless so they are committed in batches
+            self._touched += 1
+            if self._touched >= TOUCH_BATCH:
+                self._commit()
+            entry = CachedResponse(row[0], json.loads(row[1]), bytes(row[2]),
+                                   row[3])
+            self._store_memory(key, entry)
+            return entry
+
+    def set(self, key, entry):
+        """Store ``entry`` under ``key``."""
+        if entry.size > self.max_size:
+            return
+        with self._lock:
+            self._store_memory(key, entry)
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT size FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                self._db.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, '
+                    '?, ?)', (key, entry.url, json.dumps(entry.headers),
+                              sqlite3.Binary(entry.content), entry.encoding,
+                              entry.size, time.time())
+                )
+                self._disk_size += entry.size - (row[0] if row else 0)
+                if self._disk_size > self.max_size:
+                    self._evict_disk()
+                self._commit()
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if self._db is not None:
+                self._db.execute('DELETE FROM responses')
+                self._disk_size = 0
+                self._commit()
+
+    def flush(self):
+        """Commit the access times of the entries read from disk."""
+        with self._lock:
+            if self._db is not None:
+                self._commit()
+
+    def record(self, hit):
+        """Count a request answered from the cache (``hit``) or not."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """Return the counters of this cache as a dictionary."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entries': len(self._entries),
+                'size': self._size}
+
+    def _store_memory(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= old.size
+        self._entries[key] = entry
+        self._size += entry.size
+        while self._size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self.evictions += 1
+
+    def _commit(self):
+        self._db.commit()
+        self._touched = 0
+
+    def _evict_disk(self):
+        # Least recently used first, a batch at a time through the index on
+        # the access time rather than reading the whole table
+        while self._disk_size > self.max_size:
+            rows = self._db.execute(
+                'SELECT key, size FROM responses ORDER BY accessed LIMIT ?',
+                (TOUCH_BATCH,)).fetchall()
+            if not rows:
+                self._disk_size = 0
+                break
+            stale = []
+            for key, size in rows:
+                if self._disk_size <= self.max_size:
+                    break
+                stale.append((key,))
+                self._disk_size -= size
+            self._db.executemany('DELETE FROM responses WHERE key = ?', stale)
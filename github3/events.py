@@ -10,7 +10,7 @@ from __future__ import unicode_literals
 
 import copy
 
-from .models import GitHubCore
+from .models import GitHubCore, LazyAttribute
 
 
 class EventUser(GitHubCore):
@@ -113,29 +113,36 @@ class Event(GitHubCore):
 
     """
 
-    def _update_attributes(self, event):
-        # If we don't copy this, then we end up altering _json_data which we do
-        # not want to do:
-        event = copy.deepcopy(event)
+    # Built on first access
+    actor = LazyAttribute.model('actor', EventUser, with_session=False)
+    created_at = LazyAttribute.timestamp('created_at')
+    org = LazyAttribute.model('org', EventOrganization, with_session=False)
+    payload = LazyAttribute(
+        'payload', lambda event, payload: _payload_handlers.get(
+            event.type, identity
+        )(copy.deepcopy(payload), event) if payload else None
+    )
 
+    def _update_attributes(self, event):
         #: :class:`User <github3.users.User>` object representing the actor.
-        self.actor = self._class_attribute(event, 'actor', EventUser)
+        self.actor = self._get_attribute(event, 'actor')
         #: datetime object representing when the event was created.
-        self.created_at = self._strptime_attribute(event, 'created_at')
+        self.created_at = self._get_attribute(event, 'created_at')
 
         #: Unique id of the event
         self.id = self._get_attribute(event, 'id')
 
         #: List all possible types of Events
-        self.org = self._class_attribute(event, 'org', EventOrganization)
+        self.org = self._get_attribute(event, 'org')
 
         #: Event type https://developer.github.com/v3/activity/events/types/
         self.type = self._get_attribute(event, 'type')
-        handler = _payload_handlers.get(self.type, identity)
 
         #: Dictionary with the payload. Payload structure is defined by type_.
         #  _type: http://developer.github.com/v3/events/types
-        self.payload = self._class_attribute(event, 'payload', handler, self)
+        #  The handler of the type builds it from a copy of the JSON, so that
+        #  _json_data is not altered.
+        self.payload = self._get_attribute(event, 'payload')
 
         #: Return ``tuple(owner, repository_name)``
         self.repo = self._get_attribute(event, 'repo')
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 """All exceptions for the github3 library."""
+import time
 
 
 class GitHubError(Exception):
@@ -50,6 +51,25 @@ class IncompleteResponse(GitHubError):
         ) % (exception,)
 
 
+class RateLimitExceeded(GitHubError):
+    """Exception raised instead of waiting when a rate limit is exhausted."""
+
+    def __init__(self, resource, reset):
+        self.response = None
+        self.code = None
+        self.errors = []
+        #: Name of the exhausted rate limit, e.g. ``core`` or ``search``
+        self.resource = resource
+        #: Time (epoch seconds) at which the rate limit resets
+        self.reset = reset
+        self.msg = 'The %s rate limit is exhausted until %s.' % (
+            resource, time.strftime('%H:%M:%S', time.localtime(reset))
+        )
+
+    def __str__(self):
+        return self.msg
+
+
 class ResponseError(GitHubError):
     """The base exception for errors stemming from GitHub responses."""
     pass
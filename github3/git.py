@@ -9,9 +9,12 @@ See also: http://developer.github.com/v3/git/
 """
 from __future__ import unicode_literals
 
+from bisect import bisect_left
+from collections import namedtuple
 from json import dumps
 from base64 import b64decode
-from .models import GitHubCore, BaseCommit
+from sys import maxunicode
+from .models import GitHubCore, BaseCommit, LazyAttribute
 from .decorators import requires_auth
 
 
@@ -23,6 +26,12 @@ class Blob(GitHubCore):
 
     """
 
+    # Decoded on first access
+    decoded = LazyAttribute(
+        'decoded', lambda blob, content: b64decode(content)
+        if blob.encoding == 'base64' else content
+    )
+
     def _update_attributes(self, blob):
         self._api = self._get_attribute(blob, 'url')
 
@@ -36,8 +45,6 @@ class Blob(GitHubCore):
 
         #: Decoded content of the blob.
         self.decoded = self.content
-        if self.encoding == 'base64':
-            self.decoded = b64decode(self.content)
 
         #: Size of the blob in bytes
         self.size = self._get_attribute(blob, 'size')
@@ -71,6 +78,11 @@ class Commit(BaseCommit):
 
     """
 
+    # Built on first access, Tree is defined below
+    tree = LazyAttribute.model(
+        'tree', lambda json, commit: Tree(json, commit)
+    )
+
     def _update_attributes(self, commit):
         super(Commit, self)._update_attributes(commit)
         #: dict containing at least the name, email and date the commit was
@@ -86,7 +98,7 @@ class Commit(BaseCommit):
         self._commit_name = self._get_attribute(self.committer, 'name')
 
         #: :class:`Tree <Tree>` the commit belongs to.
-        self.tree = self._class_attribute(commit, 'tree', Tree, self)
+        self.tree = self._get_attribute(commit, 'tree')
 
     def _repr(self):
         return '<Commit [{0}:{1}]>'.format(self._author_name, self.sha)
@@ -195,6 +207,10 @@ class Tree(GitData):
         if self.tree:
             self.tree = [Hash(t) for t in self.tree]
 
+    def _slim(self):
+        # Trees are compared, and their entries read, through as_dict
+        pass
+
     def _repr(self):
         return '<Tree [{0}]>'.format(self.sha)
 
@@ -243,3 +259,136 @@ class Hash(GitHubCore):
 
     def _repr(self):
         return '<Hash [{0}]>'.format(self.sha)
+
+
+#: Entry of a :class:`CompactTree <CompactTree>`, size is None for trees
+TreeEntry = namedtuple('TreeEntry', ['path', 'mode', 'type', 'size', 'sha'])
+
+
+class CompactTree(object):
+
+    """The entries of a recursive tree, held in parallel lists sorted by path.
+
+    Unlike :class:`Tree <Tree>`, no object is built per entry, so trees of
+    tens of thousands of files stay small. Entries below a path are found by
+    bisection in O(log n + k). Built by :meth:`Repository.compact_tree
+    <github3.repos.repo.Repository.compact_tree>`.
+
+    """
+
+    __slots__ = ('sha', 'paths', 'modes', 'types', 'sizes', 'shas')
+
+    def __init__(self, sha, entries):
+        #: SHA of the tree
+        self.sha = sha
+        entries = sorted(entries, key=lambda entry: entry['path'])
+        #: Paths of the entries, sorted
+        self.paths = [entry['path'] for entry in entries]
+        #: Modes of the entries, e.g. 100644
+        self.modes = [_intern(entry['mode']) for entry in entries]
+        #: Types of the entries: blob, tree or commit
+        self.types = [_intern(entry['type']) for entry in entries]
+        #: Sizes of the entries, None for trees
+        self.sizes = [entry.get('size') for entry in entries]
+        #: SHAs of the entries
+        self.shas = [entry['sha'] for entry in entries]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return (self._entry(i) for i in range(len(self.paths)))
+
+    def __contains__(self, path):
+        return self._index(path) is not None
+
+    def __repr__(self):
+        return '<CompactTree [{0}, {1} entries]>'.format(self.sha, len(self))
+
+    def _entry(self, i):
+        return TreeEntry(self.paths[i], self.modes[i], self.types[i],
+                         self.sizes[i], self.shas[i])
+
+    def _index(self, path):
+        i = bisect_left(self.paths, path)
+        if i < len(self.paths) and self.paths[i] == path:
+            return i
+        return None
+
+    def _range(self, prefix):
+        """Indices of the entries whose path starts with prefix."""
+        if not prefix:
+            return 0, len(self.paths)
+        low = bisect_left(self.paths, prefix)
+        high = bisect_left(self.paths, prefix + _PATH_END, low)
+        return low, high
+
+    def get(self, path):
+        """Get the entry at a path.
+
+        :param str path: (required), path of the entry
+        :returns: :class:`TreeEntry <TreeEntry>` or None
+        """
+        i = self._index(path)
+        return None if i is None else self._entry(i)
+
+    def prefix(self, prefix):
+        """Iterate over the entries whose path starts with a prefix.
+
+        :param str prefix: (required), start of the paths
+        :returns: generator of :class:`TreeEntry <TreeEntry>` objects
+        """
+        low, high = self._range(prefix)
+        return (self._entry(i) for i in range(low, high))
+
+    def walk(self, directory='', type='blob'):
+        """Iterate over the entries below a directory, at any depth.
+
+        :param str directory: path of the directory, the root by default
+        :param str type: type of the entries, e.g. blob or tree, or None for
+            every entry
+        :returns: generator of :class:`TreeEntry <TreeEntry>` objects
+        """
+        low, high = self._range(_directory_prefix(directory))
+        return (self._entry(i) for i in range(low, high)
+                if type is None or self.types[i] == type)
+
+    def listdir(self, directory=''):
+        """Iterate over the entries directly in a directory.
+
+        :param str directory: path of the directory, the root by default
+        :returns: generator of :class:`TreeEntry <TreeEntry>` objects
+        """
+        prefix = _directory_prefix(directory)
+        low, high = self._range(prefix)
+        return (self._entry(i) for i in range(low, high)
+                if '/' not in self.paths[i][len(prefix):])
+
+    def blob_shas(self, directory='', relative=True):
+        """Map the paths of the files below a directory to their blob SHAs.
+
+        :param str directory: path of the directory, the root by default
+        :param bool relative: make the paths relative to the directory
+        :returns: dict
+        """
+        prefix = _directory_prefix(directory)
+        start = len(prefix) if relative else 0
+        low, high = self._range(prefix)
+        return dict((self.paths[i][start:], self.shas[i])
+                    for i in range(low, high) if self.types[i] == 'blob')
+
+
+#: Sorts after any character of a path, bounds the prefix queries
+_PATH_END = u'%c' % maxunicode
+
+_interned = {}
+
+
+def _intern(value):
+    # Modes and types take a handful of values, share one string for each
+    return _interned.setdefault(value, value)
+
+
+def _directory_prefix(directory):
+    directory = directory.strip('/')
+    return directory + '/' if directory and directory != '.' else ''
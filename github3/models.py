@@ -8,6 +8,7 @@ This module provides the basic models used in github3.py
 """
 from __future__ import unicode_literals
 
+import time
 from datetime import datetime
 from json import dumps, loads
 from logging import getLogger
@@ -24,6 +25,64 @@ __timeformat__ = '%Y-%m-%dT%H:%M:%SZ'
 __logs__ = getLogger(__package__)
 
 
+class LazyAttribute(object):
+    """Attribute of a model which is built from its JSON when first read.
+
+    ``_update_attributes`` assigns the JSON of the attribute, e.g. the dict of
+    a nested user or a timestamp string, which is kept as it is. The first
+    read calls ``build(instance, json)`` and keeps the result on the instance,
+    so objects of large collections only pay for the attributes which are
+    used.
+    """
+
+    def __init__(self, name, build):
+        self.name = name
+        self.build = build
+
+    @classmethod
+    def model(cls, name, model_cls, with_session=True):
+        """Attribute holding a nested object, None if its JSON is empty.
+
+        This is the lazy equivalent of ``_class_attribute``.
+        """
+        def build(instance, json):
+            if not json:
+                return None
+            if with_session:
+                return model_cls(json, instance)
+            return model_cls(json)
+        return cls(name, build)
+
+    @classmethod
+    def timestamp(cls, name):
+        """Attribute holding a timezone-aware datetime, see ``_strptime``."""
+        return cls(name, lambda instance, json: instance._strptime(json))
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        attributes = instance.__dict__
+        try:
+            return attributes[self.name]
+        except KeyError:
+            pass
+        try:
+            json = attributes['_unbuilt'][self.name]
+        except KeyError:
+            # Built by another thread in the meantime, or never assigned
+            if self.name in attributes:
+                return attributes[self.name]
+            raise AttributeError(self.name)
+        value = attributes[self.name] = self.build(instance, json)
+        attributes['_unbuilt'].pop(self.name, None)
+        return value
+
+    def __set__(self, instance, value):
+        attributes = instance.__dict__
+        attributes.pop(self.name, None)
+        attributes.setdefault('_unbuilt', {})[self.name] = value
+
+
 class GitHubCore(object):
     """The base object for all objects that require a session.
 
@@ -32,6 +91,10 @@ class GitHubCore(object):
     have.
     """
 
+    #: Fields of the JSON held by an attribute of another name, field ->
+    #: attribute, see :meth:`_slim`
+    _json_renamed = {}
+
     def __init__(self, json, session=None):
         if hasattr(session, 'session'):
             # i.e. session is actually a GitHubCore instance
@@ -52,10 +115,31 @@ class GitHubCore(object):
             self._update_attributes(json)
         except KeyError as kerr:
             raise exceptions.IncompleteResponse(json, kerr)
+        if json is not None and getattr(session, 'slim_models', False):
+            self._slim()
 
     def _update_attributes(self, json):
         pass
 
+    def _slim(self):
+        """Drop the fields of the JSON which are held by attributes.
+
+        The fields copied into attributes, or kept for a
+        :class:`LazyAttribute`, are removed from ``_json_data`` so they are not
+        held twice. This covers the URI templates, e.g. ``archive_url`` held
+        by ``archive_urlt``, and the fields listed in ``_json_renamed``.
+        :meth:`as_dict` and :meth:`as_json` then only return the other fields.
+        """
+        attributes = self.__dict__
+        held = set(attributes).union(attributes.get('_unbuilt', ()))
+        held.update([name[:-1] for name in held if name.endswith('_urlt')])
+        held.update([key for key, name in self._json_renamed.items()
+                     if name in held])
+        self._json_data = dict(
+            (key, value) for key, value in self._json_data.items()
+            if key not in held
+        )
+
     def __getattr__(self, attribute):
         """Proxy access to stored JSON."""
         if attribute not in self._json_data:
@@ -283,7 +367,8 @@ class GitHubCore(object):
             self._uri = urlparse(uri)
         self.url = uri
 
-    def _iter(self, count, url, cls, params=None, etag=None, headers=None):
+    def _iter(self, count, url, cls, params=None, etag=None, headers=None,
+              raw=False, fields=None):
         """Generic iterator for this project.
 
         :param int count: How many items to return.
@@ -292,18 +377,31 @@ class GitHubCore(object):
         :param params dict: (optional) Parameters for the request
         :param str etag: (optional), ETag from the last call
         :param dict headers: (optional) HTTP Headers for the request
+        :param bool raw: (optional) Return the JSON of each item as a dict
+        :param tuple fields: (optional) Return these fields of each item as a
+            namedtuple, see :func:`projection <github3.structs.projection>`
         :returns: A lazy iterator over the pagianted resource
         :rtype: :class:`GitHubIterator <github3.structs.GitHubIterator>`
         """
         from .structs import GitHubIterator
-        return GitHubIterator(count, url, cls, self, params, etag, headers)
+        return GitHubIterator(count, url, cls, self, params, etag, headers,
+                              raw, fields)
 
     @property
     def ratelimit_remaining(self):
         """Number of requests before GitHub imposes a ratelimit.
 
+        The budget reported by the last response is used when the session has
+        a :class:`RateLimiter <github3.session.RateLimiter>`, otherwise it is
+        requested from GitHub.
+
         :returns: int
         """
+        limiter = getattr(self.session, 'rate_limiter', None)
+        budget = limiter.budget('core') if limiter else None
+        if budget and budget['reset'] > time.time():
+            self._remaining = budget['remaining']
+            return self._remaining
         json = self._json(self._get(self._github_url + '/rate_limit'), 200)
         core = json.get('resources', {}).get('core', {})
         self._remaining = core.get('remaining', 0)
@@ -346,6 +444,8 @@ class GitHubCore(object):
         if json is not None:
             self._json_data = json
             self._update_attributes(json)
+            if getattr(self.session, 'slim_models', False):
+                self._slim()
         return self
 
 
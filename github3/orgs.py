@@ -5,14 +5,13 @@ from __future__ import unicode_literals
 import warnings
 from json import dumps
 
-from uritemplate import URITemplate
-
 from . import users, models
 
 from .decorators import requires_auth
 from .events import Event
 from .projects import Project
 from .repos import Repository, ShortRepository
+from .utils import LazyURITemplate
 
 
 class Team(models.GitHubCore):
@@ -28,6 +27,9 @@ class Team(models.GitHubCore):
     # Roles available to members on a team.
     members_roles = frozenset(['member', 'maintainer', 'all'])
 
+    # URI templates, parsed on first access
+    members_urlt = LazyURITemplate('members_urlt')
+
     def _update_attributes(self, team):
         self._api = self._get_attribute(team, 'url')
 
@@ -45,9 +47,7 @@ class Team(models.GitHubCore):
         self.members_count = self._get_attribute(team, 'members_count')
 
         #: Members URL Template. Expands with ``member``.
-        self.members_urlt = self._class_attribute(
-            team, 'members_url', URITemplate
-        )
+        self.members_urlt = self._get_attribute(team, 'members_url') or None
 
         #: Number of repos owned by this team.
         self.repos_count = self._get_attribute(team, 'repos_count')
@@ -150,7 +150,27 @@ class Team(models.GitHubCore):
         return self._boolean(self._get(url), 204, 404)
 
     @requires_auth
-    def members(self, role=None, number=-1, etag=None):
+    def invitations(self, number=-1, etag=None, raw=False, fields=None):
+        r"""Iterate over the pending invitations to this team.
+
+        :param int number: (optional), number of invitations to return.
+            Default: -1 returns all available invitations
+        :param str etag: (optional), ETag from a previous request to the same
+            endpoint
+        :param bool raw: (optional), yield the JSON of each item as a dict
+            rather than an object
+        :param tuple fields: (optional), yield only these fields of each item
+            as a namedtuple, e.g. ``('login',)``, see
+            :func:`projection <github3.structs.projection>`
+        :returns: generator of :class:`Invitation <Invitation>`\ s
+        """
+        url = self._build_url('invitations', base_url=self._api)
+        return self._iter(int(number), url, Invitation, etag=etag, raw=raw,
+                          fields=fields)
+
+    @requires_auth
+    def members(self, role=None, number=-1, etag=None, raw=False,
+                fields=None):
         r"""Iterate over the members of this team.
 
         :param str role: (optional), filter members returned by their role
@@ -160,6 +180,11 @@ class Team(models.GitHubCore):
             Default: -1 iterates over all values
         :param str etag: (optional), ETag from a previous request to the same
             endpoint
+        :param bool raw: (optional), yield the JSON of each item as a dict
+            rather than an object
+        :param tuple fields: (optional), yield only these fields of each item
+            as a namedtuple, e.g. ``('login',)``, see
+            :func:`projection <github3.structs.projection>`
         :returns: generator of :class:`User <github3.users.User>`\ s
         """
         headers = {}
@@ -169,23 +194,28 @@ class Team(models.GitHubCore):
             headers['Accept'] = 'application/vnd.github.ironman-preview+json'
         url = self._build_url('members', base_url=self._api)
         return self._iter(int(number), url, users.ShortUser, params=params,
-                          etag=etag, headers=headers)
+                          etag=etag, headers=headers, raw=raw, fields=fields)
 
     @requires_auth
-    def repositories(self, number=-1, etag=None):
+    def repositories(self, number=-1, etag=None, raw=False, fields=None):
         """Iterate over the repositories this team has access to.
 
         :param int number: (optional), number of repos to iterate over.
             Default: -1 iterates over all values
         :param str etag: (optional), ETag from a previous request to the same
             endpoint
+        :param bool raw: (optional), yield the JSON of each item as a dict
+            rather than an object
+        :param tuple fields: (optional), yield only these fields of each item
+            as a namedtuple, e.g. ``('name', 'private')``, see
+            :func:`projection <github3.structs.projection>`
         :returns: generator of :class:`Repository <github3.repos.Repository>`
             objects
         """
         headers = {'Accept': 'application/vnd.github.ironman-preview+json'}
         url = self._build_url('repos', base_url=self._api)
         return self._iter(int(number), url, ShortRepository, etag=etag,
-                          headers=headers)
+                          headers=headers, raw=raw, fields=fields)
 
     @requires_auth
     def membership_for(self, username):
@@ -251,6 +281,9 @@ class _Organization(models.GitHubCore):
     # Roles available to members in an organization.
     members_roles = frozenset(['all', 'admin', 'member'])
 
+    # URI templates, parsed on first access
+    public_members_urlt = LazyURITemplate('public_members_urlt')
+
     def _update_attributes(self, org):
         #: URL of the avatar at gravatar
         self.avatar_url = org['avatar_url']
@@ -267,7 +300,7 @@ class _Organization(models.GitHubCore):
         self.login = org['login']
 
         #: Public Members URL Template. Expands with ``member``
-        self.public_members_urlt = URITemplate(org['public_members_url'])
+        self.public_members_urlt = org['public_members_url']
 
         #: Various urls (not templates)
         for urltype in ('avatar_url', 'events_url', 'issues_url',
@@ -457,6 +490,25 @@ class _Organization(models.GitHubCore):
             return True
         return False
 
+    @requires_auth
+    def invitations(self, number=-1, etag=None, raw=False, fields=None):
+        r"""Iterate over the pending invitations to this organization.
+
+        :param int number: (optional), number of invitations to return.
+            Default: -1 returns all available invitations
+        :param str etag: (optional), ETag from a previous request to the same
+            endpoint
+        :param bool raw: (optional), yield the JSON of each item as a dict
+            rather than an object
+        :param tuple fields: (optional), yield only these fields of each item
+            as a namedtuple, e.g. ``('login',)``, see
+            :func:`projection <github3.structs.projection>`
+        :returns: generator of :class:`Invitation <Invitation>`\ s
+        """
+        url = self._build_url('invitations', base_url=self._api)
+        return self._iter(int(number), url, Invitation, etag=etag, raw=raw,
+                          fields=fields)
+
     def is_member(self, username):
         """Check if the user named ``username`` is a member.
 
@@ -518,7 +570,8 @@ class _Organization(models.GitHubCore):
         url = self._build_url('events', base_url=self._api)
         return self._iter(int(number), url, Event, etag=etag)
 
-    def members(self, filter=None, role=None, number=-1, etag=None):
+    def members(self, filter=None, role=None, number=-1, etag=None,
+                raw=False, fields=None):
         r"""Iterate over members of this organization.
 
         :param str filter: (optional), filter members returned by this method.
@@ -532,6 +585,11 @@ class _Organization(models.GitHubCore):
             -1 will return all available.
         :param str etag: (optional), ETag from a previous request to the same
             endpoint
+        :param bool raw: (optional), yield the JSON of each item as a dict
+            rather than an object
+        :param tuple fields: (optional), yield only these fields of each item
+            as a namedtuple, e.g. ``('login',)``, see
+            :func:`projection <github3.structs.projection>`
         :returns: generator of :class:`User <github3.users.User>`\ s
         """
         headers = {}
@@ -543,7 +601,7 @@ class _Organization(models.GitHubCore):
             headers['Accept'] = 'application/vnd.github.ironman-preview+json'
         url = self._build_url('members', base_url=self._api)
         return self._iter(int(number), url, users.ShortUser, params=params,
-                          etag=etag, headers=headers)
+                          etag=etag, headers=headers, raw=raw, fields=fields)
 
     def public_members(self, number=-1, etag=None):
         r"""Iterate over public members of this organization.
@@ -586,7 +644,8 @@ class _Organization(models.GitHubCore):
             headers=Project.CUSTOM_HEADERS
         )
 
-    def repositories(self, type='', number=-1, etag=None):
+    def repositories(self, type='', number=-1, etag=None, raw=False,
+                     fields=None):
         r"""Iterate over repos for this organization.
 
         :param str type: (optional), accepted values:
@@ -596,26 +655,38 @@ class _Organization(models.GitHubCore):
             -1 will return all available.
         :param str etag: (optional), ETag from a previous request to the same
             endpoint
+        :param bool raw: (optional), yield the JSON of each item as a dict
+            rather than an object
+        :param tuple fields: (optional), yield only these fields of each item
+            as a namedtuple, e.g. ``('name', 'private')``, see
+            :func:`projection <github3.structs.projection>`
         :returns: generator of :class:`Repository <github3.repos.Repository>`
         """
         url = self._build_url('repos', base_url=self._api)
         params = {}
         if type in ('all', 'public', 'member', 'private', 'forks', 'sources'):
             params['type'] = type
-        return self._iter(int(number), url, ShortRepository, params, etag)
+        return self._iter(int(number), url, ShortRepository, params, etag,
+                          raw=raw, fields=fields)
 
     @requires_auth
-    def teams(self, number=-1, etag=None):
+    def teams(self, number=-1, etag=None, raw=False, fields=None):
         r"""Iterate over teams that are part of this organization.
 
         :param int number: (optional), number of teams to return. Default: -1
             returns all available teams.
         :param str etag: (optional), ETag from a previous request to the same
             endpoint
+        :param bool raw: (optional), yield the JSON of each item as a dict
+            rather than an object
+        :param tuple fields: (optional), yield only these fields of each item
+            as a namedtuple, e.g. ``('name', 'slug')``, see
+            :func:`projection <github3.structs.projection>`
         :returns: generator of :class:`Team <Team>`\ s
         """
         url = self._build_url('teams', base_url=self._api)
-        return self._iter(int(number), url, Team, etag=etag)
+        return self._iter(int(number), url, Team, etag=etag, raw=raw,
+                          fields=fields)
 
     @requires_auth
     def publicize_member(self, username):
@@ -665,6 +736,20 @@ class _Organization(models.GitHubCore):
             json = self._json(self._get(url), 200)
         return self._instance_or_null(Team, json)
 
+    @requires_auth
+    def team_by_slug(self, slug):
+        """Return the team specified by ``slug``.
+
+        :param str slug: (required), the slug of the team, e.g. ``my-team``
+            for a team named ``My Team``
+        :returns: :class:`Team <Team>` or None if there is no such team
+        """
+        json = None
+        if slug:
+            url = self._build_url('teams', str(slug), base_url=self._api)
+            json = self._json(self._get(url), 200)
+        return self._instance_or_null(Team, json)
+
 
 class ShortOrganization(_Organization):
     """Object for the shortened representation of an Organization.
@@ -775,3 +860,32 @@ class Membership(models.GitHubCore):
             self._update_attributes(json)
             return True
         return False
+
+
+class Invitation(models.GitHubCore):
+
+    """A pending invitation to join an organization or team."""
+
+    # Parsed on first access
+    created_at = models.LazyAttribute.timestamp('created_at')
+
+    def _repr(self):
+        return '<Invitation [{0}]>'.format(self.login or self.email)
+
+    def _update_attributes(self, invitation):
+        self._api = self._get_attribute(invitation, 'url')
+
+        #: Unique ID of the invitation.
+        self.id = self._get_attribute(invitation, 'id')
+
+        #: Login of the invited user, None when invited by e-mail.
+        self.login = self._get_attribute(invitation, 'login')
+
+        #: E-mail address the invitation was sent to, if any.
+        self.email = self._get_attribute(invitation, 'email')
+
+        #: Role the user was invited with.
+        self.role = self._get_attribute(invitation, 'role')
+
+        #: datetime object representing when the invitation was created.
+        self.created_at = self._get_attribute(invitation, 'created_at')
@@ -30,18 +30,19 @@ class RepoCommit(models.BaseCommit):
 
     """
 
+    # Built on first access
+    author = models.LazyAttribute.model('author', users.ShortUser)
+    committer = models.LazyAttribute.model('committer', users.ShortUser)
+    commit = models.LazyAttribute.model('commit', git.Commit)
+
     def _update_attributes(self, commit):
         super(RepoCommit, self)._update_attributes(commit)
 
-        self.author = self._class_attribute(
-            commit, 'author', users.ShortUser, self
-        )
-        self.committer = self._class_attribute(
-            commit, 'committer', users.ShortUser, self
-        )
+        self.author = self._get_attribute(commit, 'author')
+        self.committer = self._get_attribute(commit, 'committer')
 
         #: :class:`Commit <github3.git.Commit>`.
-        self.commit = self._class_attribute(commit, 'commit', git.Commit, self)
+        self.commit = self._get_attribute(commit, 'commit')
 
         self.sha = self._get_attribute(commit, 'sha')
 
@@ -65,7 +66,9 @@ class RepoCommit(models.BaseCommit):
         self._uniq = self.sha
 
         #: The commit message
-        self.message = getattr(self.commit, 'message', None)
+        self.message = self._get_attribute(
+            self._get_attribute(commit, 'commit'), 'message'
+        )
 
     def _repr(self):
         return '<Repository Commit [{0}]>'.format(self.sha[:7])
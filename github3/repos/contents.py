@@ -14,7 +14,7 @@ from json import dumps
 
 from ..decorators import requires_auth
 from ..git import Commit
-from ..models import GitHubCore
+from ..models import GitHubCore, LazyAttribute
 
 
 class Contents(GitHubCore):
@@ -34,6 +34,12 @@ class Contents(GitHubCore):
     See also: http://developer.github.com/v3/repos/contents/
     """
 
+    # Decoded on first access
+    decoded = LazyAttribute(
+        'decoded', lambda contents, content: b64decode(content.encode())
+        if contents.encoding == 'base64' and content else content
+    )
+
     def _update_attributes(self, content):
         # links
         self._api = self._get_attribute(content, 'url')
@@ -68,8 +74,6 @@ class Contents(GitHubCore):
         #: ``content.decoded.decode('utf-8')``.
         #: .. versionchanged:: 0.5.2
         self.decoded = self.content
-        if self.encoding == 'base64' and self.content:
-            self.decoded = b64decode(self.content.encode())
 
         # file name, path, and size
         #: Name of the content.
@@ -10,23 +10,22 @@ from __future__ import unicode_literals
 from base64 import b64encode
 from json import dumps
 
-from uritemplate import URITemplate
-
 from .. import users
 
 from ..decorators import requires_auth
 from ..events import Event
-from ..git import Blob, Commit, Reference, Tag, Tree
+from ..git import Blob, Commit, CompactTree, Reference, Tag, Tree
 from ..issues import ShortIssue, Issue, issue_params
 from ..issues.event import IssueEvent
 from ..issues.label import Label
 from ..issues.milestone import Milestone
 from ..licenses import License
-from ..models import GitHubCore
+from ..models import GitHubCore, LazyAttribute
 from ..notifications import Subscription, Thread
 from ..projects import Project
 from ..pulls import ShortPullRequest, PullRequest
-from ..utils import stream_response_to_file, timestamp_parameter
+from ..utils import (LazyURITemplate, stream_response_to_file,
+                     timestamp_parameter)
 from .branch import Branch
 from .comment import RepoComment
 from .commit import RepoCommit
@@ -55,17 +54,45 @@ class _Repository(GitHubCore):
 
     class_name = '_Repository'
 
+    # URI templates, parsed on first access
+    archive_urlt = LazyURITemplate('archive_urlt')
+    assignees_urlt = LazyURITemplate('assignees_urlt')
+    blobs_urlt = LazyURITemplate('blobs_urlt')
+    branches_urlt = LazyURITemplate('branches_urlt')
+    collaborators_urlt = LazyURITemplate('collaborators_urlt')
+    comments_urlt = LazyURITemplate('comments_urlt')
+    commits_urlt = LazyURITemplate('commits_urlt')
+    compare_urlt = LazyURITemplate('compare_urlt')
+    contents_urlt = LazyURITemplate('contents_urlt')
+    git_commits_urlt = LazyURITemplate('git_commits_urlt')
+    git_refs_urlt = LazyURITemplate('git_refs_urlt')
+    git_tags_urlt = LazyURITemplate('git_tags_urlt')
+    issue_comment_urlt = LazyURITemplate('issue_comment_urlt')
+    issue_events_urlt = LazyURITemplate('issue_events_urlt')
+    issues_urlt = LazyURITemplate('issues_urlt')
+    keys_urlt = LazyURITemplate('keys_urlt')
+    labels_urlt = LazyURITemplate('labels_urlt')
+    milestones_urlt = LazyURITemplate('milestones_urlt')
+    notifications_urlt = LazyURITemplate('notifications_urlt')
+    pulls_urlt = LazyURITemplate('pulls_urlt')
+    releases_urlt = LazyURITemplate('releases_urlt')
+    statuses_urlt = LazyURITemplate('statuses_urlt')
+    trees_urlt = LazyURITemplate('trees_urlt')
+
+    # Built on first access
+    owner = LazyAttribute.model('owner', users.ShortUser)
+
     def _update_attributes(self, repo):
         self.url = self._api = repo['url']
-        self.archive_urlt = URITemplate(repo['archive_url'])
-        self.assignees_urlt = URITemplate(repo['assignees_url'])
-        self.blobs_urlt = URITemplate(repo['blobs_url'])
-        self.branches_urlt = URITemplate(repo['branches_url'])
-        self.collaborators_urlt = URITemplate(repo['collaborators_url'])
-        self.comments_urlt = URITemplate(repo['comments_url'])
-        self.commits_urlt = URITemplate(repo['commits_url'])
-        self.compare_urlt = URITemplate(repo['compare_url'])
-        self.contents_urlt = URITemplate(repo['contents_url'])
+        self.archive_urlt = repo['archive_url']
+        self.assignees_urlt = repo['assignees_url']
+        self.blobs_urlt = repo['blobs_url']
+        self.branches_urlt = repo['branches_url']
+        self.collaborators_urlt = repo['collaborators_url']
+        self.comments_urlt = repo['comments_url']
+        self.commits_urlt = repo['commits_url']
+        self.compare_urlt = repo['compare_url']
+        self.contents_urlt = repo['contents_url']
         self.contributors_url = repo['contributors_url']
         self.deployments_url = repo['deployments_url']
         self.description = self._get_attribute(repo, 'description')
@@ -74,33 +101,33 @@ class _Repository(GitHubCore):
         self.fork = repo['fork']
         self.forks_url = repo['forks_url']
         self.full_name = repo['full_name']
-        self.git_commits_urlt = URITemplate(repo['git_commits_url'])
-        self.git_refs_urlt = URITemplate(repo['git_refs_url'])
-        self.git_tags_urlt = URITemplate(repo['git_tags_url'])
+        self.git_commits_urlt = repo['git_commits_url']
+        self.git_refs_urlt = repo['git_refs_url']
+        self.git_tags_urlt = repo['git_tags_url']
         self.hooks_url = repo['hooks_url']
         self.html_url = repo['html_url']
         self.id = repo['id']
-        self.issue_comment_urlt = URITemplate(repo['issue_comment_url'])
-        self.issue_events_urlt = URITemplate(repo['issue_events_url'])
-        self.issues_urlt = URITemplate(repo['issues_url'])
-        self.keys_urlt = URITemplate(repo['keys_url'])
-        self.labels_urlt = URITemplate(repo['labels_url'])
+        self.issue_comment_urlt = repo['issue_comment_url']
+        self.issue_events_urlt = repo['issue_events_url']
+        self.issues_urlt = repo['issues_url']
+        self.keys_urlt = repo['keys_url']
+        self.labels_urlt = repo['labels_url']
         self.languages_url = repo['languages_url']
         self.merges_url = self._get_attribute(repo, 'merges_url')
-        self.milestones_urlt = URITemplate(repo['milestones_url'])
+        self.milestones_urlt = repo['milestones_url']
         self.name = repo['name']
-        self.notifications_urlt = URITemplate(repo['notifications_url'])
-        self.owner = users.ShortUser(repo['owner'], self)
+        self.notifications_urlt = repo['notifications_url']
+        self.owner = repo['owner']
         self.private = repo['private']
-        self.pulls_urlt = URITemplate(repo['pulls_url'])
-        self.releases_urlt = URITemplate(repo['releases_url'])
+        self.pulls_urlt = repo['pulls_url']
+        self.releases_urlt = repo['releases_url']
         self.stargazers_url = repo['stargazers_url']
-        self.statuses_urlt = URITemplate(repo['statuses_url'])
+        self.statuses_urlt = repo['statuses_url']
         self.subscribers_url = repo['subscribers_url']
         self.subscription_url = repo['subscription_url']
         self.tags_url = repo['tags_url']
         self.teams_url = repo['teams_url']
-        self.trees_urlt = URITemplate(repo['trees_url'])
+        self.trees_urlt = repo['trees_url']
 
     def _repr(self):
         return '<{0} [{1}]>'.format(self.class_name, self)
@@ -328,7 +355,7 @@ class _Repository(GitHubCore):
         return self._instance_or_null(RepoComment, json)
 
     def commits(self, sha=None, path=None, author=None, number=-1, etag=None,
-                since=None, until=None, per_page=None):
+                since=None, until=None, per_page=None, raw=False, fields=None):
         r"""Iterate over commits in this repository.
 
         :param str sha: (optional), sha or branch to start listing commits
@@ -351,6 +378,11 @@ class _Repository(GitHubCore):
         :type until: datetime or string
         :param int per_page: (optional), commits listing page size
 
+        :param bool raw: (optional), yield the JSON of each item as a dict
+            rather than an object
+        :param tuple fields: (optional), yield only these fields of each item
+            as a namedtuple, e.g. ``('sha', 'commit.committer.date')``, see
+            :func:`projection <github3.structs.projection>`
         :returns: generator of
             :class:`RepoCommit <github3.repos.commit.RepoCommit>`\ s
         """
@@ -361,7 +393,8 @@ class _Repository(GitHubCore):
 
         self._remove_none(params)
         url = self._build_url('commits', base_url=self._api)
-        return self._iter(int(number), url, RepoCommit, params, etag)
+        return self._iter(int(number), url, RepoCommit, params, etag,
+                          raw=raw, fields=fields)
 
     def compare_commits(self, base, head):
         """Compare two commits.
@@ -556,7 +589,9 @@ class _Repository(GitHubCore):
                     'committer': validate_commmitter(committer),
                     'author': validate_commmitter(author), 'sha': sha}
             self._remove_none(data)
-            json = self._json(self._put(url, data=dumps(data)), 201)
+            # GitHub answers 200 when an existing file is updated
+            json = self._json(self._put(url, data=dumps(data)),
+                              200 if sha else 201)
             if json and 'content' in json and 'commit' in json:
                 json['content'] = Contents(json['content'], self)
                 json['commit'] = Commit(json['commit'], self)
@@ -1812,6 +1847,50 @@ class _Repository(GitHubCore):
             json = self._json(self._get(url), 200)
         return self._instance_or_null(Tree, json)
 
+    def compact_tree(self, sha):
+        """Get a tree and every tree below it, without building objects.
+
+        GitHub truncates the recursive listings of very large trees, the
+        subtrees of a truncated tree are then listed one at a time.
+
+        :param str sha: (required), sha of the tree, or a branch or commit
+        :returns: :class:`CompactTree <github3.git.CompactTree>`
+        """
+        json = None
+        if sha:
+            json = self._tree_json(sha, recursive=True)
+        if json is None:
+            return None
+        entries = json.get('tree', [])
+        if json.get('truncated'):
+            entries = self._walk_tree(json['sha'])
+        return CompactTree(json['sha'], entries)
+
+    def _tree_json(self, sha, recursive=False):
+        url = self._build_url('git', 'trees', sha, base_url=self._api)
+        params = {'recursive': '1'} if recursive else None
+        return self._json(self._get(url, params=params), 200)
+
+    def _walk_tree(self, sha, prefix=''):
+        """List the entries of a tree level by level, paths below prefix."""
+        entries = []
+        json = self._tree_json(sha) or {}
+        for entry in json.get('tree', []):
+            path = prefix + entry['path']
+            entries.append(dict(entry, path=path))
+            if entry['type'] != 'tree':
+                continue
+            subtree = self._tree_json(entry['sha'], recursive=True)
+            if subtree is None:
+                # Removed while it was walked, its entries are skipped
+                continue
+            if subtree.get('truncated'):
+                entries.extend(self._walk_tree(entry['sha'], path + '/'))
+            else:
+                entries.extend(dict(sub, path=path + '/' + sub['path'])
+                               for sub in subtree.get('tree', []))
+        return entries
+
     def weekly_commit_count(self):
         """Retrieve the total commit counts.
 
@@ -2251,12 +2330,21 @@ class Repository(_Repository):
     """
 
     class_name = 'Repository'
+    _json_renamed = {'license': 'original_license'}
+
+    # Built on first access
+    created_at = LazyAttribute.timestamp('created_at')
+    original_license = LazyAttribute.model('original_license', License)
+    parent = LazyAttribute.model('parent', ShortRepository)
+    pushed_at = LazyAttribute.timestamp('pushed_at')
+    source = LazyAttribute.model('source', ShortRepository)
+    updated_at = LazyAttribute.timestamp('updated_at')
 
     def _update_attributes(self, repo):
         super(Repository, self)._update_attributes(repo)
         self.archived = repo['archived']
         self.clone_url = repo['clone_url']
-        self.created_at = self._strptime(repo['created_at'])
+        self.created_at = repo['created_at']
         self.default_branch = repo['default_branch']
         self.forks_count = repo['forks_count']
         self.fork_count = self.forks_count
@@ -2269,24 +2357,18 @@ class Repository(_Repository):
         self.homepage = repo['homepage']
         self.language = repo['language']
         self.original_license = repo['license']
-        if self.original_license is not None:
-            self.original_license = License(self.original_license, self)
         self.mirror_url = repo['mirror_url']
         self.network_count = repo['network_count']
         self.open_issues_count = repo['open_issues_count']
         self.parent = repo.get('parent', None)
-        if self.parent is not None:
-            self.parent = ShortRepository(self.parent, self)
-        self.pushed_at = self._strptime(repo['pushed_at'])
+        self.pushed_at = repo['pushed_at']
         self.size = repo['size']
         self.source = repo.get('source', None)
-        if self.source is not None:
-            self.source = ShortRepository(self.source, self)
         self.ssh_url = repo['ssh_url']
         self.stargazers_count = repo['stargazers_count']
         self.subscribers_count = repo['subscribers_count']
         self.svn_url = self._get_attribute(repo, 'svn_url')
-        self.updated_at = self._strptime_attribute(repo, 'updated_at')
+        self.updated_at = self._get_attribute(repo, 'updated_at')
         self.watchers_count = self.watchers = repo['watchers_count']
 
 
@@ -1,8 +1,15 @@
 # -*- coding: utf-8 -*-
+import collections
+import threading
+import time
+
 import requests
 
 from collections import Callable
+from requests.compat import urlparse
 from . import __version__
+from . import exceptions
+from .cache import CachedResponse, cache_key
 from logging import getLogger
 from contextlib import contextmanager
 
@@ -17,6 +24,175 @@ def requires_2fa(response):
     return False
 
 
+class RateLimiter(object):
+    """Govern the requests made through a session by GitHub's rate limits.
+
+    Requests may come from several threads at once. The limiter
+
+    - caps the number of requests in flight,
+    - spaces out content-creating requests so no more than
+      ``max_writes_per_minute`` are made in any minute (GitHub's secondary
+      rate limit),
+    - tracks the budget of each rate limit (``core``, ``search``, ...) from
+      the ``X-RateLimit-*`` headers of every response,
+    - paces requests evenly over the time left until the reset once less than
+      ``pace_below`` of a budget remains,
+    - waits for the reset (or raises
+      :class:`RateLimitExceeded <github3.exceptions.RateLimitExceeded>` when
+      ``fail_fast`` is set) once a budget is exhausted, and
+    - honours ``Retry-After`` on secondary rate limit responses, waiting
+      ``secondary_wait`` seconds when there is none.
+
+    :param int max_concurrent: (optional), maximum number of requests in
+        flight at once
+    :param int max_writes_per_minute: (optional), maximum number of
+        POST/PATCH/PUT/DELETE requests in any 60 second window
+    :param bool fail_fast: (optional), raise instead of sleeping until the
+        reset time when a budget is exhausted
+    :param float pace_below: (optional), fraction of a budget below which
+        requests are paced
+    """
+
+    WRITE_METHODS = frozenset(['POST', 'PATCH', 'PUT', 'DELETE'])
+    #: Number of times a request rejected by a rate limit is attempted
+    max_attempts = 3
+    #: Seconds to wait after a secondary rate limit response which has no
+    #: ``Retry-After`` header
+    secondary_wait = 60
+
+    def __init__(self, max_concurrent=8, max_writes_per_minute=80,
+                 fail_fast=False, pace_below=0.2):
+        self.max_writes_per_minute = max_writes_per_minute
+        self.fail_fast = fail_fast
+        self.pace_below = pace_below
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._write_lock = threading.Lock()
+        self._write_times = collections.deque()
+        self._budget_lock = threading.Lock()
+        self._budgets = {}
+        self._next_request = {}
+        #: Time (epoch seconds) before which no request should be made
+        self.blocked_until = 0
+
+    @staticmethod
+    def resource_for(url):
+        """Return the name of the rate limit a request to ``url`` counts
+        against."""
+        if urlparse(url).path.startswith('/search/'):
+            return 'search'
+        return 'core'
+
+    def budget(self, resource='core'):
+        """Return the last budget seen for ``resource``.
+
+        :param str resource: (optional), name of the rate limit
+        :returns: dict with ``limit``, ``remaining`` and ``reset`` (epoch
+            seconds), or None if no response has reported it yet
+        """
+        with self._budget_lock:
+            budget = self._budgets.get(resource)
+            return dict(budget) if budget else None
+
+    def _delay(self, resource):
+        """Return the number of seconds to wait before the next request
+        against ``resource``, reserving a slot for it."""
+        now = time.time()
+        with self._budget_lock:
+            delay = self.blocked_until - now
+            budget = self._budgets.get(resource)
+            if budget is None or budget['reset'] <= now:
+                return delay
+            if budget['remaining'] <= 0:
+                if self.fail_fast:
+                    raise exceptions.RateLimitExceeded(resource,
+                                                       budget['reset'])
+                return max(delay, budget['reset'] - now)
+            if budget['remaining'] < self.pace_below * budget['limit']:
+                # Spread what is left evenly until the reset
+                interval = (budget['reset'] - now) / budget['remaining']
+                slot = max(self._next_request.get(resource, now), now)
+                self._next_request[resource] = slot + interval
+                delay = max(delay, slot - now)
+            # Count the request now, the response corrects it
+            budget['remaining'] -= 1
+            return delay
+
+    def _reserve_write(self):
+        """Reserve the time of the next write, so that no more than
+        ``max_writes_per_minute`` fall in any minute, and return the number
+        of seconds to wait for it.
+
+        Only the reservation is made under the lock, the caller sleeps
+        without holding it or a slot of ``max_concurrent``.
+        """
+        with self._write_lock:
+            now = time.time()
+            while self._write_times and now - self._write_times[0] >= 60:
+                self._write_times.popleft()
+            slot = now
+            if len(self._write_times) >= self.max_writes_per_minute:
+                slot = max(now, self._write_times[
+                    -self.max_writes_per_minute] + 60)
+            self._write_times.append(slot)
+            return slot - now
+
+    @contextmanager
+    def limit(self, method, url):
+        """Wait until a request with ``method`` to ``url`` may be made."""
+        delay = self._delay(self.resource_for(url))
+        if method.upper() in self.WRITE_METHODS:
+            delay = max(delay, self._reserve_write())
+        if delay > 0:
+            __logs__.info('Rate limited, sleeping for %.1f seconds', delay)
+            time.sleep(delay)
+        with self._semaphore:
+            yield
+
+    def update(self, response):
+        """Record the rate limit state returned with ``response``.
+
+        :returns: bool -- True if the request was rejected by a rate limit and
+            should be retried
+        """
+        headers = response.headers
+        if 'X-RateLimit-Remaining' in headers:
+            resource = (headers.get('X-RateLimit-Resource') or
+                        self.resource_for(response.url))
+            with self._budget_lock:
+                self._budgets[resource] = {
+                    'limit': int(headers.get('X-RateLimit-Limit', 0)),
+                    'remaining': int(headers['X-RateLimit-Remaining']),
+                    'reset': int(headers.get('X-RateLimit-Reset', 0)),
+                }
+
+        if response.status_code not in (403, 429):
+            return False
+        if 'Retry-After' in headers:
+            self.blocked_until = time.time() + int(headers['Retry-After'])
+            return True
+        if headers.get('X-RateLimit-Remaining') == '0':
+            if self.fail_fast:
+                raise exceptions.RateLimitExceeded(
+                    resource, int(headers.get('X-RateLimit-Reset', 0)))
+            return True
+        if self._is_secondary_limit(response):
+            # GitHub asks to wait at least a minute when it gives no time
+            self.blocked_until = time.time() + self.secondary_wait
+            return True
+        return False
+
+    @staticmethod
+    def _is_secondary_limit(response):
+        if response.status_code == 429:
+            return True
+        try:
+            message = response.json().get('message', '')
+        except (ValueError, AttributeError):
+            return False
+        message = message.lower()
+        return 'secondary rate limit' in message or 'abuse' in message
+
+
 class GitHubSession(requests.Session):
     auth = None
     __attrs__ = requests.Session.__attrs__ + ['base_url', 'two_factor_auth_cb']
@@ -36,6 +212,16 @@ class GitHubSession(requests.Session):
         self.base_url = 'https://api.github.com'
         self.two_factor_auth_cb = None
         self.request_counter = 0
+        self.rate_limiter = None
+        #: Number of pages :class:`GitHubIterator
+        #: <github3.structs.GitHubIterator>` fetches ahead in parallel
+        self.prefetch_pages = 0
+        #: Drop the fields of the JSON of models which their attributes hold,
+        #: see :meth:`GitHubCore._slim <github3.models.GitHubCore._slim>`
+        self.slim_models = False
+        #: :class:`ResponseCache <github3.cache.ResponseCache>` used to replay
+        #: GET requests conditionally, or None
+        self.cache = None
 
     def basic_auth(self, username, password):
         """Set the Basic Auth credentials on this Session.
@@ -85,7 +271,17 @@ class GitHubSession(requests.Session):
         raise NotImplementedError('These features are not implemented yet')
 
     def request(self, *args, **kwargs):
-        response = super(GitHubSession, self).request(*args, **kwargs)
+        if self.rate_limiter is None:
+            response = super(GitHubSession, self).request(*args, **kwargs)
+        else:
+            method = args[0] if args else kwargs.get('method', 'GET')
+            url = args[1] if len(args) > 1 else kwargs.get('url', '')
+            for _ in range(self.rate_limiter.max_attempts):
+                with self.rate_limiter.limit(method, url):
+                    response = super(GitHubSession, self).request(*args,
+                                                                  **kwargs)
+                if not self.rate_limiter.update(response):
+                    break
         self.request_counter += 1
         if requires_2fa(response) and self.two_factor_auth_cb:
             # No need to flatten and re-collect the args in
@@ -95,6 +291,44 @@ class GitHubSession(requests.Session):
             response = new_response
         return response
 
+    def send(self, request, **kwargs):
+        """Send ``request``, revalidating cached GET responses.
+
+        When a cache is set, a GET request which is not already conditional
+        is sent with the ``ETag``/``Last-Modified`` of the cached response and
+        a ``304 Not Modified`` is answered with the cached response.
+        """
+        cache = self.cache
+        if (cache is None or request.method != 'GET' or
+                kwargs.get('stream') or
+                'If-None-Match' in request.headers or
+                'If-Modified-Since' in request.headers):
+            return super(GitHubSession, self).send(request, **kwargs)
+
+        key = cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            if entry.etag:
+                request.headers['If-None-Match'] = entry.etag
+            elif entry.last_modified:
+                request.headers['If-Modified-Since'] = entry.last_modified
+
+        response = super(GitHubSession, self).send(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            cache.record(hit=True)
+            # Keep the headers of the 304, e.g. the current rate limit
+            cached_response = entry.to_response(request)
+            cached_response.headers.update(response.headers)
+            return cached_response
+
+        cache.record(hit=False)
+        if response.status_code == 200 and (
+                response.headers.get('ETag') or
+                response.headers.get('Last-Modified')):
+            cache.set(key, CachedResponse.from_response(response))
+        return response
+
     def retrieve_client_credentials(self):
         """Return the client credentials.
 
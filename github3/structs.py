@@ -1,17 +1,59 @@
 # -*- coding: utf-8 -*-
 import collections
 import functools
+from concurrent.futures import ThreadPoolExecutor
 
-from requests.compat import urlparse, urlencode
+from requests.compat import urlparse, urlencode, urlunparse
+
+try:
+    from urllib.parse import parse_qsl
+except ImportError:  # Python 2
+    from urlparse import parse_qsl
 
 from . import exceptions
 from . import models
 
 
+# Projection functions built by projection(), keyed by their fields
+_projections = {}
+
+
+def projection(fields):
+    """Build a function which projects the JSON of an item onto a tuple.
+
+    :param tuple fields: (required), the keys to keep, nested keys are given
+        as dotted paths (e.g. ``'commit.committer.date'``)
+    :returns: function taking a dict and returning a namedtuple whose
+        attributes are the fields, with dots replaced by underscores. Missing
+        keys are None.
+    """
+    fields = tuple(fields)
+    if fields not in _projections:
+        Projection = collections.namedtuple(
+            'Projection', [field.replace('.', '_') for field in fields])
+        paths = [field.split('.') for field in fields]
+
+        def project(json):
+            values = []
+            for path in paths:
+                value = json
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                values.append(value)
+            return Projection(*values)
+
+        _projections[fields] = project
+    return _projections[fields]
+
+
+def _identity(json):
+    return json
+
+
 class GitHubIterator(models.GitHubCore, collections.Iterator):
     """The :class:`GitHubIterator` class powers all of the iter_* methods."""
     def __init__(self, count, url, cls, session, params=None, etag=None,
-                 headers=None):
+                 headers=None, raw=False, fields=None):
         models.GitHubCore.__init__(self, {}, session)
         #: Original number of items requested
         self.original = count
@@ -24,6 +66,10 @@ class GitHubIterator(models.GitHubCore, collections.Iterator):
         self._api = self.url
         #: Class for constructing an item to return
         self.cls = cls
+        #: If the JSON of each item is returned as a dict rather than a cls
+        self.raw = raw
+        #: Fields of each item returned as a namedtuple rather than a cls
+        self.fields = fields
         #: Parameters of the query string
         self.params = params or {}
         self._remove_none(self.params)
@@ -40,6 +86,11 @@ class GitHubIterator(models.GitHubCore, collections.Iterator):
         #: Last status code received
         self.last_status = 0
 
+        #: Number of pages fetched ahead of the consumer in worker threads,
+        #: 0 fetches one page at a time once the previous one is consumed.
+        #: Defaults to the ``prefetch_pages`` attribute of the session.
+        self.prefetch = getattr(self.session, 'prefetch_pages', 0)
+
         if etag:
             self.headers.update({'If-None-Match': etag})
 
@@ -59,46 +110,144 @@ class GitHubIterator(models.GitHubCore, collections.Iterator):
             params['per_page'] = 100
 
         cls = self.cls
-        if issubclass(self.cls, models.GitHubCore):
+        if self.fields:
+            cls = projection(self.fields)
+        elif self.raw:
+            cls = _identity
+        elif issubclass(self.cls, models.GitHubCore):
             cls = functools.partial(self.cls, session=self)
 
-        while (self.count == -1 or self.count > 0) and self.last_url:
-            response = self._get(self.last_url, params=params,
-                                 headers=headers)
-            self.last_response = response
-            self.last_status = response.status_code
-            if params:
-                params = None  # rel_next already has the params
-
-            if not self.etag and response.headers.get('ETag'):
-                self.etag = response.headers.get('ETag')
-
-            json = self._get_json(response)
-
-            if json is None:
-                break
-
-            # languages returns a single dict. We want the items.
-            if isinstance(json, dict):
-                if issubclass(self.cls, models.GitHubCore):
-                    raise exceptions.UnprocessableResponseBody(
-                        "GitHub's API returned a body that could not be"
-                        " handled", json
-                    )
-                if json.get('ETag'):
-                    del json['ETag']
-                if json.get('Last-Modified'):
-                    del json['Last-Modified']
-                json = json.items()
-
-            for i in json:
-                yield cls(i)
-                self.count -= 1 if self.count > 0 else 0
+        if not (self.count == -1 or self.count > 0) or not self.last_url:
+            return
+
+        pages = self._pages(params, headers)
+        try:
+            for response in pages:
+                self.last_response = response
+                self.last_status = response.status_code
+
+                if not self.etag and response.headers.get('ETag'):
+                    self.etag = response.headers.get('ETag')
+
+                json = self._get_json(response)
+
+                if json is None:
+                    break
+
+                # languages returns a single dict. We want the items.
+                if isinstance(json, dict):
+                    if issubclass(self.cls, models.GitHubCore):
+                        raise exceptions.UnprocessableResponseBody(
+                            "GitHub's API returned a body that could not be"
+                            " handled", json
+                        )
+                    if json.get('ETag'):
+                        del json['ETag']
+                    if json.get('Last-Modified'):
+                        del json['Last-Modified']
+                    json = json.items()
+
+                for i in json:
+                    yield cls(i)
+                    self.count -= 1 if self.count > 0 else 0
+                    if self.count == 0:
+                        break
+
                 if self.count == 0:
                     break
+        finally:
+            # Stops the pages still being fetched ahead
+            pages.close()
+
+    def _pages(self, params, headers):
+        """Generate the responses of the pages, in order.
+
+        Pages are fetched one after another unless :attr:`prefetch` is set.
+        Then, if the first response links to the last page, the URL of every
+        page is known and up to :attr:`prefetch` of them are fetched in
+        parallel ahead of the consumer. Otherwise the next page is fetched in
+        a background thread while the current one is consumed. When
+        :attr:`count` is set, no page past the one holding the last item
+        wanted is fetched ahead.
+        """
+        # Pages after the first one which may be fetched ahead, None if all
+        pages_ahead = None
+        if self.count > 0:
+            per_page = int(params.get('per_page', 30))
+            pages_ahead = -(-self.count // per_page) - 1
+
+        response = self._get(self.last_url, params=params, headers=headers)
+        self.last_url = response.links.get('next', {}).get('url', '')
+
+        if self.prefetch <= 0:
+            while True:
+                yield response
+                if not self.last_url:
+                    return
+                # rel_next already has the params
+                response = self._get(self.last_url, headers=headers)
+                self.last_url = response.links.get('next', {}).get('url', '')
+
+        executor = ThreadPoolExecutor(max_workers=self.prefetch)
+        pending = collections.deque()
+        try:
+            rel_last = response.links.get('last', {}).get('url')
+            urls = None
+            if self.last_url and rel_last:
+                urls = self._page_urls(self.last_url, rel_last)
+            if urls is not None:
+                if pages_ahead is not None:
+                    urls = urls[:pages_ahead]
+                for url in urls[:self.prefetch]:
+                    pending.append(executor.submit(
+                        self._get, url, headers=headers))
+                urls = collections.deque(urls[self.prefetch:])
+            elif self.last_url and pages_ahead != 0:
+                pending.append(executor.submit(
+                    self._get, self.last_url, headers=headers))
+            fetched = len(pending)
+
+            yield response
+            while pending:
+                response = pending.popleft().result()
+                self.last_url = response.links.get('next', {}).get('url', '')
+                if urls:
+                    url = urls.popleft()
+                    pending.append(executor.submit(
+                        self._get, url, headers=headers))
+                elif urls is None and self.last_url and (
+                        pages_ahead is None or fetched < pages_ahead):
+                    pending.append(executor.submit(
+                        self._get, self.last_url, headers=headers))
+                    fetched += 1
+                yield response
+            # Past the pages fetched ahead, only reached if they held fewer
+            # items than per_page
+            while self.last_url:
+                response = self._get(self.last_url, headers=headers)
+                self.last_url = response.links.get('next', {}).get('url', '')
+                yield response
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _page_urls(rel_next, rel_last):
+        """Build the URLs of the pages from rel="next" to rel="last".
 
-            rel_next = response.links.get('next', {})
-            self.last_url = rel_next.get('url', '')
+        :returns: list of URLs, or None if the links are not numbered pages
+        """
+        parsed = urlparse(rel_next)
+        query = parse_qsl(parsed.query)
+        try:
+            first = int(dict(query)['page'])
+            last = int(dict(parse_qsl(urlparse(rel_last).query))['page'])
+        except (KeyError, ValueError):
+            return None
+        query = [(k, v) for k, v in query if k != 'page']
+        return [urlunparse(parsed._replace(query=urlencode(query + [(
+            'page', page)]))) for page in range(first, last + 1)]
 
     def __next__(self):
         if not hasattr(self, '__i__'):
@@ -131,9 +280,9 @@ class SearchIterator(GitHubIterator):
     """
 
     def __init__(self, count, url, cls, session, params=None, etag=None,
-                 headers=None):
+                 headers=None, raw=False, fields=None):
         super(SearchIterator, self).__init__(count, url, cls, session, params,
-                                             etag, headers)
+                                             etag, headers, raw, fields)
         #: Total count returned by GitHub
         self.total_count = 0
         #: Items array returned in the last request
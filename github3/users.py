@@ -5,11 +5,11 @@ from __future__ import unicode_literals
 from json import dumps
 
 from github3.auths import Authorization
-from uritemplate import URITemplate
 
 from . import models
 from .decorators import requires_auth
 from .events import Event
+from .utils import LazyURITemplate
 
 
 class Key(models.GitHubCore):
@@ -149,21 +149,27 @@ class _User(models.GitHubCore):
     """
     class_name = '_User'
 
+    # URI templates, parsed on first access
+    events_urlt = LazyURITemplate('events_urlt')
+    following_urlt = LazyURITemplate('following_urlt')
+    gists_urlt = LazyURITemplate('gists_urlt')
+    starred_urlt = LazyURITemplate('starred_urlt')
+
     def _update_attributes(self, user):
         #: URL of the avatar at gravatar
         self.avatar_url = user['avatar_url']
 
         #: Events URL Template. Expands with ``privacy``
-        self.events_urlt = URITemplate(user['events_url'])
+        self.events_urlt = user['events_url']
 
         #: Followers URL (not a template)
         self.followers_url = user['followers_url']
 
         #: Following URL Template. Expands with ``other_user``
-        self.following_urlt = URITemplate(user['following_url'])
+        self.following_urlt = user['following_url']
 
         #: Gists URL Template. Expands with ``gist_id``
-        self.gists_urlt = URITemplate(user['gists_url'])
+        self.gists_urlt = user['gists_url']
 
         #: ID of the user's image on Gravatar
         self.gravatar_id = user['gravatar_id']
@@ -190,7 +196,7 @@ class _User(models.GitHubCore):
         self.site_admin = user.get('site_admin')
 
         #: Starred URL Template. Expands with ``owner`` and ``repo``
-        self.starred_urlt = URITemplate(user['starred_url'])
+        self.starred_urlt = user['starred_url']
 
         #: Subscriptions URL (not a template)
         self.subscriptions_url = user['subscriptions_url']
@@ -533,6 +539,17 @@ class User(_User):
 
     class_name = 'User'
 
+    _json_renamed = {
+        'followers': 'followers_count',
+        'following': 'following_count',
+        'public_gists': 'public_gists_count',
+        'public_repos': 'public_repos_count',
+    }
+
+    # Parsed on first access
+    created_at = models.LazyAttribute.timestamp('created_at')
+    updated_at = models.LazyAttribute.timestamp('updated_at')
+
     def _update_attributes(self, user):
         super(User, self)._update_attributes(user)
         #: Markdown formatted biography
@@ -545,7 +562,7 @@ class User(_User):
         self.company = user['company']
 
         #: datetime object representing the date the account was created
-        self.created_at = self._strptime(user['created_at'])
+        self.created_at = user['created_at']
 
         #: E-mail address of the user/org
         self.email = user['email']
@@ -576,7 +593,7 @@ class User(_User):
         #: Number of public repos owned by the user/org
         self.public_repos_count = user['public_repos']
 
-        self.updated_at = self._strptime(user['updated_at'])
+        self.updated_at = user['updated_at']
 
 
 class AuthenticatedUser(User):
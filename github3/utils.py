@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 """A collection of useful utilities."""
 import collections
+import copy
 import datetime
 import re
 
 from requests import compat
+from uritemplate import URITemplate
 
 # with thanks to https://code.google.com/p/jquery-localtime/issues/detail?id=4
 ISO_8601 = re.compile("^(-?(?:[1-9][0-9]*)?[0-9]{4})-(1[0-2]|0[1-9])-(3[0-1]|0"
@@ -45,6 +47,65 @@ def timestamp_parameter(timestamp, allow_none=True):
     raise ValueError("Cannot accept type %s for timestamp" % type(timestamp))
 
 
+# Expressions of a URI template, e.g. ``{/sha}``
+TEMPLATE_EXPRESSION = re.compile('{([^}]+)}')
+
+# A parsed template for each shape (the tuple of its expressions) seen so far
+_template_shapes = {}
+
+
+def uri_template(uri):
+    """Parse a URI template, sharing the parsing between templates of the same
+    shape.
+
+    Templates returned for every repository of an organization differ only in
+    their literal parts (e.g. ``.../repos/org/name/git/blobs{/sha}``), so the
+    expressions are only parsed the first time a shape is seen and the parsed
+    variables are shared with later templates.
+
+    :param str uri: the URI template
+    :returns: :class:`~uritemplate.URITemplate`
+    """
+    shape = tuple(TEMPLATE_EXPRESSION.findall(uri))
+    template = _template_shapes.get(shape)
+    if template is None:
+        template = _template_shapes[shape] = URITemplate(uri)
+        return template
+    if template.uri == uri:
+        return template
+    template = copy.copy(template)
+    template.uri = uri
+    return template
+
+
+class LazyURITemplate(object):
+
+    """Attribute holding a :class:`~uritemplate.URITemplate` which is only
+    parsed when it is first read.
+
+    Assigning the template string to the attribute, e.g. in
+    ``_update_attributes``, stores it as it is. The first read parses it with
+    :func:`uri_template` and keeps the result on the instance.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            value = instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name)
+        if value is not None and not isinstance(value, URITemplate):
+            value = instance.__dict__[self.name] = uri_template(value)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
 class UTC(datetime.tzinfo):
 
     """Yet another UTC reimplementation, to avoid a dependency on pytz or
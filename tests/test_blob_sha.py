@@ -0,0 +1,25 @@
+import subprocess
+import unittest
+
+from ghca.common import git_blob_sha
+
+
+class GitBlobShaTest(unittest.TestCase):
+
+    def test_empty_blob(self):
+        self.assertEqual(git_blob_sha(b''), 'e69de29bb2d1d6434b8b29ae775ad8c2e48c5391')
+
+    def test_matches_git_hash_object(self):
+        self.assertEqual(git_blob_sha(b'hello world\n'), '3b18e512dba79e4c8300dd08aeb37f8e728b8dad')
+
+    def test_length_is_counted_in_bytes(self):
+        file_content = u'café\n'.encode('UTF-8')
+        try:
+            output = subprocess.check_output(['git', 'hash-object', '--stdin'], input=file_content)
+        except (OSError, subprocess.CalledProcessError):
+            self.skipTest('git is not available')
+        self.assertEqual(git_blob_sha(file_content), output.decode('ascii').strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from github3.cache import CachedResponse, ResponseCache
+
+
+def entry(content):
+    return CachedResponse('https://api.github.com/x', {'ETag': '"%s"' % content.decode('ascii')}, content, 'utf-8')
+
+
+class MemoryCacheTest(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(max_size=10)
+        cache.set('a', entry(b'aaaa'))
+        cache.set('b', entry(b'bbbb'))
+        cache.get('a')
+        cache.set('c', entry(b'cccc'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['size'], 8)
+
+    def test_replacing_an_entry_counts_its_size_once(self):
+        cache = ResponseCache(max_size=10)
+        cache.set('a', entry(b'aaaa'))
+        cache.set('a', entry(b'aaaaaa'))
+        self.assertEqual(cache.stats()['size'], 6)
+        self.assertEqual(len(cache), 1)
+
+    def test_entry_larger_than_the_cache_is_not_stored(self):
+        cache = ResponseCache(max_size=3)
+        cache.set('a', entry(b'aaaa'))
+        self.assertIsNone(cache.get('a'))
+
+    def test_etag(self):
+        self.assertEqual(entry(b'a').etag, '"a"')
+
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir_tmp, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_tmp)
+
+    def set(self, cache, key, content):
+        cache.set(key, entry(content))
+        # Access times order the evictions
+        time.sleep(0.01)
+
+    def test_survives_between_sessions(self):
+        cache = ResponseCache(path=self.path)
+        self.set(cache, 'a', b'aaaa')
+        cache._db.close()
+
+        cached = ResponseCache(path=self.path).get('a')
+        self.assertEqual(cached.content, b'aaaa')
+        self.assertEqual(cached.etag, '"aaaa"')
+
+    def test_evicts_least_recently_read(self):
+        cache = ResponseCache(max_size=10, path=self.path)
+        self.set(cache, 'a', b'aaaa')
+        self.set(cache, 'b', b'bbbb')
+        # Read from disk by a new session, which makes 'a' the most recent
+        cache = ResponseCache(max_size=10, path=self.path)
+        cache.get('a')
+        time.sleep(0.01)
+        self.set(cache, 'c', b'cccc')
+        cache.flush()
+
+        cache = ResponseCache(max_size=10, path=self.path)
+        self.assertEqual(cache._disk_size, 8)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_clear(self):
+        cache = ResponseCache(path=self.path)
+        self.set(cache, 'a', b'aaaa')
+        cache.clear()
+        self.assertIsNone(ResponseCache(path=self.path).get('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
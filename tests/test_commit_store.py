@@ -0,0 +1,120 @@
+from datetime import datetime
+import unittest
+
+from ghca.commit_store import COMMIT_FIELDS, CommitStore, is_ancestor
+from github3.structs import projection
+
+
+class FakeRepo(object):
+
+    """A branch of a repository, its commits listed newest first like GitHub does."""
+
+    def __init__(self):
+        self.dict_commits = dict()
+        self.head = None
+        self.list_since = []
+
+    def commit(self, sha, day, parents=(), is_head=True):
+        self.dict_commits[sha] = projection(COMMIT_FIELDS)({
+            'sha': sha, 'commit': {'committer': {'date': '2018-03-%02dT12:00:00Z' % day},
+                                   'author': {'name': 'Student'}, 'message': 'Commit %s' % sha},
+            'author': {'login': 'student'}, 'parents': [{'sha': parent} for parent in parents]})
+        if is_head:
+            self.head = sha
+
+    def ref(self, name):
+        if self.head is None:
+            return None
+        return type('Reference', (), {'object': type('GitObject', (), {'sha': self.head})})
+
+    def commits(self, sha=None, since=None, fields=None):
+        self.list_since.append(since)
+        list_stack, dict_reachable = [self.head], dict()
+        while list_stack:
+            commit = self.dict_commits[list_stack.pop()]
+            if commit.sha not in dict_reachable:
+                dict_reachable[commit.sha] = commit
+                list_stack.extend(parent['sha'] for parent in commit.parents)
+        return sorted((commit for commit in dict_reachable.values()
+                       if since is None or commit.commit_committer_date >= since),
+                      key=lambda commit: commit.commit_committer_date, reverse=True)
+
+
+class FakeConnector(object):
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    def get_repo_obj(self, name_repo):
+        return self.repo
+
+
+class IsAncestorTest(unittest.TestCase):
+
+    dict_parents = {'d': ['b', 'c'], 'c': ['a'], 'b': ['a'], 'a': []}
+
+    def test_reachable(self):
+        self.assertTrue(is_ancestor('a', 'd', self.dict_parents))
+        self.assertTrue(is_ancestor('c', 'd', self.dict_parents))
+        self.assertTrue(is_ancestor('d', 'd', self.dict_parents))
+
+    def test_not_reachable(self):
+        self.assertFalse(is_ancestor('d', 'a', self.dict_parents))
+        self.assertFalse(is_ancestor('x', 'd', self.dict_parents))
+
+
+class CommitStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = FakeRepo()
+        self.repo.commit('a', 1)
+        self.repo.commit('b', 2, ['a'])
+        self.store = CommitStore(FakeConnector(self.repo))
+
+    def timeline(self):
+        return [commit.sha for commit in self.store.timeline('group_1')]
+
+    def test_first_sync_lists_the_branch(self):
+        self.assertEqual(self.store.sync('group_1'), 2)
+        self.assertEqual(self.timeline(), ['a', 'b'])
+        self.assertEqual(self.store.latest_before('group_1', datetime(2018, 3, 1, 23)).sha, 'a')
+        self.assertIsNone(self.store.latest_before('group_1', datetime(2018, 2, 1)))
+
+    def test_unchanged_head_lists_nothing(self):
+        self.store.sync('group_1')
+        self.assertEqual(self.store.sync('group_1'), 0)
+        self.assertEqual(self.repo.list_since, [None])
+
+    def test_new_commits_listed_since_the_previous_head(self):
+        self.store.sync('group_1')
+        self.repo.commit('c', 3, ['b'])
+        self.store.sync('group_1')
+        self.assertEqual(self.repo.list_since, [None, '2018-03-02T12:00:00Z'])
+        self.assertEqual(self.timeline(), ['a', 'b', 'c'])
+
+    def test_force_push_lists_the_branch_again(self):
+        self.store.sync('group_1')
+        self.repo.commit('b2', 3, ['a'])
+        self.store.sync('group_1')
+        self.assertEqual(self.repo.list_since, [None, '2018-03-02T12:00:00Z', None])
+        self.assertEqual(self.timeline(), ['a', 'b2'])
+
+    def test_back_dated_commit_lists_the_branch_again(self):
+        self.store.sync('group_1')
+        # Merged in with a parent dated before the previous head, which since= does not return
+        self.repo.commit('x', 1, is_head=False)
+        self.repo.commit('m', 3, ['b', 'x'])
+        self.store.sync('group_1')
+        self.assertEqual(self.repo.list_since[-1], None)
+        self.assertIn('x', self.timeline())
+
+    def test_deleted_branch_has_no_commits(self):
+        self.store.sync('group_1')
+        self.repo.head = None
+        self.assertEqual(self.store.sync('group_1'), 0)
+        self.assertEqual(self.timeline(), [])
+        self.assertIsNone(self.store.latest_before('group_1', datetime(2018, 4, 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
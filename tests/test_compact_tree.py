@@ -0,0 +1,55 @@
+import unittest
+
+from github3.git import CompactTree, TreeEntry
+
+
+def entry(path, type='blob', size=1):
+    return {'path': path, 'mode': '040000' if type == 'tree' else '100644', 'type': type,
+            'size': None if type == 'tree' else size, 'sha': 'sha-' + path}
+
+
+class CompactTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = CompactTree('root', [
+            entry('src', 'tree'), entry('src/b.py'), entry('src/a.py'), entry('src/lib', 'tree'),
+            entry('src/lib/c.py'), entry('src-old/d.py'), entry('README'),
+        ])
+
+    def paths(self, entries):
+        return [e.path for e in entries]
+
+    def test_sorted_by_path(self):
+        self.assertEqual(self.tree.paths, sorted(self.tree.paths))
+        self.assertEqual(len(self.tree), 7)
+
+    def test_get(self):
+        self.assertEqual(self.tree.get('src/a.py'), TreeEntry('src/a.py', '100644', 'blob', 1, 'sha-src/a.py'))
+        self.assertIsNone(self.tree.get('src/z.py'))
+        self.assertIn('src/lib', self.tree)
+        self.assertNotIn('src/lib/', self.tree)
+
+    def test_prefix(self):
+        self.assertEqual(self.paths(self.tree.prefix('src/l')), ['src/lib', 'src/lib/c.py'])
+        self.assertEqual(len(list(self.tree.prefix(''))), 7)
+
+    def test_listdir(self):
+        # src-old has no entry of its own in this tree, only its file
+        self.assertEqual(self.paths(self.tree.listdir()), ['README', 'src'])
+        self.assertEqual(self.paths(self.tree.listdir('src')), ['src/a.py', 'src/b.py', 'src/lib'])
+        self.assertEqual(self.paths(self.tree.listdir('/src/')), ['src/a.py', 'src/b.py', 'src/lib'])
+        self.assertEqual(list(self.tree.listdir('missing')), [])
+
+    def test_walk_stays_below_directory(self):
+        # 'src-old' shares the prefix 'src' but is not below it
+        self.assertEqual(self.paths(self.tree.walk('src')), ['src/a.py', 'src/b.py', 'src/lib/c.py'])
+        self.assertEqual(self.paths(self.tree.walk('src', type='tree')), ['src/lib'])
+        self.assertEqual(len(list(self.tree.walk(type=None))), 7)
+
+    def test_blob_shas(self):
+        self.assertEqual(self.tree.blob_shas('src/lib'), {'c.py': 'sha-src/lib/c.py'})
+        self.assertEqual(self.tree.blob_shas('src/lib', relative=False), {'src/lib/c.py': 'sha-src/lib/c.py'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import csv
+import unittest
+
+from ghca.common import iter_csv_rows, parse_groups_csv, parse_student_csv
+
+
+class IterCsvRowsTest(unittest.TestCase):
+
+    def test_skips_header_and_blank_lines(self):
+        rows = list(iter_csv_rows('id, username\n\n 1 , alice \n2,"bob, jr"\n'))
+        self.assertEqual(rows, [(3, ['1', 'alice']), (4, ['2', 'bob, jr'])])
+
+    def test_rejects_rows_with_another_number_of_columns(self):
+        with self.assertRaises(csv.Error):
+            list(iter_csv_rows('id,username\n1,alice,extra\n'))
+
+    def test_rejects_header_with_one_column(self):
+        with self.assertRaises(csv.Error):
+            list(iter_csv_rows('id\n1\n'))
+
+    def test_rejects_empty_csv(self):
+        with self.assertRaises(csv.Error):
+            list(iter_csv_rows('\n\n'))
+
+
+class ParseStudentCsvTest(unittest.TestCase):
+
+    def test_maps_both_ways(self):
+        dict_ids, dict_usernames = parse_student_csv('id,username\n1,alice\n2,bob\n')
+        self.assertEqual(dict_ids, {'alice': '1', 'bob': '2'})
+        self.assertEqual(dict_usernames, {'1': 'alice', '2': 'bob'})
+
+    def test_rejects_duplicates(self):
+        self.assertIsNone(parse_student_csv('id,username\n1,alice\n2,alice\n'))
+        self.assertIsNone(parse_student_csv('id,username\n1,alice\n1,bob\n'))
+
+    def test_rejects_missing_cells(self):
+        self.assertIsNone(parse_student_csv('id,username\n1,\n'))
+
+
+class ParseGroupsCsvTest(unittest.TestCase):
+
+    def test_keeps_group_order(self):
+        dict_groups = parse_groups_csv('group|members\nb|x, y\na|z\n')
+        self.assertEqual(list(dict_groups.items()), [('b', ['x', 'y']), ('a', ['z'])])
+
+    def test_rejects_duplicate_group(self):
+        self.assertIsNone(parse_groups_csv('group|members\na|x\na|y\n'))
+
+    def test_rejects_empty_group(self):
+        self.assertIsNone(parse_groups_csv('group|members\na|x\nb|\n'))
+        self.assertIsNone(parse_groups_csv('group|members\na| , \n'))
+
+    def test_rejects_user_in_two_groups_whatever_the_case(self):
+        self.assertIsNone(parse_groups_csv('group|members\na|x\nb|y, X\n'))
+
+    def test_max_group_size(self):
+        self.assertIsNone(parse_groups_csv('group|members\na|x, y, z\n', max_group_size=2))
+        self.assertIsNotNone(parse_groups_csv('group|members\na|x, y\n', max_group_size=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
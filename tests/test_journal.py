@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ghca.journal import OperationJournal
+
+
+class OperationJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_tmp = tempfile.mkdtemp()
+        self.path_journal = os.path.join(self.dir_tmp, 'course.journal.jsonl')
+        self.list_calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_tmp)
+
+    def step(self, name):
+        self.list_calls.append(name)
+        return {'group': name}
+
+    def test_interrupted_run_resumes(self):
+        journal = OperationJournal(self.path_journal)
+        run = journal.begin('close/A1')
+        journal.call(run, 'g1', self.step, 'g1')
+
+        # Another process picks the run up after the first was killed
+        journal = OperationJournal(self.path_journal)
+        run = journal.begin('close/A1')
+        self.assertTrue(journal.is_done(run, 'g1'))
+        self.assertEqual(journal.call(run, 'g1', self.step, 'g1'), {'group': 'g1'})
+        journal.call(run, 'g2', self.step, 'g2')
+        self.assertEqual(self.list_calls, ['g1', 'g2'])
+
+    def test_completed_run_starts_again(self):
+        journal = OperationJournal(self.path_journal)
+        run = journal.begin('close/A1')
+        journal.call(run, 'g1', self.step, 'g1')
+        journal.complete(run)
+
+        journal = OperationJournal(self.path_journal)
+        run = journal.begin('close/A1')
+        self.assertFalse(journal.is_done(run, 'g1'))
+        journal.call(run, 'g1', self.step, 'g1')
+        self.assertEqual(self.list_calls, ['g1', 'g1'])
+
+    def test_forced_run_starts_again(self):
+        journal = OperationJournal(self.path_journal)
+        journal.call(journal.begin('close/A1'), 'g1', self.step, 'g1')
+        run = journal.begin('close/A1', force=True)
+        self.assertFalse(journal.is_done(run, 'g1'))
+
+    def test_line_cut_short_is_ignored(self):
+        journal = OperationJournal(self.path_journal)
+        journal.call(journal.begin('close/A1'), 'g1', self.step, 'g1')
+        with open(self.path_journal, 'a') as f:
+            f.write('{"event": "step", "run": "close/A1", "st')
+
+        journal = OperationJournal(self.path_journal)
+        self.assertTrue(journal.is_done('close/A1', 'g1'))
+
+    def test_steps_which_staged_files_wait_for_the_commit(self):
+        list_deferred = []
+        dict_staged = {'count': 0}
+
+        def stage_file(name):
+            dict_staged['count'] += 1
+            return self.step(name)
+
+        journal = OperationJournal(self.path_journal, defer=list_deferred.append,
+                                   staged=lambda: dict_staged['count'])
+        run = journal.begin('release/A1')
+        journal.call(run, 'g1', stage_file, 'g1')
+        journal.call(run, 'g2', self.step, 'g2')
+        self.assertFalse(journal.is_done(run, 'g1'))
+        self.assertTrue(journal.is_done(run, 'g2'))
+
+        # The files of g1 are committed
+        for func in list_deferred:
+            func()
+        self.assertTrue(journal.is_done(run, 'g1'))
+
+    def test_run_none_is_not_journaled(self):
+        journal = OperationJournal(self.path_journal)
+        self.assertEqual(journal.call(None, 'g1', self.step, 'g1'), {'group': 'g1'})
+        self.assertFalse(os.path.exists(self.path_journal))
+
+
+if __name__ == '__main__':
+    unittest.main()
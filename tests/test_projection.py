@@ -0,0 +1,63 @@
+import unittest
+
+from github3.repos.repo import ShortRepository
+from github3.session import GitHubSession
+from github3.structs import GitHubIterator, projection
+
+
+class FakeResponse(object):
+
+    status_code = 200
+    headers = {}
+    links = {}
+
+    def __init__(self, json):
+        self.json_items = json
+
+
+class FakeIterator(GitHubIterator):
+
+    """Iterates over pages given up front instead of fetching them."""
+
+    def __init__(self, pages, count=-1, **kwargs):
+        super(FakeIterator, self).__init__(count, 'https://api.github.com/orgs/o/repos', ShortRepository,
+                                           GitHubSession(), **kwargs)
+        self.list_pages = pages
+
+    def _pages(self, params, headers):
+        return (FakeResponse(page) for page in self.list_pages)
+
+    def _get_json(self, response):
+        return response.json_items
+
+
+class ProjectionTest(unittest.TestCase):
+
+    def test_nested_and_missing_fields(self):
+        project = projection(('sha', 'commit.committer.date', 'commit.author.name'))
+        item = project({'sha': 'abc', 'commit': {'committer': {'date': '2018-01-01T00:00:00Z'}, 'author': None}})
+        self.assertEqual(item.sha, 'abc')
+        self.assertEqual(item.commit_committer_date, '2018-01-01T00:00:00Z')
+        self.assertIsNone(item.commit_author_name)
+
+    def test_built_once_per_fields(self):
+        self.assertIs(projection(['name', 'id']), projection(('name', 'id')))
+
+
+class BulkIterationTest(unittest.TestCase):
+
+    pages = [[{'name': 'a', 'id': 1}, {'name': 'b', 'id': 2}], [{'name': 'c', 'id': 3}]]
+
+    def test_raw_items_are_the_json(self):
+        self.assertEqual(list(FakeIterator(self.pages, raw=True)), self.pages[0] + self.pages[1])
+
+    def test_fields_project_each_item(self):
+        list_items = list(FakeIterator(self.pages, fields=('name',)))
+        self.assertEqual([item.name for item in list_items], ['a', 'b', 'c'])
+
+    def test_count_stops_across_pages(self):
+        self.assertEqual(len(list(FakeIterator(self.pages, count=2, raw=True))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
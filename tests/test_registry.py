@@ -0,0 +1,78 @@
+import time
+import unittest
+
+from ghca.registry import LazyRegistry, team_slug
+
+
+class TeamSlugTest(unittest.TestCase):
+
+    def test_slug(self):
+        self.assertEqual(team_slug('Group A (2018)'), 'group-a-2018')
+        self.assertEqual(team_slug('TEST1000_2018_S1_students'), 'test1000_2018_s1_students')
+
+
+class LazyRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dict_remote = {'a': 'repo a', 'b': 'repo b'}
+        self.list_resolved = []
+        self.num_listed = 0
+        self.registry = LazyRegistry(self.resolve, self.enumerate_all)
+
+    def resolve(self, name):
+        self.list_resolved.append(name)
+        return self.dict_remote.get(name)
+
+    def enumerate_all(self):
+        self.num_listed += 1
+        return self.dict_remote.items()
+
+    def test_resolves_each_name_once(self):
+        self.assertEqual(self.registry['a'], 'repo a')
+        self.assertIn('a', self.registry)
+        self.assertEqual(self.list_resolved, ['a'])
+        self.assertEqual(self.num_listed, 0)
+
+    def test_remembers_missing_names(self):
+        self.assertNotIn('c', self.registry)
+        self.assertIsNone(self.registry.get('c'))
+        self.assertEqual(self.list_resolved, ['c'])
+        with self.assertRaises(KeyError):
+            self.registry['c']
+
+    def test_missing_names_expire(self):
+        self.registry.ttl_missing = 0.01
+        self.assertNotIn('c', self.registry)
+        self.dict_remote['c'] = 'repo c'
+        time.sleep(0.02)
+        self.assertEqual(self.registry.get('c'), 'repo c')
+
+    def test_stored_object_replaces_missing_name(self):
+        self.assertNotIn('c', self.registry)
+        self.registry['c'] = 'created c'
+        self.assertEqual(self.registry['c'], 'created c')
+        self.assertEqual(self.list_resolved, ['c'])
+
+    def test_forget_resolves_again(self):
+        self.assertNotIn('c', self.registry)
+        self.dict_remote['c'] = 'repo c'
+        self.registry.forget('c')
+        self.assertEqual(self.registry['c'], 'repo c')
+
+    def test_listing_answers_lookups(self):
+        self.assertEqual(sorted(self.registry), ['a', 'b'])
+        self.assertEqual(len(self.registry), 2)
+        self.assertTrue(self.registry.is_cached('c'))
+        self.assertNotIn('c', self.registry)
+        self.assertEqual(self.list_resolved, [])
+        self.assertEqual(self.num_listed, 1)
+
+    def test_refresh_keeps_objects_created_meanwhile(self):
+        self.registry['new'] = 'created'
+        self.registry.refresh()
+        self.assertEqual(self.registry.get_cached('new'), 'created')
+        self.assertEqual(sorted(self.registry), ['a', 'b', 'new'])
+
+
+if __name__ == '__main__':
+    unittest.main()
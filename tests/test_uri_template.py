@@ -0,0 +1,54 @@
+import unittest
+
+from uritemplate import URITemplate
+
+from github3.utils import LazyURITemplate, uri_template
+
+
+class Holder(object):
+
+    blobs_urlt = LazyURITemplate('blobs_urlt')
+
+
+class UriTemplateTest(unittest.TestCase):
+
+    def test_same_shape_shares_the_parsing(self):
+        template_a = uri_template('https://api.github.com/repos/org/a/git/blobs{/sha}')
+        template_b = uri_template('https://api.github.com/repos/org/b/git/blobs{/sha}')
+        self.assertIsNot(template_a, template_b)
+        self.assertIs(template_a.variables, template_b.variables)
+        self.assertEqual(template_a.expand(sha='1'), 'https://api.github.com/repos/org/a/git/blobs/1')
+        self.assertEqual(template_b.expand(sha='2'), 'https://api.github.com/repos/org/b/git/blobs/2')
+        self.assertEqual(template_b.expand(), 'https://api.github.com/repos/org/b/git/blobs')
+
+    def test_same_uri_returns_the_same_template(self):
+        uri = 'https://api.github.com/repos/org/a/compare/{base}...{head}'
+        self.assertIs(uri_template(uri), uri_template(uri))
+
+    def test_other_shape_is_parsed(self):
+        template = uri_template('https://api.github.com/repos/org/a/issues{/number}{?state}')
+        self.assertEqual(template.expand(number=3, state='open'),
+                         'https://api.github.com/repos/org/a/issues/3?state=open')
+
+
+class LazyURITemplateTest(unittest.TestCase):
+
+    def test_parsed_on_first_read(self):
+        holder = Holder()
+        holder.blobs_urlt = 'https://api.github.com/repos/org/a/git/blobs{/sha}'
+        self.assertNotIsInstance(holder.__dict__['blobs_urlt'], URITemplate)
+        template = holder.blobs_urlt
+        self.assertIsInstance(template, URITemplate)
+        self.assertIs(holder.blobs_urlt, template)
+
+    def test_none_stays_none(self):
+        holder = Holder()
+        holder.blobs_urlt = None
+        self.assertIsNone(holder.blobs_urlt)
+
+    def test_unset_raises_attribute_error(self):
+        self.assertFalse(hasattr(Holder(), 'blobs_urlt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
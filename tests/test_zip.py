@@ -0,0 +1,57 @@
+import io
+import unittest
+import zipfile
+
+from ghca.common import strip_zip_root, write_zip_stream, zip_entry_info
+
+
+def build_zip(dict_files):
+    file_zip = io.BytesIO()
+    with zipfile.ZipFile(file_zip, 'w') as zf:
+        for filename, file_content in dict_files.items():
+            zf.writestr(filename, file_content)
+    file_zip.seek(0)
+    return file_zip
+
+
+class ZipEntryInfoTest(unittest.TestCase):
+
+    def test_compressed_files_are_stored(self):
+        self.assertEqual(zip_entry_info('a/photo.JPG').compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(zip_entry_info('a/notes.txt').compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_dot_in_directory_is_not_an_extension(self):
+        self.assertEqual(zip_entry_info('a.zip/README').compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_marked_as_created_on_windows(self):
+        self.assertEqual(zip_entry_info('a.txt').create_system, 0)
+
+
+class StripZipRootTest(unittest.TestCase):
+
+    def test_drops_top_level_folder(self):
+        file_in = build_zip({'org-repo-abc123/': b'', 'org-repo-abc123/src/': b'',
+                             'org-repo-abc123/src/main.py': b'print(1)\n', 'org-repo-abc123/README': b'hi'})
+        file_out = io.BytesIO()
+        self.assertEqual(strip_zip_root(file_in, file_out), 2)
+
+        file_out.seek(0)
+        with zipfile.ZipFile(file_out) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['README', 'src/main.py'])
+            self.assertEqual(zf.read('src/main.py'), b'print(1)\n')
+
+
+class WriteZipStreamTest(unittest.TestCase):
+
+    def test_writes_each_file(self):
+        file_out = io.BytesIO()
+        self.assertEqual(write_zip_stream(iter([('a.txt', u'caf\xe9'), ('b/c.bin', b'\x00\x01')]), file_out), 2)
+
+        file_out.seek(0)
+        with zipfile.ZipFile(file_out) as zf:
+            self.assertEqual(zf.read('a.txt'), u'caf\xe9'.encode('UTF-8'))
+            self.assertEqual(zf.read('b/c.bin'), b'\x00\x01')
+
+
+if __name__ == '__main__':
+    unittest.main()